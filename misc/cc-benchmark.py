@@ -0,0 +1,189 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from xml.dom import minidom
+from xml.etree import ElementTree as ET
+
+MISC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, MISC_DIR)
+
+from cc_cli import load_script
+from cc_profile import peak_rss_mb
+from cc_synthetic import generate_course, generate_file_repository
+
+PRESETS = {
+    'small': {'units': 5, 'activities_per_unit': 10, 'description_size': 500, 'files': 0},
+    'medium': {'units': 20, 'activities_per_unit': 25, 'description_size': 2000, 'files': 5},
+    'large': {'units': 50, 'activities_per_unit': 100, 'description_size': 5000, 'files': 20},
+}
+
+# The manifest-* scenarios time only the serialization of the manifest
+# Element: the exporter's single-pass serializer (indented or compact),
+# against the ET.tostring -> minidom -> toprettyxml round-trip it replaced
+SCENARIOS = ('export', 'import', 'roundtrip', 'manifest-xml', 'manifest-compact', 'manifest-minidom')
+DEFAULT_SCENARIOS = ('export', 'import', 'roundtrip')
+
+def legacy_prettify(elem):
+    """The previous ET.tostring -> minidom -> toprettyxml round-trip"""
+    rough_string = ET.tostring(elem, 'utf-8')
+    return minidom.parseString(rough_string).toprettyxml(indent="  ")
+
+def run_manifest_scenario(scenario, paths, exporter_module):
+    """Serialize the course's manifest once, timing only the serialization"""
+    exporter = exporter_module.CourseomaticExporter(paths['course'], pretty=scenario != 'manifest-compact')
+    manifest = exporter.build_manifest()
+    serialize = legacy_prettify if scenario == 'manifest-minidom' else exporter.prettify
+    start = time.perf_counter()
+    serialize(manifest)
+    return {'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb()}
+
+def run_scenario(scenario, paths):
+    """Run one scenario in the current (fresh) process and time it"""
+    exporter_module = load_script('cc-export-complete.py', 'cc_export_complete')
+    importer_module = load_script('cc-import.py', 'cc_import')
+    if scenario.startswith('manifest-'):
+        return run_manifest_scenario(scenario, paths, exporter_module)
+    start = time.perf_counter()
+    if scenario in ('export', 'roundtrip'):
+        exporter = exporter_module.CourseomaticExporter(paths['course'], file_repository=paths['files'])
+        exporter.export_to_cc(paths['output'])
+    if scenario in ('import', 'roundtrip'):
+        cartridge = paths['output'] if scenario == 'roundtrip' else paths['cartridge']
+        course_data = importer_module.CommonCartridgeImporter().import_cartridge(cartridge)
+        with open(paths['imported'], 'w', encoding='utf-8') as f:
+            json.dump(course_data, f, ensure_ascii=False)
+    return {'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb()}
+
+def run_isolated(scenario, paths):
+    """Run a scenario in a new process so peak RSS is measured per run"""
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(run_scenario, (scenario, paths))
+
+def prepare(params, workdir):
+    """Write the synthetic course, file repository and a reference cartridge"""
+    course_data = generate_course(
+        units=params['units'],
+        activities_per_unit=params['activities_per_unit'],
+        learning_outcomes=params['learning_outcomes'],
+        assessed_fraction=params['assessed_fraction'],
+        description_size=params['description_size'],
+        seed=params['seed']
+    )
+    paths = {
+        'course': os.path.join(workdir, 'course.json'),
+        'files': None,
+        'cartridge': os.path.join(workdir, 'reference.imscc'),
+        'output': os.path.join(workdir, 'output.imscc'),
+        'imported': os.path.join(workdir, 'imported.json'),
+    }
+    with open(paths['course'], 'w', encoding='utf-8') as f:
+        json.dump(course_data, f, ensure_ascii=False)
+    if params['files']:
+        paths['files'] = os.path.join(workdir, 'fileData.json')
+        with open(paths['files'], 'w', encoding='utf-8') as f:
+            json.dump(generate_file_repository(params['files'], params['file_size'],
+                                               compressible=params['compressible'], seed=params['seed']), f)
+
+    exporter_module = load_script('cc-export-complete.py', 'cc_export_complete')
+    exporter_module.CourseomaticExporter(paths['course'], file_repository=paths['files']).export_to_cc(paths['cartridge'])
+    return paths, len(course_data['activities'])
+
+def benchmark(params, scenarios, repeat):
+    """Run each scenario `repeat` times, keeping the fastest run"""
+    workdir = tempfile.mkdtemp(prefix='cc-benchmark-')
+    try:
+        paths, activity_count = prepare(params, workdir)
+        input_bytes = os.path.getsize(paths['course']) + (os.path.getsize(paths['files']) if paths['files'] else 0)
+        cartridge_bytes = os.path.getsize(paths['cartridge'])
+        results = []
+        for scenario in scenarios:
+            runs = [run_isolated(scenario, paths) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run['seconds'])
+            processed = cartridge_bytes if scenario == 'import' else input_bytes
+            results.append({
+                'scenario': scenario,
+                'wall_seconds': round(best['seconds'], 4),
+                'activities_per_sec': round(activity_count / best['seconds'], 1),
+                'mb_per_sec': round(processed / 1e6 / best['seconds'], 2),
+                'peak_rss_mb': max((run['peak_rss_mb'] or 0) for run in runs) or None,
+                'runs': [round(run['seconds'], 4) for run in runs]
+            })
+        return {
+            'params': params,
+            'activities': activity_count,
+            'input_bytes': input_bytes,
+            'cartridge_bytes': cartridge_bytes,
+            'results': results
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def compare(report, baseline_file):
+    """Print the change in wall time against an earlier report"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {r['scenario']: r for r in baseline.get('results', [])}
+    for result in report['results']:
+        old = previous.get(result['scenario'])
+        if old:
+            ratio = result['wall_seconds'] / old['wall_seconds'] if old['wall_seconds'] else float('inf')
+            print(f"  {result['scenario']:<16} {old['wall_seconds']:.4f}s -> {result['wall_seconds']:.4f}s ({ratio:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Courseomatic Common Cartridge export and import')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small', help='Course size preset')
+    parser.add_argument('--units', type=int)
+    parser.add_argument('--activities-per-unit', type=int)
+    parser.add_argument('--learning-outcomes', type=int, default=6)
+    parser.add_argument('--assessed-fraction', type=float, default=0.2)
+    parser.add_argument('--description-size', type=int, help='Approximate characters of HTML per description')
+    parser.add_argument('--files', type=int, help='Number of attached files in the file repository')
+    parser.add_argument('--file-size', type=int, default=100_000, help='Bytes per attached file')
+    parser.add_argument('--incompressible-files', action='store_true',
+                        help='Attach random binary images instead of HTML handouts, which compress well')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scenarios', default=','.join(DEFAULT_SCENARIOS),
+                        help=f"Comma-separated scenarios to run ({', '.join(SCENARIOS)}; "
+                             f"default: {','.join(DEFAULT_SCENARIOS)})")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--compare', metavar='REPORT', help='Earlier JSON report to compare against')
+    args = parser.parse_args()
+
+    params = dict(PRESETS[args.preset])
+    for name in ('units', 'activities_per_unit', 'description_size', 'files'):
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+    params.update(learning_outcomes=args.learning_outcomes, assessed_fraction=args.assessed_fraction,
+                  file_size=args.file_size, compressible=not args.incompressible_files, seed=args.seed)
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = benchmark(params, scenarios, args.repeat)
+    report['python'] = platform.python_version()
+    report['platform'] = platform.platform()
+    report['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+    print(f"{report['activities']} activities, {report['input_bytes'] / 1e6:.2f} MB input, "
+          f"{report['cartridge_bytes'] / 1e6:.2f} MB cartridge")
+    for result in report['results']:
+        print(f"  {result['scenario']:<16} {result['wall_seconds']:8.4f}s  "
+              f"{result['activities_per_sec']:10.1f} act/s  {result['mb_per_sec']:8.2f} MB/s  "
+              f"peak RSS {result['peak_rss_mb']} MB")
+    if args.compare:
+        compare(report, args.compare)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
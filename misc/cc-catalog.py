@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+MISC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, MISC_DIR)
+
+from cc_catalog import CatalogStore
+from cc_cli import collect_input_files, files_for, load_script, plan_output_names
+
+def ingest(store, args):
+    counts = {'added': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+    start = time.perf_counter()
+    for course_file in collect_input_files(args.inputs):
+        if os.path.basename(course_file) == args.files_name:
+            continue
+        try:
+            status = store.ingest(course_file, args.files or files_for(course_file, args.files_name), force=args.force)
+        except Exception as e:
+            print(f"Error ingesting {course_file}: {e}", file=sys.stderr)
+            status = 'failed'
+        counts[status] += 1
+        if args.verbose:
+            print(f"{status:<10} {course_file}")
+    removed = store.collect_garbage()
+    print(f"{counts['added']} added, {counts['updated']} updated, {counts['unchanged']} unchanged, "
+          f"{counts['failed']} failed, {removed} unused blobs removed in {time.perf_counter() - start:.2f}s")
+    return 1 if counts['failed'] else 0
+
+def list_courses(store, args):
+    for course_id, code, name, program, source in store.courses(code=args.code, program=args.program):
+        print(f"{code or '-':<12} {name:<50} {program or '':<30} {source}")
+    return 0
+
+def find(store, args):
+    if args.team_member and not any((args.type, args.specific_activity, args.unit, args.code, args.assessed)):
+        rows = [{'id': course_id, 'code': code, 'name': name}
+                for course_id, code, name in store.courses_with_team_member(args.team_member)]
+        activities = store.find_activities(team_member=args.team_member)
+    else:
+        rows = None
+        activities = store.find_activities(type=args.type, specific_activity=args.specific_activity,
+                                           team_member=args.team_member, unit_id=args.unit, code=args.code,
+                                           assessed=True if args.assessed else None)
+    if args.json:
+        result = {'activities': activities} if rows is None else {'courses': rows, 'activities': activities}
+        json.dump(result, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return 0
+    for row in rows or []:
+        print(f"course {row['code'] or '-':<12} {row['name']}")
+    for activity in activities:
+        print(f"{activity['code'] or '-':<12} {activity['type'] or '':<14} {activity['specific_activity'] or '':<24} "
+              f"{activity['title']}{' (assessed)' if activity['is_assessed'] else ''}")
+    print(f"{len(activities)} activities", file=sys.stderr)
+    return 0
+
+def search(store, args):
+    start = time.perf_counter()
+    results = store.search(' '.join(args.query), type=args.type, specific_activity=args.specific_activity,
+                           kind=args.kind, code=args.code, limit=args.limit, raw=args.raw)
+    elapsed = time.perf_counter() - start
+    if args.json:
+        json.dump(results, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        for result in results:
+            kind = result['specific_activity'] or result['type'] or result['kind']
+            print(f"{result['score']:6.2f}  {result['code'] or '-':<12} {kind:<14} {result['title']}")
+            print(f"        {result['snippet']}")
+    print(f"{len(results)} matches in {elapsed * 1000:.1f}ms", file=sys.stderr)
+    return 0
+
+def export(store, args):
+    exporter_module = load_script('cc-export-complete.py', 'cc_export_complete')
+    if args.all:
+        course_ids = [(course_id, code) for course_id, code, name, program, source in store.courses(program=args.program)]
+        os.makedirs(args.output, exist_ok=True)
+        # Named after their codes, made safe and unique (courses may share a code)
+        output_files = plan_output_names([(code or '').strip() or f"course-{course_id}" for course_id, code in course_ids],
+                                         args.output, '.imscc')
+    else:
+        if not args.course:
+            print("Error: give a course code or source path, or --all", file=sys.stderr)
+            return 2
+        course_ids = [(store.course_id(args.course), None)]
+        output_files = [args.output or f"{args.course}.imscc"]
+
+    failed = 0
+    start = time.perf_counter()
+    for (course_id, code), output_file in zip(course_ids, output_files):
+        try:
+            exporter = exporter_module.CourseomaticExporter(
+                store.load_model(course_id),
+                pretty=not args.compact,
+                file_repository=store.file_entries(course_id) if store.has_attachments(course_id) else None,
+                cache_dir=args.cache_dir,
+                compress_level=args.compress_level,
+                normalize_html=args.minify_html,
+                dedupe=args.dedupe
+            )
+            exporter.export_to_cc(output_file)
+            print(f"Exported {output_file}")
+        except Exception as e:
+            print(f"Error exporting course {code or course_id}: {e}", file=sys.stderr)
+            failed += 1
+    if args.all:
+        print(f"{len(course_ids) - failed} of {len(course_ids)} courses exported in {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+def remove(store, args):
+    missing = [course_file for course_file in args.inputs if not store.remove(course_file)]
+    for course_file in missing:
+        print(f"Not in the catalog: {course_file}", file=sys.stderr)
+    print(f"{store.collect_garbage()} unused blobs removed")
+    return 1 if missing else 0
+
+def stats(store, args):
+    counts = store.stats()
+    counts['catalog_mb'] = round(os.path.getsize(store.path) / (1 << 20), 2)
+    for key, value in counts.items():
+        print(f"{key:<12} {value}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep many Courseomatic course designs in one indexed catalog file')
+    parser.add_argument('catalog', help='Catalog file (SQLite); created if missing')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser('ingest', help='Add course JSON files, refreshing any that changed')
+    ingest_parser.add_argument('inputs', nargs='+', metavar='PATTERN', help='Course JSON files or glob patterns')
+    ingest_parser.add_argument('--files', help='fileData.json of attachments for every course ingested')
+    ingest_parser.add_argument('--files-name', default='fileData.json',
+                               help='Attachments file to pick up from each course file\'s directory '
+                                    '(default: fileData.json; empty to disable)')
+    ingest_parser.add_argument('--force', action='store_true', help='Re-ingest even unchanged files')
+    ingest_parser.add_argument('--verbose', action='store_true', help='Print the outcome for each file')
+
+    list_parser = commands.add_parser('list', help='List the courses in the catalog')
+    list_parser.add_argument('--code', help='Only the course with this code')
+    list_parser.add_argument('--program', help='Only courses in this program')
+
+    find_parser = commands.add_parser('find', help='Find activities using the catalog indexes')
+    find_parser.add_argument('--type', help='Activity type, e.g. assessment')
+    find_parser.add_argument('--specific-activity', help='Specific activity, e.g. quiz')
+    find_parser.add_argument('--team-member', help='Assigned team member (also lists the courses they are on)')
+    find_parser.add_argument('--unit', help='Unit id')
+    find_parser.add_argument('--code', help='Course code')
+    find_parser.add_argument('--assessed', action='store_true', help='Only assessed activities')
+    find_parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    search_parser = commands.add_parser('search', help='Full-text search of course, unit and activity text')
+    search_parser.add_argument('query', nargs='+', help='Words that must all appear; word* matches a prefix')
+    search_parser.add_argument('--type', help='Only activities of this type')
+    search_parser.add_argument('--specific-activity', help='Only activities of this specific activity')
+    search_parser.add_argument('--kind', choices=['course', 'unit', 'activity'], help='Only this kind of item')
+    search_parser.add_argument('--code', help='Only this course')
+    search_parser.add_argument('--limit', type=int, default=20, help='Most results to show (default: 20)')
+    search_parser.add_argument('--raw', action='store_true', help='Treat the query as an FTS5 query expression')
+    search_parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    export_parser = commands.add_parser('export', help='Export courses to Common Cartridge from the catalog')
+    export_parser.add_argument('course', nargs='?', help='Course code or source path')
+    export_parser.add_argument('--all', action='store_true', help='Export every course (or every course in --program)')
+    export_parser.add_argument('--program', help='With --all, only courses in this program')
+    export_parser.add_argument('--output', help='Output .imscc file, or with --all the output directory')
+    export_parser.add_argument('--compact', action='store_true', help='Write compact XML')
+    export_parser.add_argument('--cache-dir', help='Cache rendered members here to speed up repeated exports')
+    export_parser.add_argument('--minify-html', action='store_true',
+                               help='Clean up authored HTML and minify the stylesheet')
+    export_parser.add_argument('--dedupe', action='store_true',
+                               help='Store identical pages (and same-named attached files) once, by content hash')
+    export_parser.add_argument('--compress-level', type=int, choices=range(10), metavar='0-9',
+                               help='Deflate compression level (default: zlib default)')
+
+    remove_parser = commands.add_parser('remove', help='Remove courses from the catalog')
+    remove_parser.add_argument('inputs', nargs='+', metavar='COURSE_FILE', help='Source paths of the courses')
+
+    commands.add_parser('stats', help='Show what the catalog holds')
+    args = parser.parse_args()
+
+    if args.command == 'export' and args.all and not args.output:
+        parser.error('--all needs --output DIRECTORY')
+
+    handlers = {'ingest': ingest, 'list': list_courses, 'find': find, 'search': search, 'export': export, 'remove': remove,
+                'stats': stats}
+    with CatalogStore(args.catalog) as store:
+        try:
+            return handlers[args.command](store, args)
+        except KeyError as e:
+            print(f"Error: {e.args[0]}", file=sys.stderr)
+            return 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
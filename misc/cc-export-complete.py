@@ -1,21 +1,156 @@
+import hashlib
+import io
 import json
 import uuid
 import zipfile
 import os
+import posixpath
+import mimetypes
+import sys
+import time
 from datetime import datetime
 from xml.etree import ElementTree as ET
-from xml.dom import minidom
 import re
 import html
+from cc_model import CourseModel
+import cc_html
+import cc_templates
+from cc_cache import RenderCache, file_digest
+from cc_cli import collect_input_files, files_for, plan_output_files
+from cc_profile import NULL_PROFILER, Profiler
+from cc_zipwriter import STREAM_BUFFER_SIZE, MemberWriter, StreamSink, is_seekable
+from cc_stream import LazyText, load_course_model, text_chunks, iter_repository_files, iter_decoded_file
+from cc_templates import MINIFIED_STYLESHEET, STYLESHEET, STYLESHEET_IDENTIFIER, STYLESHEET_PATH
+
+# Members stored once per distinct content when deduplicating
+DEDUPED_KINDS = ('unit', 'activity')
+
+# MIME types that are already compressed, so deflating them again only costs time
+STORED_MIME_PREFIXES = ('image/', 'video/', 'audio/')
+STORED_MIME_EXCEPTIONS = ('image/svg+xml', 'image/bmp', 'image/x-ms-bmp', 'image/tiff')
+STORED_MIME_TYPES = (
+    'application/pdf', 'application/zip', 'application/gzip', 'application/x-gzip',
+    'application/x-7z-compressed', 'application/x-rar-compressed', 'application/epub+zip',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+)
+
+def is_precompressed(mime_type):
+    """True if files of this MIME type gain nothing from deflate"""
+    mime_type = (mime_type or '').lower()
+    if mime_type in STORED_MIME_EXCEPTIONS:
+        return False
+    return mime_type.startswith(STORED_MIME_PREFIXES) or mime_type in STORED_MIME_TYPES
+
+def zip_date_time():
+    """Fixed timestamp for every member, so identical input gives an identical archive.
+
+    Honours SOURCE_DATE_EPOCH (reproducible-builds convention), else 1980-01-01.
+    """
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch:
+        return time.gmtime(max(int(epoch), 315532800))[:6]
+    return (1980, 1, 1, 0, 0, 0)
+
+def _or(value, default):
+    """Use the default for fields that are absent from the course file"""
+    return default if value is None else value
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>'
+
+def serialize_xml(elem, write, indent="  "):
+    """Serialize an Element tree in a single pass, calling write() with each piece.
+
+    With indent=None the output is compact (no indentation or newlines). Text
+    content is escaped but never re-wrapped, so mixed HTML in mattext etc. is
+    preserved exactly.
+    """
+    newline = "\n" if indent is not None else ""
+    write(XML_DECLARATION + newline)
+    _serialize_element(elem, write, indent, newline, 0)
+
+def _serialize_element(elem, write, indent, newline, depth):
+    pad = indent * depth if indent is not None else ""
+    if isinstance(elem.text, LazyText):
+        # Spilled text is escaped and written a chunk at a time
+        attrs = "".join(f' {key}="{html.escape(str(value))}"' for key, value in elem.attrib.items())
+        write(f"{pad}<{elem.tag}{attrs}>")
+        for chunk in text_chunks(elem.text):
+            write(html.escape(chunk, quote=False))
+        write(f"</{elem.tag}>{newline}")
+        return
+    attrs = "".join(f' {key}="{html.escape(str(value))}"' for key, value in elem.attrib.items())
+    children = list(elem)
+    if not children and not elem.text:
+        write(f"{pad}<{elem.tag}{attrs}/>{newline}")
+    elif not children:
+        write(f"{pad}<{elem.tag}{attrs}>{html.escape(elem.text, quote=False)}</{elem.tag}>{newline}")
+    else:
+        write(f"{pad}<{elem.tag}{attrs}>{newline}")
+        if elem.text and elem.text.strip():
+            write(f"{pad}{indent or ''}{html.escape(elem.text, quote=False)}{newline}")
+        for child in children:
+            _serialize_element(child, write, indent, newline, depth + 1)
+        write(f"{pad}</{elem.tag}>{newline}")
 
 class CourseomaticExporter:
-    def __init__(self, json_file):
-        if isinstance(json_file, str):
-            with open(json_file, 'r', encoding='utf-8') as f:
-                self.course_data = json.load(f)
-        else:
-            self.course_data = json_file
-            
+    def __init__(self, json_file, pretty=True, file_repository=None, cache_dir=None, profiler=None,
+                 compress_level=None, compress_jobs=None, store_only=False, normalize_html=False, dedupe=False):
+        # Stage/per-member timings; NULL_PROFILER records nothing
+        self.profiler = profiler or NULL_PROFILER
+
+        with self.profiler.span('load'):
+            if isinstance(json_file, str):
+                # Large files are streamed, with big descriptions spilled to disk
+                self.model = load_course_model(json_file)
+            elif isinstance(json_file, CourseModel):
+                self.model = json_file
+            else:
+                self.model = CourseModel.from_dict(json_file)
+
+        # Indented XML for readability, or compact XML for production
+        self.xml_indent = "  " if pretty else None
+
+        # Optional fileData.json repository of attached files (its path, or an
+        # iterable of its {name, mimeType, data} entries), and the
+        # web_resources/ entries written from it during export
+        self.file_repository = file_repository
+        self.web_resources = []
+        self.web_resource_hrefs = set()
+
+        # Optional clean-up of authored HTML (empty paragraphs, dir="auto",
+        # toggle-icon spans, whitespace), cached per input string
+        self.html_normalizer = cc_html.HTMLNormalizer() if normalize_html else None
+
+        # Optional content-addressed storage: unit/activity pages and attached
+        # files are stored once per distinct content, under paths derived from
+        # its hash, and member_hrefs maps each logical path to the stored one
+        self.dedupe = dedupe
+        self.member_hrefs = {}
+        self.stored_digests = {}
+        self.stored_members = {}
+        self.referenced_members = set()
+        self.dedupe_stats = {'members': 0, 'duplicates': 0, 'bytes_saved': 0}
+
+        # Optional on-disk cache of rendered members for incremental re-export
+        self.cache = None
+        if cache_dir:
+            sources = [os.path.abspath(__file__), os.path.abspath(cc_templates.__file__)]
+            salt = f"{self.xml_indent!r}"
+            if normalize_html:
+                sources.append(os.path.abspath(cc_html.__file__))
+                salt += ":normalized"
+            self.cache = RenderCache(cache_dir, salt=f"{file_digest(*sources)}:{salt}")
+        self.zip_date_time = zip_date_time()
+        self._outcome_fragments = None
+
+        # Deflate level (zlib default if None), number of compression threads
+        # (one per CPU if None) and store-only mode for compressed content
+        self.compress_level = compress_level
+        self.compress_jobs = compress_jobs
+        self.compress_type = zipfile.ZIP_STORED if store_only else zipfile.ZIP_DEFLATED
+        
         self.ns = {
             'xmlns': "http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1",
             'xmlns:lom': "http://ltsc.ieee.org/xsd/imsccv1p1/LOM/resource",
@@ -25,32 +160,53 @@ class CourseomaticExporter:
         }
 
     def prettify(self, elem):
-        """Return a pretty-printed XML string for the Element."""
-        rough_string = ET.tostring(elem, 'utf-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ")
+        """Return the XML string for the Element (indented unless exporting compact XML)."""
+        parts = []
+        serialize_xml(elem, parts.append, self.xml_indent)
+        return "".join(parts)
+
+    def zip_info(self, member_name, compress_type=None):
+        """ZipInfo with the fixed export timestamp"""
+        info = zipfile.ZipInfo(member_name, self.zip_date_time)
+        info.compress_type = self.compress_type if compress_type is None else compress_type
+        info.external_attr = 0o600 << 16
+        return info
+
+    def write_xml(self, cc_zip, member_name, elem):
+        """Serialize the Element straight into a zip member without building the whole string"""
+        with cc_zip.open(self.zip_info(member_name), 'w') as raw:
+            with io.TextIOWrapper(raw, encoding='utf-8', newline='') as out:
+                serialize_xml(elem, out.write, self.xml_indent)
 
     def create_module_meta(self):
         """Create module metadata XML file"""
+        return self.prettify(self.build_module_meta())
+
+    def build_module_meta(self):
+        """Build the module metadata element tree"""
         module = ET.Element('module')
         
         title = ET.SubElement(module, 'title')
-        title.text = self.course_data['course']['name']
+        title.text = self.model.course.name
         
         description = ET.SubElement(module, 'description')
-        description.text = self.course_data['course']['description']
+        description.text = self.model.course.description
         
         org_info = ET.SubElement(module, 'org_info')
         org_unit = ET.SubElement(org_info, 'org_unit')
-        org_unit.text = self.course_data['course'].get('faculty', '')
+        org_unit.text = self.model.course.faculty
         
-        return self.prettify(module)
+        return module
 
     def create_manifest(self):
         """Create the imsmanifest.xml file content"""
+        return self.prettify(self.build_manifest())
+
+    def build_manifest(self):
+        """Build the imsmanifest.xml element tree"""
         # Create root element with namespaces
         manifest = ET.Element('manifest', 
-                            identifier=f"courseomatic_{self.course_data['course']['code'].strip()}",
+                            identifier=f"courseomatic_{self.model.course.code.strip()}",
                             version="1.1",
                             **self.ns)
 
@@ -69,29 +225,28 @@ class CourseomaticExporter:
         
         # Add title
         title = ET.SubElement(organization, 'title')
-        title.text = self.course_data['course']['name']
+        title.text = self.model.course.name
 
         # Process units as items
-        for unit in self.course_data['units']:
+        for unit in self.model.units:
             unit_item = ET.SubElement(organization, 'item', 
-                                    identifier=f"UNIT_{unit['id']}")
+                                    identifier=f"UNIT_{unit.id}")
             unit_title = ET.SubElement(unit_item, 'title')
-            unit_title.text = unit['title']
+            unit_title.text = unit.title
 
             # Process activities in this unit
-            unit_activities = [a for a in self.course_data['activities'] 
-                             if a['unitId'] == unit['id']]
-            for activity in unit_activities:
+            for activity in self.model.unit_activities(unit.id):
                 activity_item = ET.SubElement(unit_item, 'item',
-                                            identifier=f"ACTIVITY_{activity['id']}")
+                                            identifier=f"ACTIVITY_{activity.id}",
+                                            identifierref=f"ACTIVITY_{activity.id}_resource")
                 activity_title = ET.SubElement(activity_item, 'title')
-                activity_title.text = activity['title']
+                activity_title.text = activity.title
 
         # Add resources
         resources = ET.SubElement(manifest, 'resources')
         self.add_resources(resources)
 
-        return self.prettify(manifest)
+        return manifest
 
     def add_resources(self, resources_elem):
         """Add resource entries to the manifest"""
@@ -114,47 +269,51 @@ class CourseomaticExporter:
         file_elem.set('href', "course_info.html")
 
         # Add resources for units
-        for unit in self.course_data['units']:
+        for unit in self.model.units:
             unit_resource = ET.SubElement(resources_elem, 'resource',
-                                        identifier=f"UNIT_{unit['id']}_resource",
+                                        identifier=f"UNIT_{unit.id}_resource",
                                         type="webcontent",
-                                        href=f"units/{unit['id']}.html")
+                                        href=f"units/{unit.id}.html")
             
             file_elem = ET.SubElement(unit_resource, 'file')
-            file_elem.set('href', f"units/{unit['id']}.html")
+            file_elem.set('href', f"units/{unit.id}.html")
 
         # Add resources for activities
-        for activity in self.course_data['activities']:
-            if activity['isAssessed']:
+        for activity in self.model.activities:
+            if activity.is_assessed:
                 # Create assessment resource
                 activity_resource = ET.SubElement(resources_elem, 'resource',
-                                                identifier=f"ACTIVITY_{activity['id']}_resource",
+                                                identifier=f"ACTIVITY_{activity.id}_resource",
                                                 type="imsqti_xmlv1p2/imscc_xmlv1p1/assessment",
-                                                href=f"assessments/{activity['id']}/assessment.xml")
+                                                href=f"assessments/{activity.id}/assessment.xml")
                 
                 # Add assessment file
                 file_elem = ET.SubElement(activity_resource, 'file')
-                file_elem.set('href', f"assessments/{activity['id']}/assessment.xml")
+                file_elem.set('href', f"assessments/{activity.id}/assessment.xml")
                 
                 # Add metadata file
                 metadata_elem = ET.SubElement(activity_resource, 'file')
-                metadata_elem.set('href', f"assessments/{activity['id']}/assessment_meta.xml")
+                metadata_elem.set('href', f"assessments/{activity.id}/assessment_meta.xml")
             else:
                 # Create content resource
                 activity_resource = ET.SubElement(resources_elem, 'resource',
-                                                identifier=f"ACTIVITY_{activity['id']}_resource",
+                                                identifier=f"ACTIVITY_{activity.id}_resource",
                                                 type="webcontent",
-                                                href=f"activities/{activity['id']}.html")
+                                                href=f"activities/{activity.id}.html")
                 
                 file_elem = ET.SubElement(activity_resource, 'file')
-                file_elem.set('href', f"activities/{activity['id']}.html")
+                file_elem.set('href', f"activities/{activity.id}.html")
 
     def create_qti_assessment(self, activity):
         """Create a QTI-format assessment XML file"""
+        return self.prettify(self.build_qti_assessment(activity))
+
+    def build_qti_assessment(self, activity):
+        """Build the QTI assessment element tree"""
         assessment = ET.Element('assessment', {
             'xmlns': "http://www.imsglobal.org/xsd/ims_qtiasiv1p2",
-            'ident': f"assessment_{activity['id']}",
-            'title': activity['title']
+            'ident': f"assessment_{activity.id}",
+            'title': activity.title
         })
         
         # Add metadata
@@ -163,7 +322,7 @@ class CourseomaticExporter:
             'cc_profile': 'cc.assignment.generic',
             'cc_assignment_type': 'assignment',
             'qmd_assessmenttype': 'Assignment',
-            'qmd_weighting': str(activity.get('weighting', '100')),
+            'qmd_weighting': str(_or(activity.weighting, '100')),
             'qmd_computerscored': 'No',
         }
         
@@ -190,278 +349,621 @@ class CourseomaticExporter:
         mattext.text = f"""
         <div class="assignment-content">
             <div class="description">
-                {activity['description']}
+                {self.authored(activity.description)}
             </div>
             <div class="details">
-                <p>Weight: {activity.get('weighting', '0')}%</p>
-                <p>Required: {'Yes' if activity.get('isRequired') else 'No'}</p>
+                <p>Weight: {_or(activity.weighting, '0')}%</p>
+                <p>Required: {'Yes' if activity.is_required else 'No'}</p>
             </div>
         </div>
         """
         
-        return self.prettify(assessment)
+        return assessment
 
     def create_assessment_meta(self, activity):
         """Create assessment metadata XML file"""
+        return self.prettify(self.build_assessment_meta(activity))
+
+    def build_assessment_meta(self, activity):
+        """Build the assessment metadata element tree"""
         meta = ET.Element('assignment', {
             'xmlns': "http://www.brightspace.com/competencies/",
             'type': "assignment"
         })
         
         title = ET.SubElement(meta, 'title')
-        title.text = activity['title']
+        title.text = activity.title
         
         instructions = ET.SubElement(meta, 'instructions')
         instructions.set('texttype', 'text/html')
-        instructions.text = activity['description']
+        instructions.text = self.authored(activity.description)
         
         grade = ET.SubElement(meta, 'grade')
         grade.set('max', '100')
         
-        return self.prettify(meta)
+        return meta
+
+    def authored(self, content):
+        """Authored HTML as it goes into a page: normalized if that is enabled, otherwise untouched"""
+        if self.html_normalizer is None:
+            return content
+        return self.html_normalizer(content)
+
+    def stylesheet_href(self, page_path):
+        """Relative link from a page to the shared stylesheet"""
+        return "../" * page_path.count("/") + STYLESHEET_PATH
+
+    def outcome_fragments(self):
+        """Per-outcome HTML fragments, built once per course"""
+        if self._outcome_fragments is None:
+            self._outcome_fragments = [
+                cc_templates.OUTCOME_PARAGRAPH.render(number=i + 1, text=outcome)
+                for i, outcome in enumerate(self.model.course.learning_outcomes)
+            ]
+        return self._outcome_fragments
+
+    def activity_outcomes_html(self, activity):
+        """Learning outcome paragraphs for an activity"""
+        fragments = self.outcome_fragments()
+        return "".join(fragments[i] for i, outcome in self.model.activity_outcomes(activity))
 
     def create_activity_html(self, activity):
         """Create HTML content for an activity"""
-        html_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
-<html xmlns="http://www.w3.org/1999/xhtml">
-<head>
-    <title>{activity['title']}</title>
-    <meta http-equiv="Content-Type" content="text/html; charset=UTF-8"/>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 2em; }}
-        .activity-type {{ color: #666; margin-bottom: 1em; }}
-        .activity-description {{ margin: 1em 0; }}
-        .activity-details {{ margin: 1em 0; padding: 1em; background: #f5f5f5; }}
-        h1 {{ color: #333; }}
-        h2 {{ color: #666; }}
-    </style>
-</head>
-<body>
-    <h1>{activity['title']}</h1>
-    <div class="activity-type">Type: {activity['type']} - {activity['specificActivity']}</div>
-    <div class="activity-description">
-        {activity['description']}
-    </div>
-    <div class="activity-details">
-        <p><strong>Study Hours:</strong> {activity['studyHours']}</p>
-        {f"<div class='dev-notes'><strong>Development Notes:</strong> {activity['devNotes']}</div>" if 'devNotes' in activity and activity['devNotes'] else ""}
-        {"".join(f"<p><strong>Learning Outcome {i+1}:</strong> {lo}</p>" for i, lo in enumerate(self.course_data['course']['learningOutcomes']) if i in activity.get('learningOutcomes', []))}
-    </div>
-    {self.create_assessment_details_html(activity) if activity['isAssessed'] else ''}
-</body>
-</html>"""
-        return html_content
+        return cc_templates.ACTIVITY_PAGE.render(
+            stylesheet=self.stylesheet_href(f"activities/{activity.id}.html"),
+            title=activity.title,
+            type=activity.type,
+            specific_activity=activity.specific_activity,
+            description=self.authored(activity.description),
+            study_hours=activity.study_hours,
+            dev_notes=cc_templates.DEV_NOTES.render(dev_notes=self.authored(activity.dev_notes))
+            if activity.dev_notes else "",
+            outcomes=self.activity_outcomes_html(activity),
+            assessment_details=self.create_assessment_details_html(activity) if activity.is_assessed else ''
+        )
 
     def create_assessment_details_html(self, activity):
         """Create assessment-specific HTML content"""
-        if not activity['isAssessed']:
+        if not activity.is_assessed:
             return ""
             
-        return f"""
-    <div class="assessment-details">
-        <h2>Assessment Information</h2>
-        <p>Pass Mark: {activity.get('passMark', '0')}%</p>
-        <p>Weight: {activity.get('weighting', '0')}%</p>
-        <p>Required: {'Yes' if activity.get('isRequired') else 'No'}</p>
-        <p>Marking Hours: {activity.get('markingHours', 'Not specified')}</p>
-    </div>"""
+        return cc_templates.ASSESSMENT_DETAILS.render(
+            pass_mark=_or(activity.pass_mark, '0'),
+            weighting=_or(activity.weighting, '0'),
+            required='Yes' if activity.is_required else 'No',
+            marking_hours=_or(activity.marking_hours, 'Not specified')
+        )
 
     def create_unit_html(self, unit, unit_activities):
         """Create HTML content for a unit"""
         activities_html = "\n".join([
-            f"""<div class="activity">
-                <h2>{activity['title']}</h2>
-                <div class="activity-type">Type: {activity['type']} - {activity['specificActivity']}</div>
-                <div class="activity-description">{activity['description']}</div>
-                {"".join(f"<p><strong>Learning Outcome {i+1}:</strong> {lo}</p>" for i, lo in enumerate(self.course_data['course']['learningOutcomes']) if i in activity.get('learningOutcomes', []))}
-            </div>"""
+            cc_templates.UNIT_ACTIVITY.render(
+                title=activity.title,
+                type=activity.type,
+                specific_activity=activity.specific_activity,
+                description=self.authored(activity.description),
+                outcomes=self.activity_outcomes_html(activity)
+            )
             for activity in unit_activities
         ])
         
-        html = f"""<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
-<html xmlns="http://www.w3.org/1999/xhtml">
-<head>
-    <title>{unit['title']}</title>
-    <meta http-equiv="Content-Type" content="text/html; charset=UTF-8"/>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 2em; }}
-        .unit-description {{ margin: 1em 0; padding: 1em; background: #f8f8f8; }}
-        .activity {{ margin: 2em 0; padding: 1em; border: 1px solid #ddd; }}
-        .activity-type {{ color: #666; margin: 0.5em 0; }}
-        .activity-description {{ margin: 1em 0; }}
-        h1 {{ color: #333; }}
-        h2 {{ color: #666; margin-bottom: 0.5em; }}
-    </style>
-</head>
-<body>
-    <h1>{unit['title']}</h1>
-    <div class="unit-description">
-        {unit['description']}
-    </div>
-    <div class="unit-activities">
-        {activities_html}
-    </div>
-</body>
-</html>"""
-        return html
+        return cc_templates.UNIT_PAGE.render(
+            stylesheet=self.stylesheet_href(f"units/{unit.id}.html"),
+            title=unit.title,
+            description=self.authored(unit.description),
+            activities=activities_html
+        )
 
     def create_course_info_html(self):
         """Create the course information HTML file"""
-        course = self.course_data['course']
-        html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>{course['name']}</title>
-    <meta charset="UTF-8">
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 2em; }}
-        .section {{ margin: 2em 0; }}
-    </style>
-</head>
-<body>
-    <h1>{course['name']} ({course['code']})</h1>
-    
-    <div class="section">
-        <h2>Course Goal</h2>
-        {course['goal']}
-    </div>
-    
-    <div class="section">
-        <h2>Description</h2>
-        {course['description']}
-    </div>
-    
-    <div class="section">
-        <h2>Course Notes</h2>
-        {course.get('courseNotes', '')}
-    </div>
-    
-    <div class="section">
-        <h2>Prerequisites</h2>
-        <p>{course.get('prerequisites', 'None')}</p>
-    </div>
-    
-    <div class="section">
-        <h2>Learning Outcomes</h2>
-        <ul>
-            {"".join(f"<li>{outcome}</li>" for outcome in course['learningOutcomes'])}
-        </ul>
-    </div>
-    
-    <div class="section">
-        <h2>Course Resources</h2>
-        {course.get('courseResources', '')}
-    </div>
-</body>
-</html>"""
-        return html
+        course = self.model.course
+        return cc_templates.COURSE_INFO_PAGE.render(
+            stylesheet=self.stylesheet_href("course_info.html"),
+            name=course.name,
+            code=course.code,
+            goal=self.authored(course.goal),
+            description=self.authored(course.description),
+            course_notes=self.authored(course.course_notes),
+            prerequisites=course.prerequisites,
+            outcomes="".join(cc_templates.OUTCOME_ITEM.render(text=outcome)
+                             for outcome in course.learning_outcomes),
+            course_resources=self.authored(course.course_resources)
+        )
 
     def add_resources(self, resources_elem):
         """Add resource entries to the manifest"""
+        # Add the stylesheet shared by every page
+        stylesheet_resource = ET.SubElement(resources_elem, 'resource',
+                                            identifier=STYLESHEET_IDENTIFIER,
+                                            type="webcontent",
+                                            href=STYLESHEET_PATH)
+        file_elem = ET.SubElement(stylesheet_resource, 'file')
+        file_elem.set('href', STYLESHEET_PATH)
+
         # Add course info resource
         course_resource = ET.SubElement(resources_elem, 'resource',
                                     identifier="course_info",
                                     type="webcontent",
                                     href="course_info.html")
+        self.add_stylesheet_dependency(course_resource)
 
         # Add resources for units
-        for unit in self.course_data['units']:
+        for unit in self.model.units:
+            unit_href = self.resource_href(f"units/{unit.id}.html")
             unit_resource = ET.SubElement(resources_elem, 'resource',
-                                        identifier=f"UNIT_{unit['id']}_resource",
+                                        identifier=f"UNIT_{unit.id}_resource",
                                         type="webcontent",
-                                        href=f"units/{unit['id']}.html")
+                                        href=unit_href)
             
             # Add file element for the unit
             file_elem = ET.SubElement(unit_resource, 'file')
-            file_elem.set('href', f"units/{unit['id']}.html")
+            file_elem.set('href', unit_href)
+            self.add_stylesheet_dependency(unit_resource)
 
         # Add resources for activities
-        for activity in self.course_data['activities']:
-            if activity['isAssessed']:
+        for activity in self.model.activities:
+            if activity.is_assessed:
                 # Create assessment resource
                 activity_resource = ET.SubElement(resources_elem, 'resource',
-                                                identifier=f"ACTIVITY_{activity['id']}_resource",
+                                                identifier=f"ACTIVITY_{activity.id}_resource",
                                                 type="imsqti_xmlv1p2/imscc_xmlv1p1/assessment",
-                                                href=f"assessments/{activity['id']}/assessment.xml")
+                                                href=f"assessments/{activity.id}/assessment.xml")
                 
                 # Add assessment file
                 file_elem = ET.SubElement(activity_resource, 'file')
-                file_elem.set('href', f"assessments/{activity['id']}/assessment.xml")
+                file_elem.set('href', f"assessments/{activity.id}/assessment.xml")
                 
                 # Add metadata file
                 metadata_elem = ET.SubElement(activity_resource, 'file')
-                metadata_elem.set('href', f"assessments/{activity['id']}/assessment_meta.xml")
+                metadata_elem.set('href', f"assessments/{activity.id}/assessment_meta.xml")
             else:
                 # Create content resource
+                activity_href = self.resource_href(f"activities/{activity.id}.html")
                 activity_resource = ET.SubElement(resources_elem, 'resource',
-                                                identifier=f"ACTIVITY_{activity['id']}_resource",
+                                                identifier=f"ACTIVITY_{activity.id}_resource",
                                                 type="webcontent",
-                                                href=f"activities/{activity['id']}.html")
+                                                href=activity_href)
                 
                 # Add file element
                 file_elem = ET.SubElement(activity_resource, 'file')
-                file_elem.set('href', f"activities/{activity['id']}.html")
+                file_elem.set('href', activity_href)
+                self.add_stylesheet_dependency(activity_resource)
+
+        # Add resources for attached files
+        for identifier, href in self.web_resources:
+            href = self.resource_href(href)
+            web_resource = ET.SubElement(resources_elem, 'resource',
+                                         identifier=identifier,
+                                         type="webcontent",
+                                         href=href)
+            file_elem = ET.SubElement(web_resource, 'file')
+            file_elem.set('href', href)
+
+    def resource_href(self, member_name):
+        """Where a member the manifest references is stored (its own path unless deduplicated)"""
+        href = self.member_hrefs.get(member_name, member_name)
+        if self.dedupe:
+            self.referenced_members.add(href)
+        return href
+
+    def store_digest(self, member_name, key, stored):
+        """Where a deduplicated member is stored, and whether it still has to be written.
+
+        key identifies the content; the first member with a key is written
+        to `stored`, and later ones share it.
+        """
+        self.dedupe_stats['members'] += 1
+        existing = self.stored_digests.get(key)
+        if existing is not None:
+            self.dedupe_stats['duplicates'] += 1
+            self.dedupe_stats['bytes_saved'] += self.stored_members[existing]
+            self.member_hrefs[member_name] = existing
+            return existing, False
+        self.stored_digests[key] = stored
+        self.member_hrefs[member_name] = stored
+        return stored, True
+
+    def check_references(self):
+        """Fail if the manifest references a member that was never written"""
+        missing = self.referenced_members.difference(self.stored_members)
+        if missing:
+            raise ValueError(f"Manifest references missing members: {', '.join(sorted(missing))}")
+
+    def add_stylesheet_dependency(self, resource_elem):
+        """Declare that a page resource uses the shared stylesheet"""
+        dependency = ET.SubElement(resource_elem, 'dependency')
+        dependency.set('identifierref', STYLESHEET_IDENTIFIER)
+
+    @staticmethod
+    def web_resource_base(name):
+        """Safe file name for an attached file"""
+        return re.sub(r'[^A-Za-z0-9._-]+', '_', os.path.basename(name or '')).strip('._') or 'file'
+
+    def web_resource_name(self, name):
+        """Return a safe, unique web_resources/ path for an attached file name"""
+        base = self.web_resource_base(name)
+        stem, ext = os.path.splitext(base)
+        href = f"web_resources/{base}"
+        counter = 1
+        while href in self.web_resource_hrefs:
+            counter += 1
+            href = f"web_resources/{stem}_{counter}{ext}"
+        return href
+
+    def write_web_resource(self, cc_zip, entry):
+        """Decode one repository entry straight into a zip member"""
+        href = self.web_resource_name(entry.get('name'))
+        mime_type = entry.get('mimeType') or mimetypes.guess_type(href)[0]
+        info = self.zip_info(href, zipfile.ZIP_STORED if is_precompressed(mime_type) else None)
+        data = entry.get('data') or ''
+        self.web_resources.append((f"WEB_RESOURCE_{len(self.web_resources) + 1}", href))
+        self.web_resource_hrefs.add(href)
+        if self.dedupe:
+            # Identical encoded data means identical files, so hash it before decoding anything
+            hasher = hashlib.sha256()
+            for chunk in text_chunks(data):
+                hasher.update(chunk.encode('utf-8'))
+            digest = hasher.hexdigest()
+            # Only copies with the same name are shared, so links and downloads keep their file name
+            base = self.web_resource_base(entry.get('name'))
+            stored, new = self.store_digest(href, (digest, base), f"web_resources/{digest[:16]}/{base}")
+            if not new:
+                return
+            info = self.zip_info(stored, info.compress_type)
+        with self.profiler.span('web_resource', 'member', member=info.filename) as span:
+            # Large base64 payloads may decode to more than the zip32 limit
+            with cc_zip.open(info, 'w', force_zip64=len(data) > (1 << 30)) as member:
+                for chunk in iter_decoded_file(data):
+                    member.write(chunk)
+            span['bytes'] = info.file_size
+            span['compressed_bytes'] = info.compress_size
+        if self.dedupe:
+            self.stored_members[info.filename] = info.file_size
+
+    def add_file_repository(self, cc_zip):
+        """Write every file in the attached file repository under web_resources/"""
+        self.web_resources = []
+        self.web_resource_hrefs = set()
+        if not self.file_repository:
+            return
+        entries = self.file_repository
+        if isinstance(entries, str):
+            entries = iter_repository_files(entries)
+        for entry in entries:
+            self.write_web_resource(cc_zip, entry)
                 
-    def export_to_cc(self, output_file):
-        """Create the Common Cartridge package"""
-        with zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as cc_zip:
-            # Add manifest
-            manifest_content = self.create_manifest()
-            cc_zip.writestr('imsmanifest.xml', manifest_content)
+    def write_member(self, cc_zip, member_name, render, kind=None, parts=()):
+        """Write one rendered member, going through the render cache when there is one.
+
+        render() returns the member as a string or as an Element; `parts` is
+        everything the rendering depends on and keys the cache entry.
+        """
+        profiler = self.profiler
+        with profiler.span(kind or member_name, 'member', member=member_name) as span:
+            def render_bytes():
+                with profiler.span('render', 'render', member=member_name):
+                    content = render()
+                    if isinstance(content, ET.Element):
+                        content = self.prettify(content)
+                    return content.encode('utf-8')
+
+            dedupe = self.dedupe and kind in DEDUPED_KINDS
+            if self.cache is not None:
+                misses = self.cache.misses
+                content = self.cache.fetch(kind, parts, render_bytes)
+                span['cache'] = 'miss' if self.cache.misses > misses else 'hit'
+            elif cc_zip.parallel or dedupe:
+                content = render_bytes()
+            else:
+                with profiler.span('render', 'render', member=member_name):
+                    content = render()
+
+            # Identical pages are written once, under a name taken from their hash
+            if dedupe:
+                # Pages keep their directory, so their relative links still resolve
+                digest = hashlib.sha256(content).hexdigest()
+                member_name, new = self.store_digest(member_name, digest,
+                                                     f"{posixpath.dirname(member_name)}/{digest[:16]}.html")
+                if not new:
+                    span['duplicate'] = True
+                    return
+                self.stored_members[member_name] = len(content)
+
+            # Compressed on a worker thread when the writer has them; large
+            # XML is otherwise serialized straight into the archive
+            with profiler.span('write', 'write', member=member_name):
+                if isinstance(content, ET.Element):
+                    self.write_xml(cc_zip, member_name, content)
+                else:
+                    cc_zip.writestr(self.zip_info(member_name), content)
+
+    def activity_parts(self, activity):
+        """Everything an activity's rendered members depend on"""
+        return (activity.to_dict(), self.model.activity_outcomes(activity))
+
+    def unit_parts(self, unit):
+        """Everything a unit page depends on"""
+        return (unit.to_dict(), [self.activity_parts(a) for a in self.model.unit_activities(unit.id)])
+
+    def manifest_parts(self):
+        """Everything the manifest depends on"""
+        course = self.model.course
+        return (course.name, course.code,
+                [(unit.id, unit.title) for unit in self.model.units],
+                [(a.id, a.title, a.unit_id, bool(a.is_assessed)) for a in self.model.activities],
+                self.web_resources) + ((sorted(self.member_hrefs.items()),) if self.dedupe else ())
+
+    def export_to_cc(self, output_file, buffer_size=STREAM_BUFFER_SIZE):
+        """Create the Common Cartridge package.
+
+        output_file is a path or a writable binary file object. Non-seekable
+        outputs (stdout, pipes, sockets) are streamed: members are rendered
+        one at a time as the archive is written, and at most buffer_size
+        bytes are held back before being passed on.
+        """
+        profiler = self.profiler
+        sink = output_file
+        if not isinstance(output_file, (str, os.PathLike)) and not is_seekable(output_file):
+            sink = StreamSink(output_file, buffer_size)
+        with zipfile.ZipFile(sink, 'w', self.compress_type, compresslevel=self.compress_level) as archive, \
+                MemberWriter(archive, self.compress_jobs, self.compress_level, profiler) as cc_zip:
+            self.member_hrefs = {}
+            self.stored_digests = {}
+            self.stored_members = {}
+            self.referenced_members = set()
+            self.dedupe_stats = {'members': 0, 'duplicates': 0, 'bytes_saved': 0}
+
+            # Add attached files first so the manifest can reference them
+            with profiler.span('file_repository'):
+                self.add_file_repository(cc_zip)
+
+            course = self.model.course
+
+            # Add manifest; when deduplicating it is written last, once every
+            # page's stored path is known
+            def write_manifest():
+                with profiler.span('manifest'):
+                    self.write_member(cc_zip, 'imsmanifest.xml', self.build_manifest,
+                                      'manifest', self.manifest_parts())
+            if not self.dedupe:
+                write_manifest()
 
             # Add module metadata
-            module_meta = self.create_module_meta()
-            cc_zip.writestr('course_settings/module_meta.xml', module_meta)
+            with profiler.span('module_meta'):
+                self.write_member(cc_zip, 'course_settings/module_meta.xml', self.build_module_meta,
+                                  'module_meta', (course.name, course.description, course.faculty))
 
            #    Create necessary directories
             directories = ['course_settings', 'assessments', 'activities', 'units']
             for directory in directories:
                 # Add an empty .gitkeep file to ensure the directory is created
-                cc_zip.writestr(f"{directory}/.gitkeep", "")
+                cc_zip.writestr(self.zip_info(f"{directory}/.gitkeep"), "")
 
    
-            # Add course info
-            course_info = self.create_course_info_html()
-            cc_zip.writestr('course_info.html', course_info)
+            # Add the shared stylesheet, then course info
+            cc_zip.writestr(self.zip_info(STYLESHEET_PATH),
+                            STYLESHEET if self.html_normalizer is None else MINIFIED_STYLESHEET)
+            with profiler.span('course_info'):
+                self.write_member(cc_zip, 'course_info.html', self.create_course_info_html,
+                                  'course_info', (course.to_dict(),))
 
             # Create units
-            for unit in self.course_data['units']:
-                unit_activities = [a for a in self.course_data['activities'] 
-                                if a['unitId'] == unit['id']]
-                unit_content = self.create_unit_html(unit, unit_activities)
-                cc_zip.writestr(f"units/{unit['id']}.html", unit_content)
+            with profiler.span('units'):
+                for unit in self.model.units:
+                    unit_activities = self.model.unit_activities(unit.id)
+                    self.write_member(cc_zip, f"units/{unit.id}.html",
+                                      lambda: self.create_unit_html(unit, unit_activities),
+                                      'unit', self.unit_parts(unit))
 
             # Create activities
-            for activity in self.course_data['activities']:
-                if activity['isAssessed']:
-                    # Create QTI assessment file
-                    assessment_content = self.create_qti_assessment(activity)
-                    meta_content = self.create_assessment_meta(activity)
-                    
-                    cc_zip.writestr(f"assessments/{activity['id']}/assessment.xml", assessment_content)
-                    cc_zip.writestr(f"assessments/{activity['id']}/assessment_meta.xml", meta_content)
-                    
-                    # Also create HTML version
-                    activity_content = self.create_activity_html(activity)
-                    cc_zip.writestr(f"activities/{activity['id']}.html", activity_content)
-                else:
-                    # Create regular content file
-                    activity_content = self.create_activity_html(activity)
-                    cc_zip.writestr(f"activities/{activity['id']}.html", activity_content)
+            with profiler.span('activities'):
+                for activity in self.model.activities:
+                    parts = self.activity_parts(activity)
+                    if activity.is_assessed:
+                        # Create QTI assessment file
+                        self.write_member(cc_zip, f"assessments/{activity.id}/assessment.xml",
+                                          lambda: self.build_qti_assessment(activity), 'qti', parts)
+                        self.write_member(cc_zip, f"assessments/{activity.id}/assessment_meta.xml",
+                                          lambda: self.build_assessment_meta(activity), 'assessment_meta', parts)
+                        
+                    # Create the HTML version (regular content, or alongside the QTI files)
+                    self.write_member(cc_zip, f"activities/{activity.id}.html",
+                                      lambda: self.create_activity_html(activity), 'activity', parts)
+
+            if self.dedupe:
+                write_manifest()
+                self.check_references()
+        if sink is not output_file:
+            sink.flush()
+
+
+def export_course(input_file, output_file, pretty=True, cache_dir=None, compress_level=None, store_only=False,
+                  normalize_html=False, dedupe=False, file_repository=None):
+    """Export a single course file and return a summary record for it"""
+    record = {
+        'input_file': input_file,
+        'output_file': output_file,
+        'course_code': None,
+        'seconds': 0.0,
+        'bytes_written': 0,
+        'cache': None,
+        'dedupe': None,
+        'error': None
+    }
+    start = time.perf_counter()
+    try:
+        # Batch workers are already one per CPU, so each compresses on its own thread
+        exporter = CourseomaticExporter(input_file, pretty=pretty, file_repository=file_repository,
+                                        cache_dir=cache_dir, compress_level=compress_level,
+                                        compress_jobs=1, store_only=store_only, normalize_html=normalize_html,
+                                        dedupe=dedupe)
+        record['course_code'] = exporter.model.course.code.strip()
+        exporter.export_to_cc(output_file)
+        record['bytes_written'] = os.path.getsize(output_file)
+        if exporter.cache is not None:
+            record['cache'] = exporter.cache.stats()
+        if dedupe:
+            record['dedupe'] = exporter.dedupe_stats
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+        # Don't leave a truncated cartridge behind
+        if os.path.exists(output_file):
+            os.remove(output_file)
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    return record
+
+def batch_export(input_files, output_dir, jobs=None, pretty=True, cache_dir=None, compress_level=None,
+                 store_only=False, normalize_html=False, dedupe=False, files_name=None):
+    """Export many course files across a process pool, isolating failures per course.
+
+    With files_name, each course's attachments are taken from the file of
+    that name in its own directory, when there is one.
+    """
+    # Only batch mode needs multiprocessing; importing it lazily keeps single exports quick to start
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    os.makedirs(output_dir, exist_ok=True)
+    output_files = plan_output_files(input_files, output_dir, '.imscc')
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(export_course, input_file, output_file, pretty, cache_dir,
+                        compress_level, store_only, normalize_html, dedupe,
+                        files_for(input_file, files_name)): (input_file, output_file)
+            for input_file, output_file in zip(input_files, output_files)
+        }
+        for future in as_completed(futures):
+            input_file, output_file = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed or out of memory)
+                record = {
+                    'input_file': input_file,
+                    'output_file': output_file,
+                    'course_code': None,
+                    'seconds': 0.0,
+                    'bytes_written': 0,
+                    'cache': None,
+                    'dedupe': None,
+                    'error': f"{type(e).__name__}: {e}"
+                }
+            results[input_file] = record
+            status = 'FAILED' if record['error'] else 'ok'
+            print(f"[{status}] {input_file} -> {output_file} ({record['seconds']}s)")
+
+    # Keep the summary in input order regardless of completion order
+    return [results[input_file] for input_file in input_files]
+
+def write_batch_summary(records, summary_file, wall_seconds):
+    """Write a machine-readable JSON summary of a batch export"""
+    summary = {
+        'total': len(records),
+        'succeeded': sum(1 for r in records if not r['error']),
+        'failed': sum(1 for r in records if r['error']),
+        'bytes_written': sum(r['bytes_written'] for r in records),
+        'wall_seconds': round(wall_seconds, 4),
+        'courses': records
+    }
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
 
 def main():
     import argparse
     parser = argparse.ArgumentParser(description='Convert Courseomatic JSON to Common Cartridge')
-    parser.add_argument('input_file', help='Input JSON file from Courseomatic')
-    parser.add_argument('output_file', help='Output .imscc file')
+    parser.add_argument('input_file', nargs='?', help='Input JSON file from Courseomatic')
+    parser.add_argument('output_file', nargs='?', help="Output .imscc file, or '-' to stream it to stdout")
+    parser.add_argument('--batch', nargs='+', metavar='PATTERN',
+                        help='Batch mode: glob patterns of Courseomatic JSON files to export')
+    parser.add_argument('--manifest', help='Batch mode: file listing Courseomatic JSON files, one per line')
+    parser.add_argument('--output-dir', help='Batch mode: directory for the generated .imscc files')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Batch mode: number of worker processes (default: number of CPUs)')
+    parser.add_argument('--summary', help='Batch mode: JSON summary file (default: OUTPUT_DIR/export_summary.json)')
+    parser.add_argument('--files', metavar='FILEDATA_JSON',
+                        help='fileData.json repository of attached files to include under web_resources/')
+    parser.add_argument('--files-name', metavar='NAME',
+                        help='Batch mode: include the attached files in the file of this name (e.g. fileData.json) '
+                             'next to each course file')
+    parser.add_argument('--cache-dir',
+                        help='Cache rendered members here and only re-render what changed on later exports')
+    parser.add_argument('--compact', action='store_true',
+                        help='Write compact (non-indented) XML for smaller production cartridges')
+    parser.add_argument('--minify-html', action='store_true',
+                        help='Strip empty paragraphs, dir="auto", toggle-icon spans and extra whitespace '
+                             'from authored HTML, and minify the stylesheet')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='Store identical unit/activity pages, and identical attached files with the same '
+                             'name, once, under content-addressed paths shared by their manifest resources')
+    parser.add_argument('--compress-level', type=int, choices=range(0, 10), metavar='0-9',
+                        help='Deflate level for cartridge members (default: zlib default, 6)')
+    parser.add_argument('--compress-jobs', type=int, default=None,
+                        help='Threads used to compress members (default: number of CPUs; 1 compresses inline)')
+    parser.add_argument('--store', action='store_true',
+                        help='Store members without compression (for content that is already compressed)')
+    parser.add_argument('--profile', metavar='TRACE_JSON',
+                        help='Record stage and per-member timings and write them as a Chrome trace-event file')
     args = parser.parse_args()
 
-    exporter = CourseomaticExporter(args.input_file)
-    exporter.export_to_cc(args.output_file)
-    print(f"Successfully created Common Cartridge file: {args.output_file}")
+    if args.batch or args.manifest:
+        if not args.output_dir:
+            parser.error('--output-dir is required in batch mode')
+        if args.profile:
+            parser.error('--profile profiles a single export; it is not available in batch mode')
+        if args.files:
+            parser.error('--files is for a single export; in batch mode use --files-name to pick up '
+                         'each course\'s own attachments file')
+        input_files = [input_file for input_file in collect_input_files(args.batch, args.manifest)
+                       if not args.files_name or os.path.basename(input_file) != args.files_name]
+        if not input_files:
+            parser.error('no input files matched')
+
+        start = time.perf_counter()
+        records = batch_export(input_files, args.output_dir, args.jobs,
+                               pretty=not args.compact, cache_dir=args.cache_dir,
+                               compress_level=args.compress_level, store_only=args.store,
+                               normalize_html=args.minify_html, dedupe=args.dedupe, files_name=args.files_name)
+        summary_file = args.summary or os.path.join(args.output_dir, 'export_summary.json')
+        summary = write_batch_summary(records, summary_file, time.perf_counter() - start)
+        print(f"Exported {summary['succeeded']}/{summary['total']} courses "
+              f"in {summary['wall_seconds']}s; summary written to {summary_file}")
+        return 1 if summary['failed'] else 0
+
+    if not args.input_file or not args.output_file:
+        parser.error('input_file and output_file are required unless --batch or --manifest is given')
+    if args.files_name:
+        parser.error('--files-name is for batch mode; give a single export its attachments with --files')
+
+    # When the cartridge goes to stdout, messages go to stderr
+    streaming = args.output_file == '-'
+    log = sys.stderr if streaming else sys.stdout
+    if streaming and sys.stdout.isatty():
+        parser.error('refusing to write a cartridge to a terminal; redirect stdout or give an output file')
+
+    profiler = Profiler() if args.profile else None
+    exporter = CourseomaticExporter(args.input_file, pretty=not args.compact, file_repository=args.files,
+                                    cache_dir=args.cache_dir, profiler=profiler,
+                                    compress_level=args.compress_level, compress_jobs=args.compress_jobs,
+                                    store_only=args.store, normalize_html=args.minify_html, dedupe=args.dedupe)
+    exporter.export_to_cc(sys.stdout.buffer if streaming else args.output_file)
+    if exporter.cache is not None:
+        stats = exporter.cache.stats()
+        print(f"Render cache: {stats['hits']} hits, {stats['misses']} misses", file=log)
+    if exporter.html_normalizer is not None:
+        normalizer = exporter.html_normalizer
+        print(f"HTML normalization: {normalizer.bytes_in} -> {normalizer.bytes_out} characters, "
+              f"{normalizer.hits} repeated inputs reused", file=log)
+    if args.dedupe:
+        stats = exporter.dedupe_stats
+        print(f"Deduplication: {stats['duplicates']} of {stats['members']} pages and files were duplicates, "
+              f"{stats['bytes_saved']} bytes saved", file=log)
+    if profiler is not None:
+        profiler.print_summary(file=log)
+        profiler.write_trace(args.profile)
+        print(f"Profile trace written to {args.profile}", file=log)
+    print(f"Successfully created Common Cartridge file: {'<stdout>' if streaming else args.output_file}", file=log)
+    return 0
 
 if __name__ == "__main__":
-    main()
-
+    raise SystemExit(main())
\ No newline at end of file
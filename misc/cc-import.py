@@ -1,93 +1,142 @@
 import json
+import os
+import signal
+import time
 import zipfile
 import xml.etree.ElementTree as ET
-import tempfile
-import os
+import posixpath
 import re
-from bs4 import BeautifulSoup
-import html2text
+from urllib.parse import unquote
 import uuid
-import shutil
+from cc_model import CourseModel, Unit, Activity, LazyActivity, LazyActivityBody, LazyUnit
+from cc_cli import collect_input_files, plan_output_files
+from cc_html import HTMLExtractor
+from cc_profile import NULL_PROFILER, Profiler
 
 class CommonCartridgeImporter:
-    def __init__(self):
-        self.temp_dir = None
-        self.h2t = html2text.HTML2Text()
-        self.h2t.ignore_links = False
+    def __init__(self, html_backend='auto', profiler=None):
+        self.zip = None
+        self.members = {}
+
+        # Stage/per-file timings; NULL_PROFILER records nothing
+        self.profiler = profiler or NULL_PROFILER
+
+        # Title/body extraction for HTML pages (its backends are kept between cartridges)
+        self.html_extractor = HTMLExtractor(html_backend)
+        self.reset()
+
+    def reset(self):
+        """Clear everything learned from the previous cartridge"""
+        # A cartridge left open by peek_cartridge() is finished with
+        self.close()
+
+        # Which HTML extraction backend handled each page
+        self.extraction_paths = {}
+
+        # Manifest item hierarchy: item -> parent item, item -> enclosing
+        # unit, and resource -> referencing item
+        self.item_parent = {}
+        self.item_unit = {}
+        self.resource_items = {}
+        self.item_titles = {}
         
         # Initialize empty Courseomatic structure
-        self.course_data = {
-            "program": {
-                "name": "",
-                "level": "",
-                "description": "",
-                "learningOutcomes": []
-            },
-            "course": {
-                "name": "",
-                "code": "",
-                "creditHours": "",
-                "prerequisites": "",
-                "revision": "",
-                "deliveryMode": "",
-                "goal": "",
-                "description": "",
-                "courseNotes": "",
-                "courseDevelopmentNotes": "",
-                "learningOutcomes": [],
-                "courseResources": "",
-                "changeSummary": "",
-                "challengeableComments": "",
-                "evaluationCriteria": "",
-                "rationale": "",
-                "consulted": "",
-                "faculty": "",
-                "studyArea": "",
-                "effectiveDate": "",
-                "author": "",
-                "earlyStartFlag": False,
-                "stipend": False,
-                "revisionLevel": "",
-                "deliveryModel": "",
-                "teamMembers": []
-            },
-            "units": [],
-            "activities": [],
-            "mappedPLOs": []
-        }
+        self.model = CourseModel()
 
     def import_cartridge(self, cartridge_file):
         """Import a Common Cartridge file and convert to Courseomatic format"""
-        # Create temporary directory
-        self.temp_dir = tempfile.mkdtemp()
-        
+        # Each cartridge starts from a clean slate, so one importer can be reused
+        self.reset()
+        # Members are read straight from the archive; nothing is extracted to disk
+        with zipfile.ZipFile(cartridge_file, 'r') as zip_ref:
+            self.zip = zip_ref
+            self.members = self.index_members(zip_ref)
+            try:
+                # Parse the manifest
+                manifest_name = self.resolve_href('imsmanifest.xml')
+                if manifest_name is None:
+                    raise Exception("Manifest file not found in cartridge")
+
+                self.parse_manifest(manifest_name)
+
+                # Parse additional metadata if available
+                module_meta_name = self.resolve_href('course_settings/module_meta.xml')
+                if module_meta_name is not None:
+                    with self.profiler.span('module_meta'):
+                        self.parse_module_meta(module_meta_name)
+
+                with self.profiler.span('to_dict'):
+                    return self.model.to_dict()
+
+            finally:
+                self.zip = None
+                self.members = {}
+
+    def peek_cartridge(self, cartridge_file):
+        """Read a cartridge's structure from imsmanifest.xml and module_meta.xml alone.
+
+        Returns the CourseModel with every unit and activity in place, titled
+        from the manifest. Unit and activity descriptions, and assessment
+        weights, are read from the archive the first time they are used, so
+        the cartridge stays open until close() (or the next import).
+        """
+        self.reset()
+        self.zip = zipfile.ZipFile(cartridge_file, 'r')
         try:
-            # Extract the cartridge
-            with zipfile.ZipFile(cartridge_file, 'r') as zip_ref:
-                zip_ref.extractall(self.temp_dir)
-            
-            # Parse the manifest
-            manifest_path = os.path.join(self.temp_dir, 'imsmanifest.xml')
-            if not os.path.exists(manifest_path):
+            self.members = self.index_members(self.zip)
+            manifest_name = self.resolve_href('imsmanifest.xml')
+            if manifest_name is None:
                 raise Exception("Manifest file not found in cartridge")
-            
-            self.parse_manifest(manifest_path)
-            
-            # Parse additional metadata if available
-            module_meta_path = os.path.join(self.temp_dir, 'course_settings/module_meta.xml')
-            if os.path.exists(module_meta_path):
-                self.parse_module_meta(module_meta_path)
+            self.parse_manifest(manifest_name, lazy=True)
+            module_meta_name = self.resolve_href('course_settings/module_meta.xml')
+            if module_meta_name is not None:
+                with self.profiler.span('module_meta'):
+                    self.parse_module_meta(module_meta_name)
+        except Exception:
+            self.close()
+            raise
+        return self.model
 
-            return self.course_data
-            
-        finally:
-            # Clean up temporary directory
-            if self.temp_dir:
-                shutil.rmtree(self.temp_dir)
+    def close(self):
+        """Close a cartridge opened by peek_cartridge()"""
+        if self.zip is not None:
+            self.zip.close()
+        self.zip = None
+        self.members = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
 
-    def parse_manifest(self, manifest_path):
+    @staticmethod
+    def normalize_href(href):
+        """Normalize a manifest href or zip member name for lookup"""
+        path = posixpath.normpath(unquote(href).replace('\\', '/'))
+        return path.lstrip('/') if path != '.' else ''
+
+    def index_members(self, zip_ref):
+        """Map normalized member paths to their names in the archive"""
+        return {self.normalize_href(info.filename): info.filename
+                for info in zip_ref.infolist() if not info.is_dir()}
+
+    def resolve_href(self, href):
+        """Return the archive member an href refers to, or None if it isn't there"""
+        return self.members.get(self.normalize_href(href))
+
+    def open_member(self, member_name):
+        """Open an archive member for streaming reads"""
+        if self.zip is None:
+            raise ValueError("The cartridge has been closed")
+        return self.zip.open(member_name)
+
+    def parse_manifest(self, manifest_name, lazy=False):
         """Parse the IMS manifest file"""
-        tree = ET.parse(manifest_path)
+        with self.profiler.span('manifest_parse'):
+            with self.open_member(manifest_name) as f:
+                tree = ET.parse(f)
         root = tree.getroot()
         
         # Handle namespace
@@ -111,10 +160,11 @@ class CommonCartridgeImporter:
             title_elem = org.find('.//title')
             
         if title_elem is not None:
-            self.course_data['course']['name'] = title_elem.text
+            self.model.course.name = title_elem.text
 
         # Process items (units and activities)
-        self.process_items(org, ns)
+        with self.profiler.span('items'):
+            self.process_items(org, ns)
         
         # Process resources
         if ns:
@@ -123,176 +173,543 @@ class CommonCartridgeImporter:
             resources = root.find('.//resources')
             
         if resources is not None:
-            self.process_resources(resources, ns)
+            with self.profiler.span('resources'):
+                self.process_resources(resources, ns, lazy)
 
     def process_items(self, org, ns):
-        """Process organization items to create units and activities"""
-        if ns:
-            items = org.findall('.//ns:item', ns)
-        else:
-            items = org.findall('.//item')
-        
-        for item in items:
+        """Process organization items to create units and activities.
+
+        Walks the item hierarchy once, recording each item's parent, the unit
+        it sits in and the resource it references, so resources can later be
+        placed in their units with dictionary lookups.
+        """
+        item_tag = 'ns:item' if ns else 'item'
+        title_tag = 'ns:title' if ns else 'title'
+
+        # Depth-first, in document order: (item, parent item id, enclosing unit id)
+        stack = [(item, None, None) for item in reversed(org.findall(item_tag, ns))]
+        while stack:
+            item, parent_id, unit_id = stack.pop()
             identifier = item.get('identifier', '')
-            if ns:
-                title_elem = item.find('.//ns:title', ns)
-            else:
-                title_elem = item.find('.//title')
+            title_elem = item.find(title_tag, ns)
+            if title_elem is None:
+                title_elem = item.find('.//' + title_tag, ns)
                 
             title = title_elem.text if title_elem is not None else ''
             
             if 'UNIT' in identifier.upper():
-                unit = {
-                    'id': identifier,
-                    'title': title,
-                    'description': '',
-                    'learningOutcomes': [],
-                    'order': len(self.course_data['units'])
-                }
-                self.course_data['units'].append(unit)
+                self.model.add_unit(Unit(
+                    id=identifier,
+                    title=title,
+                    description='',
+                    learning_outcomes=[],
+                    order=len(self.model.units)
+                ))
+                unit_id = identifier
+
+            self.item_parent[identifier] = parent_id
+            self.item_titles[identifier] = title
+            self.item_unit[identifier] = unit_id
+            identifierref = item.get('identifierref')
+            if identifierref:
+                self.resource_items[identifierref] = identifier
+
+            stack.extend((child, identifier, unit_id) for child in reversed(item.findall(item_tag, ns)))
                 
-    def process_resources(self, resources, ns):
-        """Process resource elements"""
+    def process_resources(self, resources, ns, lazy=False):
+        """Process resource elements; with lazy=True their files are left to be read on first use"""
         for resource in resources:
             identifier = resource.get('identifier', '')
             type = resource.get('type', '')
             href = resource.get('href', '')
             
             if href:
-                file_path = os.path.join(self.temp_dir, href)
-                if os.path.exists(file_path):
+                member_name = self.resolve_href(href)
+                if member_name is not None:
                     if type == 'webcontent':
-                        self.process_content_file(file_path, identifier)
+                        # Only pages the organization places are course content;
+                        # attachments (even HTML ones) and the course info page are not
+                        if self.resource_item_id(identifier) is None:
+                            continue
+                        if lazy:
+                            self.add_content(member_name, identifier, lazy=True)
+                            continue
+                        with self.profiler.span('content', 'member', member=member_name) as span:
+                            self.add_content(member_name, identifier)
+                            span['bytes'] = self.zip.getinfo(member_name).file_size
                     elif 'assessment' in type.lower():
-                        self.process_assessment_file(file_path, identifier)
+                        if lazy:
+                            self.add_assessment(member_name, identifier, lazy=True)
+                            continue
+                        with self.profiler.span('assessment', 'member', member=member_name) as span:
+                            self.add_assessment(member_name, identifier)
+                            span['bytes'] = self.zip.getinfo(member_name).file_size
 
-    def process_content_file(self, file_path, identifier):
-        """Process HTML content files"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                # Extract content
-                body = soup.find('body')
-                if body:
-                    description = str(body)
-                    
-                    # Update unit or create activity
-                    if 'UNIT' in identifier.upper():
-                        for unit in self.course_data['units']:
-                            if unit['id'] == identifier.replace('_resource', ''):
-                                unit['description'] = description
-                                break
-                    else:
-                        activity = {
-                            'id': identifier.replace('_resource', ''),
-                            'type': 'acquisition',  # Default type
-                            'specificActivity': 'reading',  # Default activity
-                            'title': soup.title.text if soup.title else '',
-                            'description': description,
-                            'studyHours': 60,  # Default value
-                            'unitId': self.find_parent_unit_id(identifier),
-                            'isAssessed': False,
-                            'learningOutcomes': []
-                        }
-                        self.course_data['activities'].append(activity)
-        except Exception as e:
-            print(f"Error processing content file {file_path}: {str(e)}")
+    def read_content(self, member_name):
+        """Title and body of an HTML content file"""
+        with self.open_member(member_name) as f:
+            content = f.read().decode('utf-8')
+        title, body, backend = self.html_extractor.extract(content)
+        self.extraction_paths[member_name] = backend
+        return title, body
 
-    def process_assessment_file(self, file_path, identifier):
-        """Process QTI assessment files"""
-        try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
-            
-            # Extract assessment details
-            title = root.get('title', '')
-            
-            activity = {
-                'id': identifier.replace('_resource', ''),
-                'type': 'reflection',  # Default type for assessments
-                'specificActivity': 'assignment',
-                'title': title,
-                'description': self.extract_assessment_description(root),
-                'studyHours': 120,  # Default value
-                'unitId': self.find_parent_unit_id(identifier),
-                'isAssessed': True,
-                'passMark': 50,  # Default value
-                'weighting': self.extract_assessment_weight(root),
-                'markingHours': 60,  # Default value
-                'learningOutcomes': []
-            }
-            
-            self.course_data['activities'].append(activity)
-            
-        except Exception as e:
-            print(f"Error processing assessment file {file_path}: {str(e)}")
+    def content_loader(self, member_name, item_title):
+        """A function reading an HTML content file into the values its unit or activity takes from it"""
+        def load():
+            try:
+                title, body = self.read_content(member_name)
+            except Exception as e:
+                print(f"Error processing content file {member_name}: {str(e)}")
+                return {}
+            values = {'description': body or ''}
+            if not item_title:
+                values['title'] = title
+            return values
+        return load
+
+    def assessment_loader(self, member_name, item_title):
+        """A function reading a QTI assessment into the values its activity takes from it"""
+        def load():
+            try:
+                with self.open_member(member_name) as f:
+                    assessment = self.extract_assessment(f)
+            except Exception as e:
+                print(f"Error processing assessment file {member_name}: {str(e)}")
+                return {}
+            values = {'description': assessment['description'],
+                      'weighting': self.assessment_weight(assessment['metadata'])}
+            if not item_title:
+                values['title'] = assessment['title']
+            return values
+        return load
+
+    def add_activity(self, load, item_title, lazy, **fields):
+        """Add an activity built from the manifest's fields and what load() reads from its file.
+
+        Lazy activities call load() on first use and eager ones straight away,
+        so a peek and a full import give the same records.
+        """
+        if lazy:
+            self.model.add_activity((LazyActivityBody if item_title else LazyActivity)(load, **fields))
+        else:
+            self.model.add_activity(Activity(**dict(fields, **load())))
+
+    def add_content(self, member_name, identifier, lazy=False):
+        """Place an HTML content file as its unit's description or as an activity"""
+        item_id = self.resource_item_id(identifier)
+        item_title = self.item_titles.get(item_id)
+        load = self.content_loader(member_name, item_title)
+        if 'UNIT' in identifier.upper():
+            unit = self.model.unit_index.get(item_id)
+            if unit is None:
+                return
+            if lazy:
+                # Swap the manifest's unit for one that loads its own description
+                lazy_unit = LazyUnit(load, extra=unit.extra,
+                                     **{attr: getattr(unit, attr) for attr, *_ in Unit.FIELDS})
+                self.model.units[self.model.units.index(unit)] = lazy_unit
+                self.model.unit_index[unit.id] = lazy_unit
+            else:
+                unit.description = load().get('description', '')
+            return
+        self.add_activity(
+            load, item_title, lazy,
+            id=identifier.replace('_resource', ''),
+            type='acquisition',  # Default type
+            specific_activity='reading',  # Default activity
+            title=item_title or '',
+            description='',
+            study_hours=60,  # Default value
+            unit_id=self.find_parent_unit_id(identifier),
+            is_assessed=False,
+            learning_outcomes=[]
+        )
+
+    def add_assessment(self, member_name, identifier, lazy=False):
+        """Place a QTI assessment as an assessed activity"""
+        item_title = self.item_titles.get(self.resource_item_id(identifier))
+        self.add_activity(
+            self.assessment_loader(member_name, item_title), item_title, lazy,
+            id=identifier.replace('_resource', ''),
+            type='reflection',  # Default type for assessments
+            specific_activity='assignment',
+            title=item_title or '',
+            description='',
+            study_hours=120,  # Default value
+            unit_id=self.find_parent_unit_id(identifier),
+            is_assessed=True,
+            pass_mark=50,  # Default value
+            weighting=100,  # Default weight when the file gives none
+            marking_hours=60,  # Default value
+            learning_outcomes=[]
+        )
+
+    def resource_item_id(self, identifier):
+        """Return the organization item that references a resource"""
+        item_id = self.resource_items.get(identifier)
+        if item_id is None and identifier.endswith('_resource'):
+            # Older Courseomatic cartridges name resources after their items
+            candidate = identifier[:-len('_resource')]
+            if candidate in self.item_parent:
+                item_id = candidate
+        return item_id
 
     def find_parent_unit_id(self, identifier):
         """Find the parent unit ID for an activity"""
-        # For now, assign to first unit if we can't determine parent
-        return self.course_data['units'][0]['id'] if self.course_data['units'] else None
-
-    def extract_assessment_description(self, root):
-        """Extract description from assessment XML"""
-        # Look for description in various possible locations
-        for elem in root.iter():
-            if 'mattext' in elem.tag.lower():
-                return elem.text or ''
-        return ''
-
-    def extract_assessment_weight(self, root):
-        """Extract assessment weight from XML"""
-        # Look for weight in metadata
-        for elem in root.iter():
-            if 'fieldlabel' in elem.tag.lower() and elem.text == 'qmd_weighting':
-                parent = elem.getparent()
-                if parent is not None:
-                    weight_elem = parent.find('.//fieldentry')
-                    if weight_elem is not None:
-                        try:
-                            return float(weight_elem.text)
-                        except (ValueError, TypeError):
-                            pass
-        return 100  # Default weight
-
-    def parse_module_meta(self, meta_path):
+        unit_id = self.item_unit.get(self.resource_item_id(identifier))
+        if unit_id is not None:
+            return unit_id
+        # Assign to first unit if the manifest doesn't place the resource in one
+        return self.model.units[0].id if self.model.units else None
+
+    @staticmethod
+    def extract_assessment(f):
+        """Read a QTI assessment in one streaming pass.
+
+        Returns the assessment's title, the text of its first <mattext> and
+        its qtimetadata fields (label -> entry, first occurrence wins).
+        Elements are dropped as soon as they have been read, so memory use
+        doesn't grow with the size of the question bank.
+        """
+        assessment = {'title': None, 'description': None, 'metadata': {}}
+        # Open elements, and the label/entry of the qtimetadatafield being read
+        path = []
+        field = {}
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            tag = elem.tag.rsplit('}', 1)[-1].lower()
+            if event == 'start':
+                # The <assessment> may be the root or sit inside <questestinterop>
+                if tag == 'assessment' and assessment['title'] is None:
+                    assessment['title'] = elem.get('title', '')
+                path.append(elem)
+                continue
+            path.pop()
+            if tag == 'mattext' and assessment['description'] is None:
+                assessment['description'] = elem.text or ''
+            elif tag == 'fieldlabel':
+                field['label'] = (elem.text or '').strip()
+            elif tag == 'fieldentry':
+                field['entry'] = elem.text or ''
+            elif tag == 'qtimetadatafield':
+                if field.get('label'):
+                    assessment['metadata'].setdefault(field['label'], field.get('entry'))
+                field = {}
+            if path:
+                # Finished with this element: detach it from its parent
+                path[-1].remove(elem)
+        for key in ('title', 'description'):
+            if assessment[key] is None:
+                assessment[key] = ''
+        return assessment
+
+    @staticmethod
+    def assessment_weight(metadata):
+        """Weighting from an assessment's qmd_weighting field"""
+        try:
+            return float(metadata['qmd_weighting'])
+        except (KeyError, ValueError, TypeError):
+            return 100  # Default weight
+
+    def parse_module_meta(self, meta_name):
         """Parse module metadata XML file"""
         try:
-            tree = ET.parse(meta_path)
+            with self.open_member(meta_name) as f:
+                tree = ET.parse(f)
             root = tree.getroot()
             
             # Extract course metadata
             title = root.find('.//title')
             if title is not None:
-                self.course_data['course']['name'] = title.text
+                self.model.course.name = title.text
             
             description = root.find('.//description')
             if description is not None:
-                self.course_data['course']['description'] = description.text
+                self.model.course.description = description.text
             
             org_unit = root.find('.//org_unit')
             if org_unit is not None:
-                self.course_data['course']['faculty'] = org_unit.text
+                self.model.course.faculty = org_unit.text
                 
         except Exception as e:
             print(f"Error parsing module metadata: {str(e)}")
 
+class ImportTimeout(BaseException):
+    """A cartridge took longer than the batch time limit.
+
+    A BaseException, so the per-file `except Exception` handlers, which log
+    a bad page and carry on, can't swallow it and return a partial course.
+    """
+
+def _raise_timeout(signum, frame):
+    raise ImportTimeout("Import timed out")
+
+def import_course(input_file, output_file, html_backend='auto', timeout=None):
+    """Import a single cartridge, write its JSON and return a summary record for it"""
+    record = {
+        'input_file': input_file,
+        'output_file': output_file,
+        'course_code': None,
+        'units': 0,
+        'activities': 0,
+        'seconds': 0.0,
+        'bytes_read': 0,
+        'bytes_written': 0,
+        'error': None
+    }
+    start = time.perf_counter()
+    # A cartridge that hangs the parser is cut off rather than stalling its worker
+    alarm = timeout and hasattr(signal, 'SIGALRM')
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        record['bytes_read'] = os.path.getsize(input_file)
+        course_data = CommonCartridgeImporter(html_backend=html_backend).import_cartridge(input_file)
+        record['course_code'] = course_data['course'].get('code') or None
+        record['units'] = len(course_data['units'])
+        record['activities'] = len(course_data['activities'])
+        # Written under a temporary name so a half-written file never looks finished
+        partial_file = output_file + '.partial'
+        with open(partial_file, 'w', encoding='utf-8') as f:
+            json.dump(course_data, f, indent=2, ensure_ascii=False)
+        os.replace(partial_file, output_file)
+        record['bytes_written'] = os.path.getsize(output_file)
+    except (Exception, ImportTimeout) as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+        if os.path.exists(output_file + '.partial'):
+            os.remove(output_file + '.partial')
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    return record
+
+def survey_cartridge(importer, input_file, weights=False):
+    """Course title, units and activities of a cartridge, read from its manifest and module metadata.
+
+    Assessment weights are only in the QTI files, so they are listed (and
+    every assessment file read) only with weights=True.
+    """
+    with importer:
+        model = importer.peek_cartridge(input_file)
+        assessments = []
+        for activity in model.assessed_activities:
+            assessment = {'title': activity.title}
+            if weights:
+                assessment['weighting'] = activity.weighting
+            assessments.append(assessment)
+        return {
+            'input_file': input_file,
+            'course': model.course.name,
+            'units': [{'title': unit.title, 'activities': len(model.unit_activities(unit.id))}
+                      for unit in model.units],
+            'activities': len(model.activities),
+            'assessments': assessments,
+        }
+
+def failed_record(input_file, output_file, error):
+    """Summary record for a cartridge whose worker never returned one"""
+    return {
+        'input_file': input_file,
+        'output_file': output_file,
+        'course_code': None,
+        'units': 0,
+        'activities': 0,
+        'seconds': 0.0,
+        'bytes_read': 0,
+        'bytes_written': 0,
+        'error': error
+    }
+
+# Flags set by batch workers as they start each cartridge of their pool's batch
+_started = None
+
+def _init_batch_worker(started):
+    global _started
+    _started = started
+
+def _import_flagged(index, input_file, output_file, html_backend, timeout):
+    """import_course in a batch worker, flagging the cartridge as started first.
+
+    The flag is written to shared memory before any work is done, so after
+    a worker dies the parent knows which cartridges were in flight.
+    """
+    _started[index] = 1
+    return import_course(input_file, output_file, html_backend, timeout)
+
+def batch_import(input_files, output_dir, jobs=None, html_backend='auto', timeout=None):
+    """Import many cartridges across a process pool, isolating failures per cartridge"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+    os.makedirs(output_dir, exist_ok=True)
+    output_files = dict(zip(input_files, plan_output_files(input_files, output_dir, '.json')))
+    results = {}
+
+    def run_pool(batch, workers, isolated=False):
+        """Import a batch in one pool; return the cartridges in flight and those not started when it broke"""
+        started = multiprocessing.RawArray('b', len(batch))
+        broken = set()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=(started,)) as pool:
+            futures = {pool.submit(_import_flagged, index, input_file, output_files[input_file],
+                                   html_backend, timeout): (index, input_file)
+                       for index, input_file in enumerate(batch)}
+            for future in as_completed(futures):
+                index, input_file = futures[future]
+                output_file = output_files[input_file]
+                try:
+                    record = future.result()
+                except BrokenProcessPool as e:
+                    if not isolated:
+                        broken.add(index)
+                        continue
+                    record = failed_record(input_file, output_file, f"Worker process died: {e}")
+                except Exception as e:
+                    record = failed_record(input_file, output_file, f"{type(e).__name__}: {e}")
+                results[input_file] = record
+                status = 'FAILED' if record['error'] else 'ok'
+                print(f"[{status}] {input_file} -> {output_file} ({record['seconds']}s)")
+        return ([batch[i] for i in sorted(broken) if started[i]],
+                [batch[i] for i in sorted(broken) if not started[i]])
+
+    pending = list(input_files)
+    suspects = []
+    while pending or suspects:
+        if pending:
+            in_flight, not_started = run_pool(pending, jobs)
+            if not in_flight:
+                # The pool broke before any cartridge started, so none can be blamed
+                in_flight, not_started = not_started, []
+            # Only the cartridges that were running when a worker died are retried
+            # one per pool; the rest go back to a fresh pool with every worker
+            suspects.extend(in_flight)
+            pending = not_started
+        else:
+            # Alone in its pool, a cartridge is only reported as failed if it kills the worker itself
+            run_pool([suspects.pop(0)], 1, isolated=True)
+
+    # Keep the summary in input order regardless of completion order
+    return [results[input_file] for input_file in input_files]
+
+def write_batch_summary(records, summary_file, wall_seconds):
+    """Write a machine-readable JSON summary of a batch import"""
+    succeeded = [r for r in records if not r['error']]
+    summary = {
+        'total': len(records),
+        'succeeded': len(succeeded),
+        'failed': len(records) - len(succeeded),
+        'units': sum(r['units'] for r in succeeded),
+        'activities': sum(r['activities'] for r in succeeded),
+        'bytes_read': sum(r['bytes_read'] for r in records),
+        'bytes_written': sum(r['bytes_written'] for r in records),
+        'wall_seconds': round(wall_seconds, 4),
+        'cpu_seconds': round(sum(r['seconds'] for r in records), 4),
+        'errors': {r['input_file']: r['error'] for r in records if r['error']},
+        'cartridges': records
+    }
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
+
 def main():
     import argparse
     parser = argparse.ArgumentParser(description='Convert Common Cartridge to Courseomatic JSON')
-    parser.add_argument('input_file', help='Input .imscc file')
-    parser.add_argument('output_file', help='Output .json file')
+    parser.add_argument('input_file', nargs='?', help='Input .imscc file')
+    parser.add_argument('output_file', nargs='?', help='Output .json file')
+    parser.add_argument('--batch', nargs='+', metavar='PATTERN',
+                        help='Batch mode: glob patterns of .imscc files to import')
+    parser.add_argument('--manifest', help='Batch mode: file listing .imscc files, one per line')
+    parser.add_argument('--output-dir', help='Batch mode: directory for the generated .json files')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Batch mode: number of worker processes (default: number of CPUs)')
+    parser.add_argument('--summary', help='Batch mode: JSON summary file (default: OUTPUT_DIR/import_summary.json)')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Batch mode: give up on a cartridge after this many seconds')
+    parser.add_argument('--peek', action='store_true',
+                        help='Only list the units, activity counts and assessments of the input cartridge(s) '
+                             'as JSON, reading just the manifest and module metadata')
+    parser.add_argument('--weights', action='store_true',
+                        help='With --peek, also list assessment weights; these are only in the QTI files, '
+                             'so every assessment file is read')
+    parser.add_argument('--html-backend', choices=['auto', 'fast', 'lxml', 'bs4'], default='auto',
+                        help='HTML extraction backend (default: fast path with lxml/bs4 fallback)')
+    parser.add_argument('--report-extraction', action='store_true',
+                        help='List which HTML extraction backend handled each page')
+    parser.add_argument('--profile', metavar='TRACE_JSON',
+                        help='Record stage and per-file timings and write them as a Chrome trace-event file')
     args = parser.parse_args()
 
-    importer = CommonCartridgeImporter()
+    # A missing backend library would otherwise fail every page, one at a time
+    try:
+        HTMLExtractor(args.html_backend)
+    except ImportError as e:
+        parser.error(str(e))
+
+    if args.peek:
+        input_files = collect_input_files(([args.input_file] if args.input_file else []) + (args.batch or []),
+                                          args.manifest)
+        if not input_files:
+            parser.error('no input files given')
+        importer = CommonCartridgeImporter(html_backend=args.html_backend)
+        surveys, failed = [], 0
+        for input_file in input_files:
+            try:
+                surveys.append(survey_cartridge(importer, input_file, weights=args.weights))
+            except Exception as e:
+                surveys.append({'input_file': input_file, 'error': f"{type(e).__name__}: {e}"})
+                failed += 1
+        output = json.dumps(surveys, indent=2, ensure_ascii=False)
+        if args.output_file:
+            with open(args.output_file, 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+        else:
+            print(output)
+        return 1 if failed else 0
+
+    if args.weights:
+        parser.error('--weights is only used with --peek')
+
+    if args.batch or args.manifest:
+        if not args.output_dir:
+            parser.error('--output-dir is required in batch mode')
+        if args.profile or args.report_extraction:
+            parser.error('--profile and --report-extraction are for single imports; not available in batch mode')
+        input_files = collect_input_files(args.batch, args.manifest)
+        if not input_files:
+            parser.error('no input files matched')
+
+        start = time.perf_counter()
+        records = batch_import(input_files, args.output_dir, args.jobs, html_backend=args.html_backend,
+                               timeout=args.timeout)
+        summary_file = args.summary or os.path.join(args.output_dir, 'import_summary.json')
+        summary = write_batch_summary(records, summary_file, time.perf_counter() - start)
+        print(f"Imported {summary['succeeded']}/{summary['total']} cartridges "
+              f"in {summary['wall_seconds']}s; summary written to {summary_file}")
+        return 1 if summary['failed'] else 0
+
+    if not args.input_file or not args.output_file:
+        parser.error('input_file and output_file are required unless --batch or --manifest is given')
+
+    profiler = Profiler() if args.profile else None
+    importer = CommonCartridgeImporter(html_backend=args.html_backend, profiler=profiler)
     course_data = importer.import_cartridge(args.input_file)
+
+    if args.report_extraction:
+        for member_name, backend in sorted(importer.extraction_paths.items()):
+            print(f"{backend:5} {member_name}")
     
     with open(args.output_file, 'w', encoding='utf-8') as f:
         json.dump(course_data, f, indent=2, ensure_ascii=False)
     
+    if profiler is not None:
+        profiler.print_summary()
+        profiler.write_trace(args.profile)
+        print(f"Profile trace written to {args.profile}")
+
     print(f"Successfully created Courseomatic JSON file: {args.output_file}")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+MISC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, MISC_DIR)
+
+from cc_cli import collect_input_files, plan_output_files
+from cc_merge import merge_courses
+
+def write_json(data, output_file, indent):
+    """Write JSON under a temporary name and move it into place, so targets are never left half-written"""
+    partial_file = output_file + '.partial'
+    with open(partial_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+    os.replace(partial_file, output_file)
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge template courses into Courseomatic course files, '
+                                                 'as the browser\'s merge does')
+    parser.add_argument('targets', nargs='*', metavar='PATTERN', help='Target course JSON files or glob patterns')
+    parser.add_argument('--manifest', help='File listing target course JSON files, one per line')
+    parser.add_argument('--template', action='append', required=True, metavar='JSON',
+                        help='Course to merge into every target; repeat to merge several, in order')
+    parser.add_argument('--output-dir', help='Write merged courses here')
+    parser.add_argument('--in-place', action='store_true', help='Overwrite the target files')
+    parser.add_argument('--report', help='Write what each template added to each target as JSON')
+    parser.add_argument('--compact', action='store_true', help='Write compact rather than indented JSON')
+    args = parser.parse_args()
+
+    targets = collect_input_files(args.targets, args.manifest)
+    if not targets:
+        parser.error('no target files given')
+    if bool(args.output_dir) == args.in_place:
+        parser.error('give exactly one of --output-dir and --in-place')
+
+    # Templates are read once for the whole batch
+    templates = []
+    for template_file in args.template:
+        with open(template_file, 'r', encoding='utf-8') as f:
+            templates.append((template_file, json.load(f)))
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        output_files = plan_output_files(targets, args.output_dir, '.json')
+    else:
+        output_files = targets
+
+    indent = None if args.compact else 2
+    reports = []
+    failed = 0
+    start = time.perf_counter()
+    for target_file, output_file in zip(targets, output_files):
+        try:
+            with open(target_file, 'r', encoding='utf-8') as f:
+                target = json.load(f)
+            merged, merge_reports = merge_courses(target, templates)
+            write_json(merged, output_file, indent)
+            reports.append({'target': target_file, 'output_file': output_file, 'error': None,
+                            'templates': merge_reports})
+        except Exception as e:
+            print(f"Error merging into {target_file}: {e}", file=sys.stderr)
+            reports.append({'target': target_file, 'output_file': output_file,
+                            'error': f"{type(e).__name__}: {e}", 'templates': []})
+            failed += 1
+
+    units = sum(len(r['units_added']) for report in reports for r in report['templates'])
+    activities = sum(len(r['activities_added']) for report in reports for r in report['templates'])
+    print(f"Merged {len(templates)} template(s) into {len(targets) - failed}/{len(targets)} courses "
+          f"in {time.perf_counter() - start:.2f}s: {units} units and {activities} activities added")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
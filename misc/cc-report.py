@@ -0,0 +1,103 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from cc_analytics import CourseCatalog
+from cc_cli import collect_input_files
+
+def write_csv(rows, out):
+    """Write rows as CSV; list and dict cells are JSON-encoded"""
+    if not rows:
+        return
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({key: json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+                         for key, value in row.items()})
+
+def print_table(rows, level, out):
+    """Human-readable summary of the main totals"""
+    for row in rows:
+        if level == 'plo':
+            label = f"{row['program']} PLO {row['plo_index'] + 1}"
+            print(f"{label:<40} {row['status']:<10} assessed by {row['assessed_activities']:>4} activities "
+                  f"in {row['courses_assessing']:>3} courses, weight {row['assessed_weight']:>7.1f}, "
+                  f"level {row['achieved_level'] or '-'}{'' if row['meets_target_level'] else ' (below target)'}",
+                  file=out)
+            continue
+        if level == 'course-plo':
+            label = f"{row['code']} PLO {row['plo_index'] + 1}"
+            print(f"{label:<40} declared {row['declared_level'] or '-':<12} assessed by "
+                  f"{row['assessed_activities']:>3} activities, weight {row['assessed_weight']:>6.1f}"
+                  f"{'' if row['conforms'] else '  NONCONFORMING'}", file=out)
+            continue
+        label = row['program'] if level == 'program' else (row.get('code') or row.get('name') or row.get('file') or '')
+        if level == 'unit':
+            label = f"{row['code']} {row['title']}"
+            print(f"{label:<40} study {row['study_minutes']:>8.0f}m  marking {row['marking_minutes']:>7.0f}m  "
+                  f"dev {row['dev_minutes']:>7.0f}m", file=out)
+            continue
+        unassessed = row['unassessed_learning_outcomes']
+        print(f"{label:<40} study {row['total_study_hours']:>8}  marking {row['total_marking_hours']:>7}  "
+              f"dev {row['total_dev_time']:>7}  unassessed CLOs {unassessed if isinstance(unassessed, int) else len(unassessed)}",
+              file=out)
+
+def main():
+    parser = argparse.ArgumentParser(description='Course statistics for many Courseomatic JSON files at once')
+    parser.add_argument('inputs', nargs='*', metavar='PATTERN', help='Course JSON files or glob patterns')
+    parser.add_argument('--manifest', help='File listing course JSON files, one per line')
+    parser.add_argument('--program', help='Treat every course as part of this program (default: program.name)')
+    parser.add_argument('--level', choices=['course', 'program', 'unit', 'plo', 'course-plo'], default='course',
+                        help='Report one row per course, program, unit, program learning outcome (PLO) '
+                             'or (course, PLO) pair')
+    parser.add_argument('--target-level', choices=['foundational', 'developing', 'advanced'], default='advanced',
+                        help='PLO coverage: level every PLO should be assessed at somewhere in the program')
+    parser.add_argument('--all-declared-levels', action='store_true',
+                        help='PLO coverage: check every maxAssessedLevel a course declares, not only those for '
+                             'PLOs it maps a CLO to')
+    parser.add_argument('--format', choices=['table', 'json', 'csv'], default='table')
+    parser.add_argument('--output', help='Write the report here instead of stdout')
+    args = parser.parse_args()
+
+    input_files = collect_input_files(args.inputs, args.manifest)
+    if not input_files:
+        parser.error('no input files given')
+
+    start = time.perf_counter()
+    catalog = CourseCatalog()
+    errors = catalog.load(input_files, program=args.program)
+    for path, error in errors:
+        print(f"Error loading {path}: {error}", file=sys.stderr)
+
+    if args.level == 'program':
+        rows = catalog.program_table()
+    elif args.level == 'unit':
+        rows = catalog.unit_table()
+    elif args.level in ('plo', 'course-plo'):
+        # SciPy is only needed for outcome coverage
+        from cc_coverage import OutcomeCoverage
+        coverage = OutcomeCoverage(catalog, target_level=args.target_level,
+                                   all_declarations=args.all_declared_levels)
+        rows = coverage.plo_table() if args.level == 'plo' else coverage.course_plo_table()
+    else:
+        rows = catalog.course_table()
+
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump(rows, out, indent=2, ensure_ascii=False)
+            out.write('\n')
+        elif args.format == 'csv':
+            write_csv(rows, out)
+        else:
+            print_table(rows, args.level, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{catalog.course_count} courses, {len(catalog.columns['course'])} activities "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,349 @@
+import argparse
+import hashlib
+import http.server
+import io
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+MISC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, MISC_DIR)
+
+from cc_cli import load_script
+from cc_html import HTMLExtractor
+
+# Exporter and importer modules, loaded once in each worker process
+_exporter_module = None
+_importer_module = None
+
+def init_worker():
+    """Load the exporter and importer when a worker starts, so requests find them warm"""
+    global _exporter_module, _importer_module
+    _exporter_module = load_script('cc-export-complete.py', 'cc_export_complete')
+    _importer_module = load_script('cc-import.py', 'cc_import')
+
+def run_export(body, options):
+    """Courseomatic JSON in, .imscc bytes out"""
+    exporter = _exporter_module.CourseomaticExporter(
+        json.loads(body),
+        pretty=not options['compact'],
+        compress_level=options['level'],
+        compress_jobs=1,
+        store_only=options['store'],
+        normalize_html=options['minify'],
+        dedupe=options['dedupe']
+    )
+    output = io.BytesIO()
+    exporter.export_to_cc(output)
+    return output.getvalue()
+
+def run_import(body, options):
+    """.imscc bytes in, Courseomatic JSON out"""
+    importer = _importer_module.CommonCartridgeImporter(html_backend=options['html_backend'])
+    course_data = importer.import_cartridge(io.BytesIO(body))
+    return json.dumps(course_data, indent=2, ensure_ascii=False).encode('utf-8')
+
+ENDPOINTS = {
+    '/export': (run_export, 'application/zip'),
+    '/import': (run_import, 'application/json; charset=utf-8'),
+}
+
+def parse_options(query):
+    """Request options from the query string, with the CLI defaults"""
+    values = {key: items[-1] for key, items in parse_qs(query).items()}
+    level = values.get('level')
+    if level is not None and (not level.isdigit() or int(level) > 9):
+        raise ValueError("level must be 0-9")
+    html_backend = values.get('html_backend', 'auto')
+    if html_backend not in ('auto', 'fast', 'lxml', 'bs4'):
+        raise ValueError("html_backend must be auto, fast, lxml or bs4")
+    try:
+        HTMLExtractor(html_backend)
+    except ImportError as e:
+        raise ValueError(str(e))
+    return {
+        'compact': values.get('compact', '') in ('1', 'true', 'yes'),
+        'store': values.get('store', '') in ('1', 'true', 'yes'),
+        'minify': values.get('minify', '') in ('1', 'true', 'yes'),
+        'dedupe': values.get('dedupe', '') in ('1', 'true', 'yes'),
+        'level': int(level) if level is not None else None,
+        'html_backend': html_backend,
+    }
+
+class ResponseCache:
+    """Least-recently-used cache of response bodies, bounded by their total size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses}
+
+class WorkerCrashed(Exception):
+    """A worker process died (out of memory, a crash in zlib or lxml...) while handling a request"""
+
+class RequestTimedOut(Exception):
+    """A request took longer than the service's time limit"""
+
+class CartridgeService:
+    """Runs exports and imports on a pool of warm worker processes, caching responses by content hash"""
+
+    def __init__(self, workers=None, cache_bytes=256 << 20, max_upload=200 << 20, timeout=None):
+        self.workers = workers
+        self.pool = self.start_pool()
+        self.cache = ResponseCache(cache_bytes)
+        self.max_upload = max_upload
+        self.timeout = timeout
+        self.started = time.time()
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.lock = threading.Lock()
+
+    def start_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+
+    def restart_pool(self, broken, terminate=False):
+        """Replace a pool that lost a worker, unless another request already has.
+
+        With terminate=True the old pool's workers are killed first, for a
+        worker stuck on a request that will never return on its own; other
+        requests running on that pool then fail as they would after a crash.
+        """
+        with self.lock:
+            if self.pool is not broken:
+                return
+            self.pool = self.start_pool()
+            self.restarts += 1
+        if terminate:
+            for process in list((broken._processes or {}).values()):
+                process.terminate()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def cache_key(path, options, body):
+        hasher = hashlib.sha256()
+        hasher.update(json.dumps([path, options], sort_keys=True).encode('utf-8'))
+        hasher.update(body)
+        return hasher.hexdigest()
+
+    def process(self, path, options, body):
+        """Return (response body, cache key, whether it came from the cache)"""
+        key = self.cache_key(path, options, body)
+        data = self.cache.get(key)
+        if data is not None:
+            return data, key, True
+        job, _ = ENDPOINTS[path]
+        pool = self.pool
+        future = pool.submit(job, body, options)
+        try:
+            data = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # A request still queued is just dropped; one holding a worker
+            # may never finish, so the pool is recycled as after a crash
+            if not future.cancel():
+                self.restart_pool(pool, terminate=True)
+            with self.lock:
+                self.failed += 1
+                self.timeouts += 1
+            raise RequestTimedOut(f"Request took longer than {self.timeout:g}s")
+        except BrokenProcessPool as e:
+            # A dead worker breaks the whole pool; start a new one for later requests
+            self.restart_pool(pool)
+            with self.lock:
+                self.failed += 1
+            raise WorkerCrashed(f"Worker process died: {e}") from e
+        except Exception:
+            with self.lock:
+                self.failed += 1
+            raise
+        with self.lock:
+            self.completed += 1
+        self.cache.put(key, data)
+        return data, key, False
+
+    def stats(self):
+        with self.lock:
+            counts = {'completed': self.completed, 'failed': self.failed, 'timeouts': self.timeouts,
+                      'pool_restarts': self.restarts}
+        return {'uptime_seconds': round(time.time() - self.started, 1), **counts, 'cache': self.cache.stats()}
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    """POST /export (JSON body) or /import (.imscc body); GET /health and /stats"""
+    server_version = 'Courseomatic-CC/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def send_body(self, status, content_type, data, headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    def send_json(self, status, value):
+        self.send_body(status, 'application/json; charset=utf-8', json.dumps(value).encode('utf-8'))
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        elif path == '/stats':
+            self.send_json(200, self.service.stats())
+        else:
+            self.send_json(404, {'error': f"Unknown path {path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path not in ENDPOINTS:
+            self.send_json(404, {'error': f"Unknown path {url.path}"})
+            return
+        try:
+            options = parse_options(url.query)
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self.close_connection = True
+            self.send_json(400, {'error': 'Content-Length required'})
+            return
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body can't be framed, so the connection can't be reused either
+            self.close_connection = True
+            self.send_json(400, {'error': 'Content-Length must be a non-negative integer'})
+            return
+        if length > self.service.max_upload:
+            self.close_connection = True
+            self.send_json(413, {'error': f"Upload larger than {self.service.max_upload} bytes"})
+            return
+        body = self.rfile.read(length)
+
+        try:
+            data, key, cached = self.service.process(url.path, options, body)
+        except WorkerCrashed as e:
+            self.send_json(503, {'error': str(e)})
+            return
+        except RequestTimedOut as e:
+            self.send_json(504, {'error': str(e)})
+            return
+        except Exception as e:
+            self.send_json(422, {'error': f"{type(e).__name__}: {e}"})
+            return
+
+        etag = f'"{key}"'
+        headers = [('ETag', etag), ('X-Cache', 'hit' if cached else 'miss')]
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        if url.path == '/export':
+            headers.append(('Content-Disposition', 'attachment; filename="course.imscc"'))
+        self.send_body(200, ENDPOINTS[url.path][1], data, headers)
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # BaseHTTPRequestHandler expects an address it can log
+        request, _ = super().get_request()
+        return request, ('unix', 0)
+
+def make_server(service, host='127.0.0.1', port=8765, socket_path=None, quiet=False):
+    """HTTP server on a TCP port or, with socket_path, on a Unix socket"""
+    handler = RequestHandler
+    if quiet:
+        handler = type('QuietRequestHandler', (RequestHandler,), {'log_message': lambda self, *args: None})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, handler)
+    else:
+        server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.service = service
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve Courseomatic Common Cartridge export and import over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port (default: 8765)')
+    parser.add_argument('--socket', help='Listen on this Unix socket instead of a TCP port')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for exports and imports (default: number of CPUs)')
+    parser.add_argument('--cache-mb', type=int, default=256, help='Response cache size in MB (0 disables it)')
+    parser.add_argument('--max-upload-mb', type=int, default=200, help='Largest accepted request body in MB')
+    parser.add_argument('--timeout', type=float, default=300,
+                        help='Give up on a request after this many seconds, recycling its worker (default: 300)')
+    parser.add_argument('--quiet', action='store_true', help="Don't log each request")
+    args = parser.parse_args()
+
+    service = CartridgeService(args.workers, args.cache_mb << 20, args.max_upload_mb << 20,
+                               args.timeout or None)
+    # Warm a worker up now rather than on the first request
+    service.pool.submit(os.getpid).result()
+    server = make_server(service, args.host, args.port, args.socket, args.quiet)
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"Serving Common Cartridge export/import on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+if __name__ == "__main__":
+    main()
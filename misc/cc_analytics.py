@@ -0,0 +1,327 @@
+"""Course statistics for a whole catalog of Courseomatic courses at once.
+
+Every activity of every loaded course becomes one row of a set of NumPy
+columns (course, unit, type, study/marking/development minutes, assessed
+flag, weighting), and activity->learning outcome links become a second,
+flattened pair of columns. The browser's getTotalStudyHours,
+getTotalMarkingHours, getTotalDevTime, getActivityTypeProportions and
+getUnassessedLearningOutcomes are then computed for every course (and
+summed per program) with a few bincount/scatter operations instead of a
+Python loop per course.
+"""
+import json
+import re
+import numpy as np
+
+NO_PROGRAM = '(no program)'
+_LEADING_INT = re.compile(r'\s*([+-]?\d+)')
+
+def time_to_minutes(value):
+    """Minutes for a study/marking/dev time, as timeToMinutes() in script.js reads it.
+
+    Numbers are minutes; "HH:MM" strings are hours and minutes; other strings
+    are read as a leading integer number of minutes. Missing or unreadable
+    values count as 0, and negative values are clamped to 0.
+    """
+    if value is None or isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        return max(0, value)
+    if isinstance(value, str):
+        if ':' in value:
+            hours, _, minutes = value.partition(':')
+            try:
+                return max(0, int(hours or 0) * 60 + int(minutes.split(':')[0] or 0))
+            except ValueError:
+                return 0
+        match = _LEADING_INT.match(value)
+        return max(0, int(match.group(1))) if match else 0
+    return 0
+
+def minutes_to_time(minutes):
+    """HH:MM display form of a number of minutes, as minutesToTime() in script.js"""
+    minutes = max(0, minutes or 0)
+    if float(minutes).is_integer():
+        minutes = int(minutes)
+    return f"{int(minutes // 60):02d}:{minutes % 60:02}"
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+class CourseCatalog:
+    """Columnar store of the activities and outcomes of many courses"""
+
+    def __init__(self):
+        # One entry per course
+        self.course_names = []
+        self.course_codes = []
+        self.course_files = []
+        self.course_program = []
+        self.course_outcomes = []
+        self.course_plos = []
+
+        # Interned names
+        self.programs = []
+        self.program_index = {}
+        self.types = []
+        self.type_index = {}
+        self.unit_ids = []
+        self.unit_course = []
+        self.unit_titles = []
+
+        # Activity columns, built as lists and frozen into arrays by finalize()
+        self._columns = {name: [] for name in (
+            'course', 'unit', 'type', 'study', 'marking', 'dev', 'assessed', 'weighting')}
+        # Activity -> CLO links and CLO -> PLO mappings (mappedPLOs), flattened
+        self._links = {'activity': [], 'outcome': []}
+        self._mappings = {'course': [], 'outcome': [], 'plo': []}
+        self.columns = None
+        self.links = None
+        self.mappings = None
+
+    def _intern(self, names, index, name):
+        code = index.get(name)
+        if code is None:
+            code = index[name] = len(names)
+            names.append(name)
+        return code
+
+    def add_course(self, course_data, source=None, program=None):
+        """Append one course (a Courseomatic JSON document) to the catalog"""
+        course_index = len(self.course_names)
+        course = course_data.get('course') or {}
+        program_name = program or (course_data.get('program') or {}).get('name') or NO_PROGRAM
+        self.course_names.append(course.get('name') or '')
+        self.course_codes.append((course.get('code') or '').strip())
+        self.course_files.append(source)
+        self.course_program.append(self._intern(self.programs, self.program_index, program_name))
+        self.course_outcomes.append(list(course.get('learningOutcomes') or []))
+        # (text, maxAssessedLevel) for each of the program's outcomes, as this course declares them
+        self.course_plos.append([
+            ((plo or {}).get('plo') or '', (plo or {}).get('maxAssessedLevel') or '') if isinstance(plo, dict) else (str(plo), '')
+            for plo in (course_data.get('program') or {}).get('learningOutcomes') or []
+        ])
+        mappings = self._mappings
+        for outcome, plos in enumerate(course_data.get('mappedPLOs') or []):
+            for plo in plos if isinstance(plos, list) else []:
+                if isinstance(plo, int) and not isinstance(plo, bool):
+                    mappings['course'].append(course_index)
+                    mappings['outcome'].append(outcome)
+                    mappings['plo'].append(plo)
+
+        unit_index = {}
+        for unit in course_data.get('units') or []:
+            unit_index[unit.get('id')] = len(self.unit_ids)
+            self.unit_ids.append(unit.get('id'))
+            self.unit_course.append(course_index)
+            self.unit_titles.append(unit.get('title') or '')
+
+        columns = self._columns
+        links = self._links
+        for activity in course_data.get('activities') or []:
+            activity_row = len(columns['course'])
+            columns['course'].append(course_index)
+            columns['unit'].append(unit_index.get(activity.get('unitId'), -1))
+            columns['type'].append(self._intern(self.types, self.type_index, activity.get('type') or ''))
+            columns['study'].append(time_to_minutes(activity.get('studyHours')))
+            columns['marking'].append(time_to_minutes(activity.get('markingHours')))
+            columns['dev'].append(time_to_minutes(activity.get('estDevTime')))
+            columns['assessed'].append(bool(activity.get('isAssessed')))
+            columns['weighting'].append(_number(activity.get('weighting')))
+            for outcome in activity.get('learningOutcomes') or []:
+                if isinstance(outcome, int) and not isinstance(outcome, bool):
+                    links['activity'].append(activity_row)
+                    links['outcome'].append(outcome)
+        self.columns = None
+
+    def load(self, paths, program=None):
+        """Add every course file in paths; returns a list of (path, error) for files that failed"""
+        errors = []
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.add_course(json.load(f), source=path, program=program)
+            except (OSError, ValueError, AttributeError, TypeError) as e:
+                errors.append((path, f"{type(e).__name__}: {e}"))
+        return errors
+
+    def finalize(self):
+        """Freeze the accumulated rows into NumPy arrays"""
+        if self.columns is not None:
+            return
+        c = self._columns
+        self.columns = {
+            'course': np.asarray(c['course'], dtype=np.int64),
+            'unit': np.asarray(c['unit'], dtype=np.int64),
+            'type': np.asarray(c['type'], dtype=np.int64),
+            'study': np.asarray(c['study'], dtype=np.float64),
+            'marking': np.asarray(c['marking'], dtype=np.float64),
+            'dev': np.asarray(c['dev'], dtype=np.float64),
+            'assessed': np.asarray(c['assessed'], dtype=bool),
+            'weighting': np.asarray(c['weighting'], dtype=np.float64),
+        }
+        self.links = {
+            'activity': np.asarray(self._links['activity'], dtype=np.int64),
+            'outcome': np.asarray(self._links['outcome'], dtype=np.int64),
+        }
+        self.mappings = {key: np.asarray(values, dtype=np.int64) for key, values in self._mappings.items()}
+        self.course_program_array = np.asarray(self.course_program, dtype=np.int64)
+        self.outcome_counts = np.asarray([len(o) for o in self.course_outcomes], dtype=np.int64)
+        # Global CLO numbering: course i's outcomes are outcome_offsets[i] onwards
+        self.outcome_offsets = np.concatenate(([0], np.cumsum(self.outcome_counts)[:-1])).astype(np.int64)
+
+    @property
+    def course_count(self):
+        return len(self.course_names)
+
+    def course_totals(self):
+        """Study, marking (assessed activities only) and development minutes per course"""
+        self.finalize()
+        col = self.columns
+        n = self.course_count
+        return {
+            'study': np.bincount(col['course'], weights=col['study'], minlength=n),
+            'marking': np.bincount(col['course'], weights=np.where(col['assessed'], col['marking'], 0), minlength=n),
+            'dev': np.bincount(col['course'], weights=col['dev'], minlength=n),
+            'activities': np.bincount(col['course'], minlength=n),
+            'assessed': np.bincount(col['course'], weights=col['assessed'], minlength=n).astype(np.int64),
+            'weighting': np.bincount(col['course'], weights=np.where(col['assessed'] & ~np.isnan(col['weighting']),
+                                                                     col['weighting'], 0), minlength=n),
+        }
+
+    def type_minutes(self):
+        """Study minutes per (course, activity type), shape courses x types"""
+        self.finalize()
+        col = self.columns
+        n, t = self.course_count, len(self.types)
+        return np.bincount(col['course'] * t + col['type'], weights=col['study'], minlength=n * t).reshape(n, t)
+
+    def type_proportions(self):
+        """Share of each course's study time per activity type (getActivityTypeProportions)"""
+        minutes = self.type_minutes()
+        totals = minutes.sum(axis=1, keepdims=True)
+        # A course with no study time has no proportions, rather than NaN
+        return np.divide(minutes, totals, out=np.zeros_like(minutes), where=totals > 0)
+
+    def type_present(self):
+        """Which activity types each course actually uses"""
+        self.finalize()
+        col = self.columns
+        n, t = self.course_count, len(self.types)
+        return np.bincount(col['course'] * t + col['type'], minlength=n * t).reshape(n, t) > 0
+
+    def assessed_outcomes(self):
+        """Boolean per global CLO: is it listed by at least one assessed activity of its course?"""
+        self.finalize()
+        links = self.links
+        assessed = np.zeros(int(self.outcome_counts.sum()), dtype=bool)
+        if not len(links['activity']):
+            return assessed
+        course = self.columns['course'][links['activity']]
+        outcome = links['outcome']
+        # Indexes that don't name one of the course's outcomes are ignored, as in the browser
+        valid = self.columns['assessed'][links['activity']] & (outcome >= 0) & (outcome < self.outcome_counts[course])
+        assessed[self.outcome_offsets[course[valid]] + outcome[valid]] = True
+        return assessed
+
+    def unassessed_outcomes(self):
+        """Per course, the (index, text) of learning outcomes no assessed activity covers"""
+        assessed = self.assessed_outcomes()
+        result = []
+        for i, outcomes in enumerate(self.course_outcomes):
+            offset = self.outcome_offsets[i]
+            missing = np.flatnonzero(~assessed[offset:offset + len(outcomes)])
+            result.append([(int(j), outcomes[j]) for j in missing])
+        return result
+
+    def course_table(self):
+        """One row per course with the browser's totals, proportions and unassessed outcomes"""
+        totals = self.course_totals()
+        proportions = self.type_proportions()
+        present = self.type_present()
+        unassessed = self.unassessed_outcomes()
+        rows = []
+        for i in range(self.course_count):
+            rows.append({
+                'file': self.course_files[i],
+                'program': self.programs[self.course_program[i]],
+                'code': self.course_codes[i],
+                'name': self.course_names[i],
+                'activities': int(totals['activities'][i]),
+                'assessed_activities': int(totals['assessed'][i]),
+                'study_minutes': float(totals['study'][i]),
+                'total_study_hours': minutes_to_time(totals['study'][i]),
+                'marking_minutes': float(totals['marking'][i]),
+                'total_marking_hours': minutes_to_time(totals['marking'][i]),
+                'dev_minutes': float(totals['dev'][i]),
+                'total_dev_time': minutes_to_time(totals['dev'][i]),
+                'assessment_weighting': float(totals['weighting'][i]),
+                'activity_type_proportions': {
+                    self.types[t]: float(proportions[i, t]) for t in np.flatnonzero(present[i])
+                },
+                'unassessed_learning_outcomes': [text for _, text in unassessed[i]],
+            })
+        return rows
+
+    def program_table(self):
+        """One row per program, summing its courses"""
+        totals = self.course_totals()
+        minutes = self.type_minutes()
+        program = self.course_program_array
+        p = len(self.programs)
+        assessed = self.assessed_outcomes()
+        outcome_program = np.repeat(program, self.outcome_counts)
+
+        def per_program(values):
+            return np.bincount(program, weights=values, minlength=p)
+
+        course_counts = np.bincount(program, minlength=p)
+        activities = per_program(totals['activities'])
+        study, marking, dev = per_program(totals['study']), per_program(totals['marking']), per_program(totals['dev'])
+        program_minutes = np.zeros((p, len(self.types)))
+        np.add.at(program_minutes, program, minutes)
+        outcomes = np.bincount(outcome_program, minlength=p)
+        unassessed = np.bincount(outcome_program, weights=~assessed, minlength=p)
+
+        rows = []
+        for j, name in enumerate(self.programs):
+            rows.append({
+                'program': name,
+                'courses': int(course_counts[j]),
+                'activities': int(activities[j]),
+                'study_minutes': float(study[j]),
+                'total_study_hours': minutes_to_time(study[j]),
+                'marking_minutes': float(marking[j]),
+                'total_marking_hours': minutes_to_time(marking[j]),
+                'dev_minutes': float(dev[j]),
+                'total_dev_time': minutes_to_time(dev[j]),
+                'activity_type_proportions': {
+                    self.types[t]: float(program_minutes[j, t] / study[j]) if study[j] else 0.0
+                    for t in np.flatnonzero(program_minutes[j] > 0)
+                },
+                'learning_outcomes': int(outcomes[j]),
+                'unassessed_learning_outcomes': int(unassessed[j]),
+            })
+        return rows
+
+    def unit_table(self):
+        """One row per unit with its study, marking and development totals (as in generateCourseReport)"""
+        self.finalize()
+        col = self.columns
+        in_unit = col['unit'] >= 0
+        unit = col['unit'][in_unit]
+        u = len(self.unit_ids)
+        study = np.bincount(unit, weights=col['study'][in_unit], minlength=u)
+        marking = np.bincount(unit, weights=np.where(col['assessed'], col['marking'], 0)[in_unit], minlength=u)
+        dev = np.bincount(unit, weights=col['dev'][in_unit], minlength=u)
+        return [{
+            'code': self.course_codes[self.unit_course[k]],
+            'unit_id': self.unit_ids[k],
+            'title': self.unit_titles[k],
+            'study_minutes': float(study[k]),
+            'marking_minutes': float(marking[k]),
+            'dev_minutes': float(dev[k]),
+        } for k in range(u)]
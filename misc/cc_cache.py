@@ -0,0 +1,100 @@
+"""On-disk cache of rendered cartridge members, keyed by content hash.
+
+Each unit page, activity page, QTI file and course-level artifact is keyed by
+a fingerprint of exactly the data it is rendered from (including the
+learning outcome text it quotes) plus a salt identifying the renderer, so a
+re-export only re-renders what actually changed.
+"""
+import hashlib
+import os
+import tempfile
+from cc_stream import LazyText
+
+def _feed(hasher, value):
+    """Feed a canonical, type-tagged encoding of value into hasher"""
+    if isinstance(value, LazyText):
+        hasher.update(b's%d:' % value.length)
+        for chunk in value.iter_chunks():
+            hasher.update(chunk.encode('utf-8'))
+    elif isinstance(value, str):
+        hasher.update(b's%d:' % len(value))
+        hasher.update(value.encode('utf-8'))
+    elif isinstance(value, dict):
+        hasher.update(b'{%d:' % len(value))
+        for key in sorted(value, key=str):
+            _feed(hasher, str(key))
+            _feed(hasher, value[key])
+        hasher.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        hasher.update(b'[%d:' % len(value))
+        for item in value:
+            _feed(hasher, item)
+        hasher.update(b']')
+    else:
+        hasher.update(f"{type(value).__name__}:{value!r};".encode('utf-8'))
+
+def fingerprint(*parts):
+    """Return a hex digest identifying the given (JSON-like) values"""
+    hasher = hashlib.sha256()
+    _feed(hasher, parts)
+    return hasher.hexdigest()
+
+def file_digest(*paths):
+    """Digest of the given source files, used to invalidate the cache when the renderer changes"""
+    hasher = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            hasher.update(f.read())
+    return hasher.hexdigest()
+
+class RenderCache:
+    """Content-addressed store of rendered members under a directory"""
+
+    def __init__(self, directory, salt=''):
+        self.directory = directory
+        self.salt = salt
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, kind, *parts):
+        return fingerprint(self.salt, kind, *parts)
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent exports never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def fetch(self, kind, parts, render):
+        """Return the cached bytes for (kind, parts), calling render() on a miss"""
+        key = self.key(kind, *parts)
+        data = self.get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+        self.misses += 1
+        data = render()
+        self.put(key, data)
+        return data
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
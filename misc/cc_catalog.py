@@ -0,0 +1,514 @@
+"""Catalog archive: many course designs (and their attached files) in one SQLite file.
+
+Each course is stored as rows: one for the course, one per unit and one per
+activity. The fields that queries filter on (course code, unit, activity type
+and specific activity, assigned team member, team members) are indexed
+columns. The rest of each record is a small JSON document. Any text larger
+than BLOB_THRESHOLD (typically big HTML descriptions) and every attachment's
+data live in a content-addressed blob table. A blob is referenced from the
+record as {"$blob": id} and comes back as a LazyText that reads through SQLite's
+incremental blob I/O only when it is used. With mmap enabled, those reads come
+straight from the mapped file, so loading a course for a query or an export
+never parses its original JSON file or touches text it does not need.
+
+Ingesting is incremental. A course whose file (and fileData.json) has the same
+size and mtime, or failing that the same SHA-256, is left alone. A changed
+course is replaced in one transaction, and blobs no longer referenced are
+dropped by collect_garbage().
+
+Course, unit and activity text (title, goal, description, devNotes,
+courseResources) is also kept, with its HTML stripped, in an FTS5 full-text
+index that is updated with each ingest. search() ranks matches with BM25 and
+can filter them by activity type and specific activity.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from cc_html import html_to_text
+from cc_model import Activity, Course, CourseModel, Unit
+from cc_stream import LazyText, iter_repository_files, load_course_model, text_chunks
+
+BLOB_THRESHOLD = 4096
+MMAP_SIZE = 1 << 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    id INTEGER PRIMARY KEY,
+    digest TEXT UNIQUE NOT NULL,
+    nbytes INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY,
+    source TEXT UNIQUE NOT NULL,
+    source_size INTEGER,
+    source_mtime_ns INTEGER,
+    source_digest TEXT,
+    files_source TEXT,
+    files_size INTEGER,
+    files_mtime_ns INTEGER,
+    files_digest TEXT,
+    code TEXT,
+    name TEXT,
+    program TEXT,
+    record TEXT NOT NULL,
+    ingested_at REAL
+);
+CREATE TABLE IF NOT EXISTS units (
+    course_id INTEGER NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    id TEXT,
+    title TEXT,
+    record TEXT NOT NULL,
+    PRIMARY KEY (course_id, position)
+);
+CREATE TABLE IF NOT EXISTS activities (
+    course_id INTEGER NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    id TEXT,
+    unit_id TEXT,
+    type TEXT,
+    specific_activity TEXT,
+    title TEXT,
+    assigned_team_member TEXT,
+    is_assessed INTEGER,
+    record TEXT NOT NULL,
+    PRIMARY KEY (course_id, position)
+);
+CREATE TABLE IF NOT EXISTS team_members (
+    course_id INTEGER NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attachments (
+    course_id INTEGER NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT,
+    mime_type TEXT,
+    blob_id INTEGER NOT NULL REFERENCES blobs(id),
+    PRIMARY KEY (course_id, position)
+);
+CREATE INDEX IF NOT EXISTS courses_code ON courses(code);
+CREATE INDEX IF NOT EXISTS courses_program ON courses(program);
+CREATE INDEX IF NOT EXISTS units_id ON units(id);
+CREATE INDEX IF NOT EXISTS activities_unit ON activities(unit_id);
+CREATE INDEX IF NOT EXISTS activities_type ON activities(type, specific_activity);
+CREATE INDEX IF NOT EXISTS activities_team_member ON activities(assigned_team_member);
+CREATE INDEX IF NOT EXISTS team_members_name ON team_members(name);
+"""
+
+# One row per course, unit and activity. Rows of course N have rowids
+# N << SEARCH_SHIFT onwards, so a course's rows can be dropped by rowid range.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE search USING fts5(
+    course_id UNINDEXED,
+    kind UNINDEXED,
+    item_id UNINDEXED,
+    type UNINDEXED,
+    specific_activity UNINDEXED,
+    title,
+    body,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+SEARCH_SHIFT = 20
+# BM25 column weights: matches in titles count four times as much as in body text
+SEARCH_WEIGHTS = (0, 0, 0, 0, 0, 4.0, 1.0)
+_WORD = re.compile(r'\w+\*?')
+
+def search_documents(model):
+    """(kind, id, type, specific activity, title, body) for the searchable text of a course"""
+    course = model.course
+    yield ('course', course.code, None, None, html_to_text(course.name or ''),
+           ' '.join(html_to_text(value or '') for value in
+                    (course.goal, course.description, course.course_resources)))
+    for unit in model.units:
+        yield ('unit', unit.id, None, None, html_to_text(unit.title or ''), html_to_text(unit.description or ''))
+    for activity in model.activities:
+        yield ('activity', activity.id, activity.type, activity.specific_activity,
+               html_to_text(activity.title or ''),
+               ' '.join(html_to_text(value or '') for value in (activity.description, activity.dev_notes)))
+
+def match_expression(query):
+    """FTS5 query matching every word of a plain-text query (a trailing * makes a word a prefix)"""
+    terms = []
+    for word in _WORD.findall(query):
+        prefix = word.endswith('*')
+        terms.append('"' + word.rstrip('*') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+def file_state(path):
+    """(size, mtime_ns) of a file, used to skip unchanged files without reading them"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def sha256_file(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+class BlobReader:
+    """Reads byte ranges of one stored blob; the `spill` behind a catalog LazyText"""
+    __slots__ = ('store', 'blob_id')
+
+    def __init__(self, store, blob_id):
+        self.store = store
+        self.blob_id = blob_id
+
+    def read(self, offset, length):
+        return self.store.read_blob(self.blob_id, offset, length)
+
+class CatalogStore:
+    """SQLite-backed catalog of course designs"""
+
+    def __init__(self, path, mmap_size=MMAP_SIZE, blob_threshold=BLOB_THRESHOLD):
+        self.path = path
+        self.blob_threshold = blob_threshold
+        # LazyText values may be read from other threads (e.g. export workers)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+        self.connection.executescript(SCHEMA)
+        created = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'search'").fetchone() is None
+        if created:
+            with self.connection:
+                self.connection.executescript(SEARCH_SCHEMA)
+            self.reindex_search()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # Blobs
+
+    def put_blob(self, value):
+        """Store text (str or LazyText) or bytes once, returning its blob id"""
+        hasher = hashlib.sha256()
+        nbytes = 0
+        for chunk in self._byte_chunks(value):
+            hasher.update(chunk)
+            nbytes += len(chunk)
+        digest = hasher.hexdigest()
+        row = self.connection.execute("SELECT id FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row is not None:
+            return row[0]
+        length = nbytes if isinstance(value, bytes) else len(value)
+        cursor = self.connection.execute(
+            "INSERT INTO blobs (digest, nbytes, length, data) VALUES (?, ?, ?, zeroblob(?))",
+            (digest, nbytes, length, nbytes))
+        blob_id = cursor.lastrowid
+        # Written a chunk at a time, so a spilled description is never held whole
+        with self.connection.blobopen('blobs', 'data', blob_id) as blob:
+            for chunk in self._byte_chunks(value):
+                blob.write(chunk)
+        return blob_id
+
+    @staticmethod
+    def _byte_chunks(value):
+        if isinstance(value, bytes):
+            yield value
+        else:
+            for chunk in text_chunks(value):
+                yield chunk.encode('utf-8')
+
+    def read_blob(self, blob_id, offset, length):
+        with self.lock:
+            with self.connection.blobopen('blobs', 'data', blob_id, readonly=True) as blob:
+                blob.seek(offset)
+                return blob.read(length)
+
+    def lazy_text(self, blob_id):
+        """LazyText over a stored blob; nothing is read until it is used"""
+        nbytes, length = self.connection.execute(
+            "SELECT nbytes, length FROM blobs WHERE id = ?", (blob_id,)).fetchone()
+        return LazyText(BlobReader(self, blob_id), 0, nbytes, length)
+
+    def _externalize(self, value):
+        """JSON-ready copy of value with large strings moved into blobs"""
+        if isinstance(value, LazyText) or (isinstance(value, str) and len(value) > self.blob_threshold):
+            return {'$blob': self.put_blob(value)}
+        if isinstance(value, dict):
+            return {key: self._externalize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._externalize(item) for item in value]
+        return value
+
+    def _internalize(self, value):
+        """Inverse of _externalize, with blobs as LazyText"""
+        if isinstance(value, dict):
+            if len(value) == 1 and '$blob' in value:
+                return self.lazy_text(value['$blob'])
+            return {key: self._internalize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._internalize(item) for item in value]
+        return value
+
+    def _record(self, value):
+        return json.dumps(self._externalize(value), ensure_ascii=False, separators=(',', ':'))
+
+    # Ingest
+
+    def ingest(self, course_file, files_file=None, force=False):
+        """Add or refresh one course file (and optional fileData.json); returns 'added', 'updated' or 'unchanged'"""
+        source = os.path.abspath(course_file)
+        files_source = os.path.abspath(files_file) if files_file else None
+        size, mtime_ns = file_state(source)
+        files_size, files_mtime_ns = file_state(files_source) if files_source else (None, None)
+
+        with self.lock:
+            existing = self.connection.execute(
+                "SELECT id, source_size, source_mtime_ns, source_digest, files_source, files_size, "
+                "files_mtime_ns, files_digest FROM courses WHERE source = ?", (source,)).fetchone()
+            if existing is not None and not force and existing[4] == files_source:
+                if (existing[1], existing[2]) == (size, mtime_ns) and (existing[5], existing[6]) == (files_size, files_mtime_ns):
+                    return 'unchanged'
+            digest = sha256_file(source)
+            files_digest = sha256_file(files_source) if files_source else None
+            if existing is not None and not force and (existing[3], existing[7], existing[4]) == (digest, files_digest, files_source):
+                # Touched but not changed: just remember the new mtimes
+                with self.connection:
+                    self.connection.execute(
+                        "UPDATE courses SET source_size = ?, source_mtime_ns = ?, files_size = ?, files_mtime_ns = ? "
+                        "WHERE id = ?", (size, mtime_ns, files_size, files_mtime_ns, existing[0]))
+                return 'unchanged'
+
+            model = load_course_model(source)
+            with self.connection:
+                if existing is not None:
+                    self._delete_course(existing[0])
+                course_id = self._insert_course(model, source, (size, mtime_ns, digest),
+                                                files_source, (files_size, files_mtime_ns, files_digest))
+                if files_source:
+                    for position, entry in enumerate(iter_repository_files(files_source)):
+                        self.connection.execute(
+                            "INSERT INTO attachments (course_id, position, name, mime_type, blob_id) VALUES (?, ?, ?, ?, ?)",
+                            (course_id, position, entry.get('name'), entry.get('mimeType'),
+                             self.put_blob(entry.get('data') or '')))
+            return 'updated' if existing is not None else 'added'
+
+    def _insert_course(self, model, source, source_state, files_source, files_state):
+        course = model.course
+        record = {'program': model.program, 'course': course.to_dict(), 'mappedPLOs': model.mapped_plos,
+                  'extra': model.extra}
+        program_name = (model.program or {}).get('name') if isinstance(model.program, dict) else None
+        cursor = self.connection.execute(
+            "INSERT INTO courses (source, source_size, source_mtime_ns, source_digest, files_source, files_size, "
+            "files_mtime_ns, files_digest, code, name, program, record, ingested_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (source, *source_state, files_source, *files_state, str(course.code or '').strip(),
+             str(course.name or ''), program_name, self._record(record), time.time()))
+        course_id = cursor.lastrowid
+
+        self.connection.executemany(
+            "INSERT INTO units (course_id, position, id, title, record) VALUES (?, ?, ?, ?, ?)",
+            [(course_id, position, unit.id, str(unit.title or ''), self._record(unit.to_dict()))
+             for position, unit in enumerate(model.units)])
+        self.connection.executemany(
+            "INSERT INTO activities (course_id, position, id, unit_id, type, specific_activity, title, "
+            "assigned_team_member, is_assessed, record) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(course_id, position, activity.id, activity.unit_id, activity.type, activity.specific_activity,
+              str(activity.title or ''), activity.assigned_team_member or None, int(bool(activity.is_assessed)),
+              self._record(activity.to_dict()))
+             for position, activity in enumerate(model.activities)])
+        # teamMembers entries are {memberName, role}; activities name their member directly
+        team = course.team_members if isinstance(course.team_members, list) else []
+        names = {member.get('memberName') if isinstance(member, dict) else member for member in team}
+        names.update(activity.assigned_team_member for activity in model.activities)
+        self.connection.executemany(
+            "INSERT INTO team_members (course_id, name) VALUES (?, ?)",
+            [(course_id, name) for name in sorted(str(name) for name in names if name)])
+        self._index_course(course_id, model)
+        return course_id
+
+    def _index_course(self, course_id, model):
+        base = course_id << SEARCH_SHIFT
+        self.connection.executemany(
+            "INSERT INTO search (rowid, course_id, kind, item_id, type, specific_activity, title, body) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(base + n, course_id, *document) for n, document in enumerate(search_documents(model))])
+
+    def reindex_search(self):
+        """Rebuild the full-text index from the stored courses (e.g. for a catalog made before it existed)"""
+        with self.lock:
+            course_ids = [row[0] for row in self.connection.execute("SELECT id FROM courses")]
+            with self.connection:
+                self.connection.execute("DELETE FROM search")
+                for course_id in course_ids:
+                    self._index_course(course_id, self.load_model(course_id))
+
+    def remove(self, course_file):
+        """Drop a course from the catalog; returns True if it was there"""
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT id FROM courses WHERE source = ?", (os.path.abspath(course_file),)).fetchone()
+            if row is None:
+                return False
+            self._delete_course(row[0])
+            return True
+
+    def _delete_course(self, course_id):
+        self.connection.execute("DELETE FROM courses WHERE id = ?", (course_id,))
+        self.connection.execute("DELETE FROM search WHERE rowid BETWEEN ? AND ?",
+                                (course_id << SEARCH_SHIFT, ((course_id + 1) << SEARCH_SHIFT) - 1))
+
+    def collect_garbage(self):
+        """Delete blobs no course refers to any more; returns how many were removed"""
+        referenced = set()
+        with self.lock:
+            for table in ('courses', 'units', 'activities'):
+                for (record,) in self.connection.execute(f"SELECT record FROM {table} WHERE record LIKE '%\"$blob\"%'"):
+                    self._collect_refs(json.loads(record), referenced)
+            for (blob_id,) in self.connection.execute("SELECT blob_id FROM attachments"):
+                referenced.add(blob_id)
+            unreferenced = [(blob_id,) for (blob_id,) in self.connection.execute("SELECT id FROM blobs")
+                            if blob_id not in referenced]
+            with self.connection:
+                self.connection.executemany("DELETE FROM blobs WHERE id = ?", unreferenced)
+        return len(unreferenced)
+
+    def _collect_refs(self, value, referenced):
+        if isinstance(value, dict):
+            if len(value) == 1 and '$blob' in value:
+                referenced.add(value['$blob'])
+            else:
+                for item in value.values():
+                    self._collect_refs(item, referenced)
+        elif isinstance(value, list):
+            for item in value:
+                self._collect_refs(item, referenced)
+
+    # Queries
+
+    def courses(self, code=None, program=None):
+        """(id, code, name, program, source) for every course, optionally filtered"""
+        query = "SELECT id, code, name, program, source FROM courses"
+        clauses, params = [], []
+        if code is not None:
+            clauses.append("code = ?")
+            params.append(code)
+        if program is not None:
+            clauses.append("program = ?")
+            params.append(program)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self.lock:
+            return self.connection.execute(query + " ORDER BY code, id", params).fetchall()
+
+    def find_activities(self, type=None, specific_activity=None, team_member=None, unit_id=None, code=None,
+                        assessed=None):
+        """Activities matching all the given filters, from the indexed columns only (no records or blobs)"""
+        clauses, params = [], []
+        for column, value in (('a.type', type), ('a.specific_activity', specific_activity),
+                              ('a.assigned_team_member', team_member), ('a.unit_id', unit_id), ('c.code', code)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if assessed is not None:
+            clauses.append("a.is_assessed = ?")
+            params.append(int(bool(assessed)))
+        query = ("SELECT c.code, a.id, a.unit_id, a.type, a.specific_activity, a.title, a.assigned_team_member, "
+                 "a.is_assessed FROM activities a JOIN courses c ON c.id = a.course_id")
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self.lock:
+            rows = self.connection.execute(query + " ORDER BY c.code, a.course_id, a.position", params).fetchall()
+        keys = ('code', 'id', 'unit_id', 'type', 'specific_activity', 'title', 'assigned_team_member', 'is_assessed')
+        return [dict(zip(keys, row), is_assessed=bool(row[7])) for row in rows]
+
+    def search(self, query, type=None, specific_activity=None, kind=None, code=None, limit=20, raw=False):
+        """Best BM25 matches for query over course, unit and activity text.
+
+        query is plain words that must all appear (word* matches a prefix),
+        or with raw=True an FTS5 query expression. Each result is a dict
+        with the course code and name, the matching item and a snippet.
+        """
+        expression = query if raw else match_expression(query)
+        if not expression:
+            return []
+        clauses, params = ["search MATCH ?"], [expression]
+        for column, value in (('search.kind', kind), ('search.type', type),
+                              ('search.specific_activity', specific_activity), ('c.code', code)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+        query = (f"SELECT c.code, c.name, search.kind, search.item_id, search.type, search.specific_activity, "
+                 f"search.title, snippet(search, 6, '[', ']', '...', 12), bm25(search, {weights}) AS score "
+                 f"FROM search JOIN courses c ON c.id = search.course_id "
+                 f"WHERE {' AND '.join(clauses)} ORDER BY score LIMIT ?")
+        with self.lock:
+            rows = self.connection.execute(query, params + [limit]).fetchall()
+        keys = ('code', 'course', 'kind', 'id', 'type', 'specific_activity', 'title', 'snippet', 'score')
+        # bm25() is lower for better matches; report it as a positive relevance
+        return [dict(zip(keys, row), score=-row[8]) for row in rows]
+
+    def courses_with_team_member(self, name):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT DISTINCT c.id, c.code, c.name FROM team_members t JOIN courses c ON c.id = t.course_id "
+                "WHERE t.name = ? ORDER BY c.code", (name,)).fetchall()
+
+    def course_id(self, code_or_source):
+        """Resolve a course code or source path to its id"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT id FROM courses WHERE source = ? OR code = ? ORDER BY source = ? DESC, id LIMIT 1",
+                (os.path.abspath(code_or_source), code_or_source, os.path.abspath(code_or_source))).fetchone()
+        if row is None:
+            raise KeyError(f"No course {code_or_source!r} in the catalog")
+        return row[0]
+
+    def load_model(self, course_id):
+        """CourseModel for a stored course; large texts are LazyText read from the catalog on use"""
+        with self.lock:
+            (record,) = self.connection.execute("SELECT record FROM courses WHERE id = ?", (course_id,)).fetchone()
+            unit_records = self.connection.execute(
+                "SELECT record FROM units WHERE course_id = ? ORDER BY position", (course_id,)).fetchall()
+            activity_records = self.connection.execute(
+                "SELECT record FROM activities WHERE course_id = ? ORDER BY position", (course_id,)).fetchall()
+        data = self._internalize(json.loads(record))
+        return CourseModel(
+            program=data['program'],
+            course=Course.from_dict(data['course']),
+            units=[Unit.from_dict(self._internalize(json.loads(r))) for (r,) in unit_records],
+            activities=[Activity.from_dict(self._internalize(json.loads(r))) for (r,) in activity_records],
+            mapped_plos=data['mappedPLOs'],
+            extra=data['extra']
+        )
+
+    def file_entries(self, course_id):
+        """fileData.json-style entries ({name, mimeType, data}) for a course's attachments, data as LazyText"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT name, mime_type, blob_id FROM attachments WHERE course_id = ? ORDER BY position",
+                (course_id,)).fetchall()
+        for name, mime_type, blob_id in rows:
+            yield {'name': name, 'mimeType': mime_type, 'data': self.lazy_text(blob_id)}
+
+    def has_attachments(self, course_id):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT 1 FROM attachments WHERE course_id = ? LIMIT 1", (course_id,)).fetchone() is not None
+
+    def stats(self):
+        with self.lock:
+            counts = {table: self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in ('courses', 'units', 'activities', 'attachments', 'blobs', 'search')}
+            counts['blob_bytes'] = self.connection.execute("SELECT COALESCE(SUM(nbytes), 0) FROM blobs").fetchone()[0]
+        return counts
@@ -0,0 +1,80 @@
+"""Helpers shared by the command-line scripts in misc/.
+
+The scripts are named with hyphens (cc-export-complete.py, cc-import.py...),
+so they are loaded with load_script() rather than imported. Batch modes all
+expand their inputs with collect_input_files() and name their outputs with
+plan_output_files(), so every script picks files and avoids collisions the
+same way.
+"""
+import glob
+import importlib.util
+import os
+import re
+
+MISC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Characters that are unsafe in a file name on some platform
+UNSAFE_NAME_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+def load_script(file_name, module_name):
+    """Load one of the hyphenated CLI scripts as a module"""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(MISC_DIR, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def collect_input_files(patterns=None, manifest_file=None):
+    """Expand glob patterns and manifest entries (one file per line) into a de-duplicated list of input files"""
+    input_files = []
+    for pattern in patterns or []:
+        matches = sorted(glob.glob(pattern, recursive=True))
+        input_files.extend(matches if matches else [pattern])
+
+    if manifest_file:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    input_files.append(line)
+
+    seen = set()
+    unique_files = []
+    for input_file in input_files:
+        key = os.path.abspath(input_file)
+        if key not in seen:
+            seen.add(key)
+            unique_files.append(input_file)
+    return unique_files
+
+def files_for(course_file, files_name):
+    """The attachments file (e.g. fileData.json) that sits next to a course file, if there is one"""
+    if not files_name:
+        return None
+    candidate = os.path.join(os.path.dirname(os.path.abspath(course_file)), files_name)
+    return candidate if os.path.isfile(candidate) else None
+
+def safe_name(name, default='course'):
+    """A file name made from arbitrary text (a course code, say) that stays inside its directory"""
+    name = UNSAFE_NAME_CHARS.sub('_', name or '').strip('. ')
+    return name or default
+
+def plan_output_names(stems, output_dir, extension):
+    """Map each stem to a unique, safe path in the output directory"""
+    used = set()
+    outputs = []
+    for stem in stems:
+        stem = safe_name(stem)
+        name = f"{stem}{extension}"
+        counter = 1
+        # Compared case-insensitively, as some file systems do
+        while name.lower() in used:
+            counter += 1
+            name = f"{stem}_{counter}{extension}"
+        used.add(name.lower())
+        outputs.append(os.path.join(output_dir, name))
+    return outputs
+
+def plan_output_files(input_files, output_dir, extension):
+    """Map each input file to a unique path in the output directory, named after the input"""
+    stems = [os.path.splitext(os.path.basename(input_file))[0] for input_file in input_files]
+    return plan_output_names(stems, output_dir, extension)
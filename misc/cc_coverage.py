@@ -0,0 +1,195 @@
+"""Program learning outcome (PLO) coverage across every course of a program.
+
+Built on a CourseCatalog, three sparse incidence matrices describe a whole
+catalog at once:
+
+    A  activities x CLOs   an activity lists the CLO in learningOutcomes
+    M  CLOs x PLOs         the course maps the CLO to the PLO in mappedPLOs
+    C  courses x activities
+
+so P = A @ M says which PLOs each activity works towards, and products with
+the assessed flags and weightings give, per PLO and per (course, PLO), how
+many assessed activities cover it and how much assessment weight they
+carry. PLOs are numbered per program by their index in
+program.learningOutcomes; each course's maxAssessedLevel for a PLO is the
+level it declares the PLO is assessed at, and is checked against what the
+course's assessed activities actually cover.
+
+Every course carries its own copy of the program, so it declares a level
+for every PLO, including those it has nothing to do with. By default only
+the PLOs a course maps at least one CLO to are held to their declared
+level; all_declarations=True checks every declaration.
+"""
+import numpy as np
+from scipy import sparse
+
+LEVELS = ('foundational', 'developing', 'advanced')
+
+def _incidence(rows, cols, shape, data=None):
+    """Sparse 0/1 (or weighted) matrix from coordinate lists, duplicates summed"""
+    if data is None:
+        data = np.ones(len(rows))
+    return sparse.csr_matrix((data, (rows, cols)), shape=shape)
+
+def _binary(matrix):
+    matrix = matrix.tocsr()
+    matrix.data = (matrix.data != 0).astype(np.float64)
+    matrix.eliminate_zeros()
+    return matrix
+
+class OutcomeCoverage:
+    """Sparse activity -> CLO -> PLO structure for the courses in a catalog"""
+
+    def __init__(self, catalog, target_level='advanced', all_declarations=False):
+        catalog.finalize()
+        self.catalog = catalog
+        self.target_level = target_level
+        self.all_declarations = all_declarations
+        course_program = catalog.course_program_array
+        n_courses = catalog.course_count
+        n_activities = len(catalog.columns['course'])
+
+        # Global PLO numbering: program p's outcomes are plo_offsets[p] onwards
+        plo_counts = np.asarray([len(plos) for plos in catalog.course_plos], dtype=np.int64)
+        program_plos = np.zeros(len(catalog.programs), dtype=np.int64)
+        np.maximum.at(program_plos, course_program, plo_counts)
+        self.plo_offsets = np.concatenate(([0], np.cumsum(program_plos)[:-1])).astype(np.int64)
+        self.plo_program = np.repeat(np.arange(len(catalog.programs)), program_plos)
+        self.plo_index = np.arange(len(self.plo_program)) - self.plo_offsets[self.plo_program]
+        n_plos = len(self.plo_program)
+        n_outcomes = int(catalog.outcome_counts.sum())
+
+        # A: activity -> CLO, keeping only indexes that name one of the course's outcomes
+        links = catalog.links
+        link_course = catalog.columns['course'][links['activity']]
+        valid = (links['outcome'] >= 0) & (links['outcome'] < catalog.outcome_counts[link_course])
+        self.A = _binary(_incidence(links['activity'][valid],
+                                    catalog.outcome_offsets[link_course[valid]] + links['outcome'][valid],
+                                    (n_activities, n_outcomes)))
+
+        # M: CLO -> PLO, as the browser does ignoring PLO indexes the course doesn't define
+        mappings = catalog.mappings
+        valid = ((mappings['outcome'] < catalog.outcome_counts[mappings['course']])
+                 & (mappings['plo'] >= 0) & (mappings['plo'] < plo_counts[mappings['course']]))
+        course = mappings['course'][valid]
+        self.M = _binary(_incidence(catalog.outcome_offsets[course] + mappings['outcome'][valid],
+                                    self.plo_offsets[course_program[course]] + mappings['plo'][valid],
+                                    (n_outcomes, n_plos)))
+
+        # C: course -> activity
+        self.C = _incidence(catalog.columns['course'], np.arange(n_activities), (n_courses, n_activities))
+
+        self.P = _binary(self.A @ self.M)
+        assessed = catalog.columns['assessed'].astype(np.float64)
+        weighting = np.nan_to_num(catalog.columns['weighting']) * assessed
+        self.assessed = assessed
+        self.weighting = weighting
+
+        # Per (course, PLO): assessed activities covering it and their total weight
+        self.course_assessed = (self.C @ sparse.diags(assessed) @ self.P).tocsr()
+        self.course_weight = (self.C @ sparse.diags(weighting) @ self.P).tocsr()
+
+        # Per (course, PLO): declared maxAssessedLevel, stored as 1 + its position in LEVELS
+        level_code = {level: i + 1 for i, level in enumerate(LEVELS)}
+        rows, cols, data = [], [], []
+        for c, plos in enumerate(catalog.course_plos):
+            offset = self.plo_offsets[course_program[c]]
+            for i, (_, level) in enumerate(plos):
+                if level in level_code:
+                    rows.append(c)
+                    cols.append(offset + i)
+                    data.append(level_code[level])
+        self.declared = _incidence(rows, cols, (n_courses, n_plos), np.asarray(data, dtype=np.float64))
+
+        # Per (course, PLO): the course maps at least one of its CLOs to the PLO
+        O = _incidence(np.repeat(np.arange(n_courses), catalog.outcome_counts), np.arange(n_outcomes),
+                       (n_courses, n_outcomes))
+        self.course_mapped = _binary(O @ self.M)
+        if not all_declarations:
+            self.declared = self.declared.multiply(self.course_mapped).tocsr()
+
+    def plo_labels(self):
+        """Text of each global PLO, from the first course that gives it"""
+        labels = [''] * len(self.plo_program)
+        for c, plos in enumerate(self.catalog.course_plos):
+            offset = self.plo_offsets[self.catalog.course_program[c]]
+            for i, (text, _) in enumerate(plos):
+                if text and not labels[offset + i]:
+                    labels[offset + i] = text
+        return labels
+
+    def achieved_levels(self):
+        """Highest declared level among the courses that actually assess each PLO (-1 if none)"""
+        assessed_declared = self.declared.multiply(self.course_assessed > 0)
+        if not assessed_declared.nnz:
+            return np.full(self.declared.shape[1], -1)
+        return np.asarray(assessed_declared.max(axis=0).todense()).ravel().astype(np.int64) - 1
+
+    def plo_table(self):
+        """One row per program learning outcome with its coverage across the program"""
+        catalog = self.catalog
+        mapped = np.asarray(self.P.sum(axis=0)).ravel()
+        assessed = self.P.T @ self.assessed
+        weight = self.P.T @ self.weighting
+        courses_assessing = np.asarray((self.course_assessed > 0).sum(axis=0)).ravel()
+        courses_declaring = np.asarray((self.declared > 0).sum(axis=0)).ravel()
+        achieved = self.achieved_levels()
+        target = LEVELS.index(self.target_level)
+        unassessed_declarations = self.nonconforming()
+        labels = self.plo_labels()
+
+        rows = []
+        for k in range(len(self.plo_program)):
+            status = 'assessed' if assessed[k] else ('unassessed' if mapped[k] else 'unmapped')
+            rows.append({
+                'program': catalog.programs[self.plo_program[k]],
+                'plo_index': int(self.plo_index[k]),
+                'plo': labels[k],
+                'status': status,
+                'mapped_activities': int(mapped[k]),
+                'assessed_activities': int(assessed[k]),
+                'assessed_weight': float(weight[k]),
+                'courses_declaring': int(courses_declaring[k]),
+                'courses_assessing': int(courses_assessing[k]),
+                'achieved_level': LEVELS[achieved[k]] if achieved[k] >= 0 else None,
+                'meets_target_level': bool(achieved[k] >= target),
+                'declared_but_unassessed': [catalog.course_codes[c] for c in unassessed_declarations.get(k, [])],
+            })
+        return rows
+
+    def nonconforming(self):
+        """PLO -> courses that declare a maxAssessedLevel for it but assess no activity mapped to it"""
+        declared = (self.declared > 0).astype(np.int8)
+        assessed = (self.course_assessed > 0).astype(np.int8)
+        missing = (declared - declared.multiply(assessed)).tocoo()
+        result = {}
+        for c, k in zip(missing.row[missing.data > 0], missing.col[missing.data > 0]):
+            result.setdefault(int(k), []).append(int(c))
+        return result
+
+    def course_plo_table(self):
+        """One row per (course, PLO) that is declared or assessed, with its conformance"""
+        catalog = self.catalog
+        declared = self.declared.tocsr()
+        assessed = self.course_assessed
+        weight = self.course_weight
+        pairs = (declared + (assessed > 0)).tocoo()
+        order = np.lexsort((pairs.col, pairs.row))
+        course, plo = pairs.row[order], pairs.col[order]
+        levels = np.asarray(declared[course, plo]).ravel().astype(np.int64)
+        counts = np.asarray(assessed[course, plo]).ravel().astype(np.int64)
+        weights = np.asarray(weight[course, plo]).ravel()
+        labels = self.plo_labels()
+        rows = []
+        for c, k, level, count, total in zip(course.tolist(), plo.tolist(), levels.tolist(), counts.tolist(), weights.tolist()):
+            rows.append({
+                'program': catalog.programs[self.plo_program[k]],
+                'code': catalog.course_codes[c],
+                'plo_index': int(self.plo_index[k]),
+                'plo': labels[k],
+                'declared_level': LEVELS[level - 1] if level else None,
+                'assessed_activities': count,
+                'assessed_weight': total,
+                'conforms': bool(count) == bool(level),
+            })
+        return rows
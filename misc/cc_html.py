@@ -0,0 +1,236 @@
+"""Title/body extraction backends for imported HTML pages.
+
+The importer only needs a page's <title> text and its <body> element, so
+building a full BeautifulSoup tree for every page is wasted work. The fast
+backend pulls both out with a handful of regular-expression scans; pages it
+can't read unambiguously fall back to lxml (when installed) and then to
+BeautifulSoup.
+"""
+import html
+import re
+
+class MalformedHTML(Exception):
+    """The backend could not extract title/body unambiguously"""
+
+_TITLE_OPEN = re.compile(r'<title\b[^>]*>', re.IGNORECASE)
+_TITLE_CLOSE = re.compile(r'</title\s*>', re.IGNORECASE)
+_BODY_OPEN = re.compile(r'<body\b[^>]*>', re.IGNORECASE)
+_BODY_CLOSE = re.compile(r'</body\s*>', re.IGNORECASE)
+_OPAQUE = re.compile(r'<!--|<script\b|<!\[CDATA\[', re.IGNORECASE)
+_TAG = re.compile(r'<[^>]*>')
+
+def _only(pattern, content):
+    """The single match of pattern in content, None if absent, MalformedHTML if repeated"""
+    matches = pattern.finditer(content)
+    first = next(matches, None)
+    if next(matches, None) is not None:
+        raise MalformedHTML(f"Repeated {pattern.pattern!r}")
+    return first
+
+class FastExtractor:
+    """Regex scan for well-formed pages with a single title and body"""
+    name = 'fast'
+
+    def extract(self, content):
+        body_open = _only(_BODY_OPEN, content)
+        body_close = _only(_BODY_CLOSE, content)
+        if body_open is None and body_close is None and not _OPAQUE.search(content):
+            # A fragment with no <body> at all: nothing to import
+            return self.title(content), None
+        if body_open is None or body_close is None or body_close.start() < body_open.end():
+            raise MalformedHTML("No single well-formed <body>")
+        # Comments or scripts outside the body could be hiding tags
+        if _OPAQUE.search(content, 0, body_open.start()) or _OPAQUE.search(content, body_close.end()):
+            raise MalformedHTML("Comment or script outside <body>")
+
+        body = content[body_open.start():body_close.end()]
+        return self.title(content), body
+
+    def title(self, content):
+        title_open = _only(_TITLE_OPEN, content)
+        title_close = _only(_TITLE_CLOSE, content)
+        if (title_open is None) != (title_close is None):
+            raise MalformedHTML("Unbalanced <title>")
+        if title_open is not None:
+            if title_close.start() < title_open.end():
+                raise MalformedHTML("Unbalanced <title>")
+            return html.unescape(_TAG.sub('', content[title_open.end():title_close.start()]))
+        return ''
+
+class LxmlExtractor:
+    """lxml.html parse, used when lxml is installed"""
+    name = 'lxml'
+    package = 'lxml'
+
+    def __init__(self):
+        import lxml.html
+        self.lxml_html = lxml.html
+
+    def extract(self, content):
+        try:
+            document = self.lxml_html.document_fromstring(content)
+        except Exception as e:
+            raise MalformedHTML(str(e))
+        body = document.find('body')
+        if body is None:
+            raise MalformedHTML("No <body>")
+        title = document.findtext('.//title') or ''
+        return title, self.lxml_html.tostring(body, encoding='unicode', method='html')
+
+class BeautifulSoupExtractor:
+    """Full BeautifulSoup parse; tolerant of anything, but slow"""
+    name = 'bs4'
+    package = 'beautifulsoup4'
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self.BeautifulSoup = BeautifulSoup
+
+    def extract(self, content):
+        soup = self.BeautifulSoup(content, 'html.parser')
+        body = soup.find('body')
+        return (soup.title.text if soup.title else ''), (str(body) if body else None)
+
+BACKENDS = {
+    'fast': FastExtractor,
+    'lxml': LxmlExtractor,
+    'bs4': BeautifulSoupExtractor,
+}
+
+class HTMLExtractor:
+    """Tries each backend in turn, reporting which one handled the page.
+
+    backend='auto' uses fast -> lxml (if installed) -> bs4; naming a single
+    backend uses only that one, and raises ImportError straight away if its
+    library isn't installed. In auto mode the fallbacks are only constructed
+    (and bs4/lxml only imported) when a page first needs them. extract()
+    returns (title, body, backend_name); body is None when the page has no
+    <body>.
+    """
+
+    def __init__(self, backend='auto'):
+        self.names = ['fast', 'lxml', 'bs4'] if backend == 'auto' else [backend]
+        self.backends = {}
+        if backend != 'auto':
+            self.backend(backend)
+
+    def backend(self, name):
+        """Return the named backend, or None if its library isn't installed"""
+        if name not in self.backends:
+            try:
+                self.backends[name] = BACKENDS[name]()
+            except ImportError as e:
+                if len(self.names) == 1:
+                    raise ImportError(f"The {name} HTML backend needs the {BACKENDS[name].package} package, "
+                                      f"which is not installed") from e
+                self.backends[name] = None
+        return self.backends[name]
+
+    def extract(self, content):
+        error = MalformedHTML("No HTML extraction backend available")
+        for name in self.names:
+            backend = self.backend(name)
+            if backend is None:
+                continue
+            try:
+                title, body = backend.extract(content)
+                return title, body, name
+            except MalformedHTML as e:
+                error = e
+        raise error
+
+_HIDDEN = re.compile(r'<(script|style)\b.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+_BREAK = re.compile(r'<(?:br|hr|/?(?:p|div|li|ul|ol|h[1-6]|tr|td|th|table|blockquote|pre))\b[^>]*>', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+def html_to_text(content):
+    """Plain text of an HTML fragment: markup dropped, entities decoded and whitespace collapsed"""
+    content = _HIDDEN.sub(' ', str(content))
+    # Block-level tags separate words; inline ones (<b>, <span>...) don't
+    content = _TAG.sub('', _BREAK.sub(' ', content))
+    return _SPACE.sub(' ', html.unescape(content)).strip()
+
+# Normalization of authored (TinyMCE) HTML before it is embedded in exported pages
+_PRESERVE = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+_DIR_AUTO = re.compile(r'''\s+dir\s*=\s*(["']?)auto\1(?=[\s/>])''', re.IGNORECASE)
+_SPAN_TAG = re.compile(r'<span\b([^>]*)>|</span\s*>', re.IGNORECASE)
+_TOGGLE_ICON = re.compile(r'''\bclass\s*=\s*(["'])[^"']*\btoggle-icon\b''', re.IGNORECASE)
+_EMPTY_PARAGRAPH = re.compile(r'<p\b[^>]*>(?:\s|&nbsp;|&#160;|&#xa0;|<br\s*/?>)*</p\s*>', re.IGNORECASE)
+_EMPTY_INLINE = re.compile(r'<(span|strong|em|b|i|u|s|small|sub|sup)>(\s*)</\1\s*>', re.IGNORECASE)
+_BLOCK_TAG = (r'</?(?:p|div|h[1-6]|ul|ol|li|dl|dt|dd|table|thead|tbody|tfoot|tr|td|th|blockquote|hr|br|'
+              r'section|article|header|footer|figure|figcaption)\b[^>]*>')
+_SPACE_AFTER_BLOCK = re.compile(r'(' + _BLOCK_TAG + r')\s+', re.IGNORECASE)
+_SPACE_BEFORE_BLOCK = re.compile(r'\s+(?=' + _BLOCK_TAG + r')', re.IGNORECASE)
+
+def _unwrap_spans(content):
+    """Drop <span> tags that carry nothing (no attributes, or the app's toggle-icon class), keeping their content"""
+    parts = []
+    dropped = []
+    position = 0
+    for match in _SPAN_TAG.finditer(content):
+        if match.group(0)[1] == '/':
+            drop = dropped.pop() if dropped else False
+        else:
+            attributes = match.group(1).strip().rstrip('/').strip()
+            drop = not attributes or bool(_TOGGLE_ICON.search(attributes))
+            dropped.append(drop)
+        parts.append(content[position:match.start()])
+        if not drop:
+            parts.append(match.group(0))
+        position = match.end()
+    parts.append(content[position:])
+    return ''.join(parts)
+
+def _empty_inline(match):
+    # An element holding only whitespace still separates the words around it
+    return ' ' if match.group(2) else ''
+
+def _normalize_segment(content):
+    content = _DIR_AUTO.sub('', content)
+    content = _unwrap_spans(content)
+    # Removing one empty element can leave its parent empty
+    previous = None
+    while previous != content:
+        previous = content
+        content = _EMPTY_INLINE.sub(_empty_inline, _EMPTY_PARAGRAPH.sub('', content))
+    content = _SPACE.sub(' ', content)
+    # Whitespace next to block-level tags is never rendered
+    content = _SPACE_AFTER_BLOCK.sub(r'\1', content)
+    return _SPACE_BEFORE_BLOCK.sub('', content)
+
+def normalize_html(content):
+    """Authored HTML with empty paragraphs, dir="auto", bare or toggle-icon <span>s and extra whitespace removed.
+
+    <pre>, <textarea>, <script> and <style> elements and comments are left as they are.
+    """
+    content = str(content)
+    parts = []
+    position = 0
+    for match in _PRESERVE.finditer(content):
+        parts.append(_normalize_segment(content[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(_normalize_segment(content[position:]))
+    return ''.join(parts).strip()
+
+class HTMLNormalizer:
+    """normalize_html() with results cached by input, since the same descriptions recur across pages"""
+
+    def __init__(self):
+        self.cache = {}
+        self.hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def __call__(self, content):
+        if not content:
+            return content
+        content = str(content)
+        normalized = self.cache.get(content)
+        if normalized is None:
+            normalized = self.cache[content] = normalize_html(content)
+            self.bytes_in += len(content)
+            self.bytes_out += len(normalized)
+        else:
+            self.hits += 1
+        return normalized
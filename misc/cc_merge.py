@@ -0,0 +1,161 @@
+"""Server-side equivalent of the browser's mergeCourseData (script.js).
+
+Merging a source course into a target follows the browser exactly:
+
+    course, program      keys that are blank in the target are copied from
+                         the source (blank meaning falsy in JavaScript: '',
+                         0, false, null; an empty list is not blank)
+    learningOutcomes     course and program outcomes are filled by index
+    units, activities    a source item whose id is already in the target is
+                         assigned over it key by key (Object.assign);
+                         otherwise it is appended
+    mappedPLOs           merged by CLO index as an ordered set union
+
+and, like the browser, the result keeps only those five top-level keys.
+Units and activities are matched through id -> position maps rather than a
+scan of the target per item. A CourseMerger keeps those maps between
+sources, so any number of templates merge into a target in one pass. Inputs
+are never modified.
+"""
+import math
+
+def is_blank(value):
+    """True for the values JavaScript treats as falsy"""
+    if value is None or value is False or value == '':
+        return True
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value == 0 or (isinstance(value, float) and math.isnan(value))
+    return False
+
+def fill_blank_keys(merged, source):
+    """Copy source's keys into merged where merged's value is blank; returns the keys given a value"""
+    filled = []
+    for key, value in source.items():
+        if is_blank(merged.get(key)):
+            # Copied even when blank, as the browser does, but only reported when it adds something
+            if key not in merged or not is_blank(value):
+                filled.append(key)
+            merged[key] = value
+    return filled
+
+def fill_blank_items(merged, source):
+    """Fill blank (or missing) positions of merged from source by index; returns the indexes given a value"""
+    filled = []
+    for index, value in enumerate(source):
+        if index >= len(merged):
+            merged.append(value)
+            filled.append(index)
+        elif is_blank(merged[index]):
+            merged[index] = value
+            if not is_blank(value):
+                filled.append(index)
+    return filled
+
+class CourseMerger:
+    """Merges any number of source courses into one target course"""
+
+    def __init__(self, target):
+        self.course = dict(target.get('course') or {})
+        self.program = dict(target.get('program') or {})
+        self.clos = list(self.course.get('learningOutcomes') or [])
+        self.plos = list(self.program.get('learningOutcomes') or [])
+        self.units = list(target.get('units') or [])
+        self.activities = list(target.get('activities') or [])
+        self.mapped_plos = list(target.get('mappedPLOs') or [])
+        # id -> position of the first unit/activity with that id, as Array.find would pick
+        self.unit_positions = self._positions(self.units)
+        self.activity_positions = self._positions(self.activities)
+        # Items already copied, so they can be updated in place without touching the inputs
+        self.copied_units = set()
+        self.copied_activities = set()
+        self.reports = []
+
+    @staticmethod
+    def _positions(items):
+        positions = {}
+        for position, item in enumerate(items):
+            key = item.get('id') if isinstance(item, dict) else None
+            positions.setdefault(key, position)
+        return positions
+
+    def _merge_items(self, items, positions, copied, source_items):
+        """Object.assign source items onto matching ids, appending the rest; returns (added, updated) ids"""
+        added, updated = [], []
+        for source_item in source_items or []:
+            key = source_item.get('id')
+            position = positions.get(key)
+            if position is None:
+                positions[key] = len(items)
+                copied.add(len(items))
+                items.append(dict(source_item))
+                added.append(key)
+                continue
+            if position not in copied:
+                items[position] = dict(items[position])
+                copied.add(position)
+            items[position].update(source_item)
+            updated.append(key)
+        return added, updated
+
+    def merge(self, source, name=None):
+        """Merge one source course into the target and return a report of what it changed"""
+        source_course = source.get('course') or {}
+        source_program = source.get('program') or {}
+        report = {
+            'source': name,
+            'course_fields': fill_blank_keys(self.course, source_course),
+            'program_fields': fill_blank_keys(self.program, source_program),
+            # The outcome lists are merged separately, as the browser does
+            'course_outcomes': fill_blank_items(self.clos, source_course.get('learningOutcomes') or []),
+            'program_outcomes': fill_blank_items(self.plos, source_program.get('learningOutcomes') or []),
+        }
+        report['course_fields'] = [key for key in report['course_fields'] if key != 'learningOutcomes']
+        report['program_fields'] = [key for key in report['program_fields'] if key != 'learningOutcomes']
+
+        report['units_added'], report['units_updated'] = self._merge_items(
+            self.units, self.unit_positions, self.copied_units, source.get('units'))
+        report['activities_added'], report['activities_updated'] = self._merge_items(
+            self.activities, self.activity_positions, self.copied_activities, source.get('activities'))
+
+        mappings = []
+        for index, source_mapping in enumerate(source.get('mappedPLOs') or []):
+            if index < len(self.mapped_plos) and not is_blank(self.mapped_plos[index]):
+                merged = list(dict.fromkeys([*self.mapped_plos[index], *(source_mapping or [])]))
+                if merged != self.mapped_plos[index]:
+                    mappings.append(index)
+                self.mapped_plos[index] = merged
+            else:
+                if index < len(self.mapped_plos):
+                    self.mapped_plos[index] = source_mapping
+                else:
+                    self.mapped_plos.append(source_mapping)
+                mappings.append(index)
+        report['mappings_changed'] = mappings
+
+        self.reports.append(report)
+        return report
+
+    def result(self):
+        """The merged course, with the same top-level keys as mergeCourseData's result"""
+        course = dict(self.course, learningOutcomes=list(self.clos))
+        program = dict(self.program, learningOutcomes=list(self.plos))
+        return {
+            'course': course,
+            'program': program,
+            'units': list(self.units),
+            'activities': list(self.activities),
+            'mappedPLOs': list(self.mapped_plos),
+        }
+
+def merge_course_data(current, imported):
+    """mergeCourseData(current, imported): one source into one target"""
+    merger = CourseMerger(current)
+    merger.merge(imported)
+    return merger.result()
+
+def merge_courses(target, sources):
+    """Merge (name, course) sources into target in order; returns (merged course, per-source reports)"""
+    merger = CourseMerger(target)
+    for name, source in sources:
+        merger.merge(source, name)
+    return merger.result(), merger.reports
@@ -0,0 +1,262 @@
+"""Compact in-memory course model shared by the Common Cartridge exporter and importer.
+
+Courseomatic JSON is loaded once into slotted Course/Unit/Activity records, and
+the lookups the renderers need (activities by unit, assessed activities,
+outcomes per activity) are indexed at load time rather than rescanned for
+every unit or activity.
+"""
+
+class _Record:
+    """Base class for slotted records that round-trip to Courseomatic JSON.
+
+    FIELDS lists (attribute, JSON key, default, required). Optional fields left
+    as None are omitted from to_dict(); keys the model doesn't know about are
+    kept in `extra` so nothing is lost on a round trip.
+    """
+    __slots__ = ('extra',)
+    FIELDS = ()
+    KEYS = frozenset()
+
+    def __init__(self, **values):
+        for attr, key, default, required in self.FIELDS:
+            if attr in values:
+                setattr(self, attr, values.pop(attr))
+            else:
+                setattr(self, attr, _default(default))
+        self.extra = values.pop('extra', None) or None
+        if values:
+            raise TypeError(f"Unknown {type(self).__name__} fields: {', '.join(values)}")
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a Courseomatic JSON object"""
+        record = cls.__new__(cls)
+        for attr, key, default, required in cls.FIELDS:
+            setattr(record, attr, data[key] if key in data else _default(default))
+        extra = {key: value for key, value in data.items() if key not in cls.KEYS}
+        record.extra = extra or None
+        return record
+
+    def to_dict(self):
+        """Return the record as a Courseomatic JSON object"""
+        data = {}
+        for attr, key, default, required in self.FIELDS:
+            value = getattr(self, attr)
+            if required or value is not None:
+                data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self):
+        return f"{type(self).__name__}(id={getattr(self, 'id', None)!r})"
+
+def _default(default):
+    """Fresh copy of a mutable default"""
+    return list(default) if isinstance(default, list) else default
+
+def _fields(*specs):
+    """Expand (attribute, key, default[, required]) specs, defaulting required to True"""
+    return tuple(spec if len(spec) == 4 else spec + (True,) for spec in specs)
+
+class Course(_Record):
+    FIELDS = _fields(
+        ('name', 'name', ''),
+        ('code', 'code', ''),
+        ('credit_hours', 'creditHours', ''),
+        ('prerequisites', 'prerequisites', ''),
+        ('revision', 'revision', ''),
+        ('delivery_mode', 'deliveryMode', ''),
+        ('goal', 'goal', ''),
+        ('description', 'description', ''),
+        ('course_notes', 'courseNotes', ''),
+        ('course_development_notes', 'courseDevelopmentNotes', ''),
+        ('learning_outcomes', 'learningOutcomes', []),
+        ('course_resources', 'courseResources', ''),
+        ('change_summary', 'changeSummary', ''),
+        ('challengeable_comments', 'challengeableComments', ''),
+        ('evaluation_criteria', 'evaluationCriteria', ''),
+        ('rationale', 'rationale', ''),
+        ('consulted', 'consulted', ''),
+        ('faculty', 'faculty', ''),
+        ('study_area', 'studyArea', ''),
+        ('effective_date', 'effectiveDate', ''),
+        ('author', 'author', ''),
+        ('early_start_flag', 'earlyStartFlag', False),
+        ('stipend', 'stipend', False),
+        ('revision_level', 'revisionLevel', ''),
+        ('delivery_model', 'deliveryModel', ''),
+        ('team_members', 'teamMembers', []),
+    )
+    __slots__ = tuple(attr for attr, key, default, required in FIELDS)
+    KEYS = frozenset(key for attr, key, default, required in FIELDS)
+
+class Unit(_Record):
+    FIELDS = _fields(
+        ('id', 'id', ''),
+        ('title', 'title', ''),
+        ('description', 'description', ''),
+        ('learning_outcomes', 'learningOutcomes', []),
+        ('order', 'order', None, False),
+    )
+    __slots__ = tuple(attr for attr, key, default, required in FIELDS)
+    KEYS = frozenset(key for attr, key, default, required in FIELDS)
+
+class Activity(_Record):
+    FIELDS = _fields(
+        ('id', 'id', ''),
+        ('type', 'type', ''),
+        ('specific_activity', 'specificActivity', ''),
+        ('title', 'title', ''),
+        ('description', 'description', ''),
+        ('dev_notes', 'devNotes', None, False),
+        ('study_hours', 'studyHours', 0),
+        ('unit_id', 'unitId', None),
+        ('is_assessed', 'isAssessed', False),
+        ('other_activity', 'otherActivity', None, False),
+        ('pass_mark', 'passMark', None, False),
+        ('weighting', 'weighting', None, False),
+        ('is_required', 'isRequired', None, False),
+        ('marking_hours', 'markingHours', None, False),
+        ('est_dev_time', 'estDevTime', None, False),
+        ('assigned_team_member', 'assignedTeamMember', None, False),
+        ('learning_outcomes', 'learningOutcomes', []),
+    )
+    __slots__ = tuple(attr for attr, key, default, required in FIELDS)
+    KEYS = frozenset(key for attr, key, default, required in FIELDS)
+
+def _lazy_field(base, attr):
+    """Property over one of base's slots that runs the record's loader first"""
+    slot = base.__dict__[attr]
+
+    def get(self):
+        if getattr(self, '_loader', None) is not None:
+            self.load()
+        return slot.__get__(self, type(self))
+
+    def set(self, value):
+        if getattr(self, '_loader', None) is not None:
+            self.load()
+        slot.__set__(self, value)
+
+    return property(get, set)
+
+def lazy_record(base, fields):
+    """Subclass of a record type whose `fields` are filled in on first access.
+
+    The loader passed to the constructor returns {attribute: value} for
+    whichever of those fields it can provide. It runs at most once, the first
+    time any of them is read or assigned (to_dict() included); until then
+    they hold the values given to the constructor.
+    """
+    slots = {attr: base.__dict__[attr] for attr in fields}
+
+    def __init__(self, loader=None, **values):
+        self._loader = None
+        base.__init__(self, **values)
+        self._loader = loader
+
+    def load(self):
+        loader, self._loader = getattr(self, '_loader', None), None
+        if loader is not None:
+            for attr, value in loader().items():
+                if attr in slots:
+                    slots[attr].__set__(self, value)
+                else:
+                    setattr(self, attr, value)
+
+    namespace = {'__slots__': ('_loader',), '__init__': __init__, 'load': load, 'LAZY_FIELDS': tuple(fields),
+                 'loaded': property(lambda self: getattr(self, '_loader', None) is None)}
+    namespace.update({attr: _lazy_field(base, attr) for attr in fields})
+    return type(f"Lazy{base.__name__}", (base,), namespace)
+
+# Records from a peeked cartridge: bodies (and assessment weights) are read when first used
+LazyUnit = lazy_record(Unit, ('description',))
+LazyActivity = lazy_record(Activity, ('title', 'description', 'weighting'))
+# ...and those whose title the manifest already gives, so reading it loads nothing
+LazyActivityBody = lazy_record(Activity, ('description', 'weighting'))
+
+class CourseModel:
+    """A whole course design plus the indexes the exporter and importer rely on"""
+    __slots__ = ('program', 'course', 'units', 'activities', 'mapped_plos', 'extra',
+                 'unit_index', 'activity_index', 'activities_by_unit', 'assessed_activities')
+
+    def __init__(self, program=None, course=None, units=None, activities=None, mapped_plos=None, extra=None):
+        self.program = program if program is not None else {
+            "name": "",
+            "level": "",
+            "description": "",
+            "learningOutcomes": []
+        }
+        self.course = course if course is not None else Course()
+        self.units = units if units is not None else []
+        self.activities = activities if activities is not None else []
+        self.mapped_plos = mapped_plos if mapped_plos is not None else []
+        self.extra = extra or None
+        self.reindex()
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build the model from a parsed Courseomatic JSON document"""
+        extra = {key: value for key, value in data.items()
+                 if key not in ('program', 'course', 'units', 'activities', 'mappedPLOs')}
+        return cls(
+            program=data.get('program'),
+            course=Course.from_dict(data.get('course', {})),
+            units=[Unit.from_dict(unit) for unit in data.get('units', [])],
+            activities=[Activity.from_dict(activity) for activity in data.get('activities', [])],
+            mapped_plos=data.get('mappedPLOs'),
+            extra=extra
+        )
+
+    def to_dict(self):
+        """Return the model as a Courseomatic JSON document"""
+        data = {
+            "program": self.program,
+            "course": self.course.to_dict(),
+            "units": [unit.to_dict() for unit in self.units],
+            "activities": [activity.to_dict() for activity in self.activities],
+            "mappedPLOs": self.mapped_plos
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def reindex(self):
+        """Rebuild all lookup indexes in one pass over units and activities"""
+        self.unit_index = {unit.id: unit for unit in self.units}
+        self.activity_index = {}
+        self.activities_by_unit = {unit.id: [] for unit in self.units}
+        self.assessed_activities = []
+        for activity in self.activities:
+            self._index_activity(activity)
+
+    def _index_activity(self, activity):
+        self.activity_index[activity.id] = activity
+        self.activities_by_unit.setdefault(activity.unit_id, []).append(activity)
+        if activity.is_assessed:
+            self.assessed_activities.append(activity)
+
+    def add_unit(self, unit):
+        """Append a unit and index it"""
+        self.units.append(unit)
+        self.unit_index[unit.id] = unit
+        self.activities_by_unit.setdefault(unit.id, [])
+        return unit
+
+    def add_activity(self, activity):
+        """Append an activity and index it"""
+        self.activities.append(activity)
+        self._index_activity(activity)
+        return activity
+
+    def unit_activities(self, unit_id):
+        """Activities belonging to a unit, in course order"""
+        return self.activities_by_unit.get(unit_id, [])
+
+    def activity_outcomes(self, activity):
+        """(index, text) pairs for the course learning outcomes an activity addresses, in course order"""
+        outcomes = self.course.learning_outcomes
+        indexes = sorted({i for i in activity.learning_outcomes
+                          if isinstance(i, int) and 0 <= i < len(outcomes)})
+        return [(i, outcomes[i]) for i in indexes]
@@ -0,0 +1,141 @@
+"""Stage and per-object timing for the exporter and importer.
+
+A Profiler records nested spans (a stage such as "manifest", or one object
+such as a single activity page) with their duration, any byte counts the
+caller attaches, and the process's peak RSS when each stage ends. Spans are
+written as Chrome trace-event JSON (load it in chrome://tracing or Perfetto)
+and passed to any registered hooks as they finish.
+
+Code being profiled always goes through a profiler; by default that is
+NULL_PROFILER, whose span() hands back one shared do-nothing context manager,
+so profiling costs next to nothing when it is off.
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 2)
+
+class _Span:
+    """Context manager for one recorded span; args can be filled in while it is open"""
+    __slots__ = ('profiler', 'name', 'category', 'args', 'start')
+
+    def __init__(self, profiler, name, category, args):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.args
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.profiler.record(self.name, self.category, self.start, end, self.args)
+        return False
+
+class _NullSpan:
+    """Shared no-op span used when profiling is off"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class NullProfiler:
+    """Profiler stand-in that records nothing"""
+    enabled = False
+
+    def span(self, name, category='stage', **args):
+        return _NULL_SPAN
+
+    def add_hook(self, hook):
+        raise ValueError("Hooks need a real Profiler")
+
+NULL_PROFILER = NullProfiler()
+
+class Profiler:
+    """Records spans as Chrome trace events and passes each one to the registered hooks"""
+    enabled = True
+
+    def __init__(self, hooks=()):
+        self.events = []
+        self.hooks = list(hooks)
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+
+    def add_hook(self, hook):
+        """Call hook(event) with every span as it finishes"""
+        self.hooks.append(hook)
+
+    def span(self, name, category='stage', **args):
+        """Time the enclosed block; the dict it yields becomes the span's args"""
+        return _Span(self, name, category, args)
+
+    def record(self, name, category, start, end, args):
+        if category == 'stage':
+            args['peak_rss_mb'] = peak_rss_mb()
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((start - self.origin) * 1e6, 1),
+            'dur': round((end - start) * 1e6, 1),
+            'pid': self.pid,
+            'tid': threading.get_ident(),
+            'args': args
+        }
+        with self.lock:
+            self.events.append(event)
+        for hook in self.hooks:
+            hook(event)
+
+    def summary(self):
+        """Totals per (category, name): count, seconds and any byte counts"""
+        totals = {}
+        for event in self.events:
+            total = totals.setdefault((event['cat'], event['name']), {'count': 0, 'seconds': 0.0})
+            total['count'] += 1
+            total['seconds'] += event['dur'] / 1e6
+            for key, value in event['args'].items():
+                if key.endswith('bytes'):
+                    total[key] = total.get(key, 0) + value
+                elif key == 'peak_rss_mb' and value is not None:
+                    total[key] = max(total.get(key, 0), value)
+        return totals
+
+    def to_trace(self):
+        """Chrome trace-event document for the recorded spans"""
+        return {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, trace_file):
+        with open(trace_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_trace(), f)
+
+    def print_summary(self, file=None):
+        """Print per-stage and per-object totals, slowest first"""
+        for (category, name), total in sorted(self.summary().items(), key=lambda item: -item[1]['seconds']):
+            extras = "".join(f"  {key}={value}" for key, value in total.items()
+                             if key not in ('count', 'seconds'))
+            print(f"{category:>8} {name:<24} {total['count']:6}x {total['seconds']:9.4f}s{extras}", file=file)
@@ -0,0 +1,416 @@
+"""Incremental loader for large Courseomatic JSON files.
+
+json.load() needs the whole document (and every string in it) in memory at
+once. The tokenizer here reads the file in chunks and emits ijson-style
+(event, value) pairs; strings longer than a threshold - pasted HTML
+descriptions, or the gzip+base64 `data` of entries in a fileData.json
+repository - are spilled to a temporary file and represented by LazyText,
+which is only read back (in chunks, where possible) when it is used.
+"""
+import base64
+import codecs
+import json
+import os
+import re
+import tempfile
+import threading
+import zlib
+from cc_model import CourseModel, Course, Unit, Activity
+
+CHUNK_SIZE = 64 * 1024
+SPILL_THRESHOLD = 256 * 1024   # strings longer than this (in characters) go to disk
+STREAM_THRESHOLD = 8 * 1024 * 1024   # files smaller than this are simply json.load()ed
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?')
+_HIGH_SURROGATE_END = re.compile(r'\\u[dD][89abAB][0-9a-fA-F]{2}$')
+_LITERALS = (('true', True), ('false', False), ('null', None))
+
+class SpillFile:
+    """Append-only temporary file holding spilled strings as UTF-8"""
+
+    def __init__(self, directory=None):
+        self.file = tempfile.TemporaryFile(dir=directory)
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def begin(self):
+        """Return the offset the next string will start at"""
+        return self.size
+
+    def append(self, text):
+        data = text.encode('utf-8')
+        with self.lock:
+            self.file.seek(self.size)
+            self.file.write(data)
+        self.size += len(data)
+
+    def read(self, offset, length):
+        with self.lock:
+            self.file.seek(offset)
+            return self.file.read(length)
+
+class LazyText:
+    """A string stored in a SpillFile, read back only when it is used.
+
+    Formatting (f-strings) and str() materialise the whole value; iter_chunks()
+    yields it piece by piece so it can be escaped, decoded or copied without
+    ever holding all of it. Other str methods are delegated to the full value.
+    """
+    __slots__ = ('spill', 'offset', 'nbytes', 'length')
+
+    def __init__(self, spill, offset, nbytes, length):
+        self.spill = spill
+        self.offset = offset
+        self.nbytes = nbytes
+        self.length = length
+
+    def iter_chunks(self, chunk_size=CHUNK_SIZE):
+        """Yield the text in chunks of roughly chunk_size bytes"""
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        position = self.offset
+        end = self.offset + self.nbytes
+        while position < end:
+            data = self.spill.read(position, min(chunk_size, end - position))
+            position += len(data)
+            text = decoder.decode(data, final=position >= end)
+            if text:
+                yield text
+
+    def __str__(self):
+        return "".join(self.iter_chunks(1024 * 1024))
+
+    def __format__(self, spec):
+        return format(str(self), spec)
+
+    def __len__(self):
+        return self.length
+
+    def __bool__(self):
+        return self.length > 0
+
+    def __eq__(self, other):
+        if isinstance(other, LazyText):
+            other = str(other)
+        return str(self) == other
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __getattr__(self, name):
+        return getattr(str(self), name)
+
+    def __repr__(self):
+        return f"LazyText({self.length} chars)"
+
+def text_chunks(value, chunk_size=CHUNK_SIZE):
+    """Yield a str or LazyText in chunks"""
+    if isinstance(value, LazyText):
+        yield from value.iter_chunks(chunk_size)
+    else:
+        for start in range(0, len(value), chunk_size):
+            yield value[start:start + chunk_size]
+
+class JSONStreamError(ValueError):
+    pass
+
+class _Reader:
+    """Chunked character buffer over a text file"""
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, need=1):
+        """Ensure at least `need` unread characters are buffered (unless at EOF)"""
+        while len(self.buf) - self.pos < need and not self.eof:
+            chunk = self.fp.read(self.chunk_size)
+            if not chunk:
+                self.eof = True
+                break
+            self.buf = self.buf[self.pos:] + chunk
+            self.pos = 0
+        return len(self.buf) - self.pos >= need
+
+    def skip_whitespace(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                return
+
+    def peek(self):
+        self.skip_whitespace()
+        if self.pos >= len(self.buf):
+            return ''
+        return self.buf[self.pos]
+
+class _StringSink:
+    """Collects string pieces, switching to the spill file once they get large"""
+
+    def __init__(self, spill, threshold):
+        self.spill = spill
+        self.threshold = threshold
+        self.pieces = []
+        self.length = 0
+        self.offset = None
+
+    def add(self, text):
+        if not text:
+            return
+        self.length += len(text)
+        if self.offset is not None:
+            self.spill.append(text)
+            return
+        self.pieces.append(text)
+        if self.spill is not None and self.length > self.threshold:
+            self.offset = self.spill.begin()
+            self.spill.append("".join(self.pieces))
+            self.pieces = None
+
+    def value(self):
+        if self.offset is None:
+            return "".join(self.pieces)
+        return LazyText(self.spill, self.offset, self.spill.size - self.offset, self.length)
+
+def _decode_segment(raw):
+    """Decode a run of JSON string content containing only complete escapes"""
+    if '\\' not in raw:
+        return raw
+    return json.loads('"' + raw + '"')
+
+def _is_escaped(buf, index, start):
+    """True if the character at index is preceded by an odd number of backslashes"""
+    count = 0
+    while index - count - 1 >= start and buf[index - count - 1] == '\\':
+        count += 1
+    return count % 2 == 1
+
+def _safe_cut(buf, start):
+    """Last position in buf that doesn't split an escape sequence (or a surrogate pair)"""
+    cut = len(buf)
+    backslash = buf.rfind('\\', max(start, cut - 12), cut)
+    if backslash == -1:
+        return cut
+    cut = backslash
+    if _HIGH_SURROGATE_END.search(buf, max(start, cut - 6), cut):
+        cut -= 6
+    while cut > start and buf[cut - 1] == '\\':
+        cut -= 1
+    return cut
+
+def _read_string(reader, sink):
+    """Read a JSON string body (opening quote already consumed) into sink.
+
+    Content is decoded a buffer at a time, so long strings cost a few C-level
+    finds and decodes per chunk rather than Python work per character.
+    """
+    while True:
+        buf = reader.buf
+        end = buf.find('"', reader.pos)
+        while end != -1 and _is_escaped(buf, end, reader.pos):
+            end = buf.find('"', end + 1)
+        if end != -1:
+            sink.add(_decode_segment(buf[reader.pos:end]))
+            reader.pos = end + 1
+            return sink.value()
+        cut = _safe_cut(buf, reader.pos)
+        sink.add(_decode_segment(buf[reader.pos:cut]))
+        reader.pos = cut
+        if not reader.fill(len(buf) - cut + 1):
+            raise JSONStreamError("Unterminated string")
+
+def iter_events(fp, spill=None, spill_threshold=SPILL_THRESHOLD, chunk_size=CHUNK_SIZE):
+    """Yield (event, value) pairs for a JSON document read incrementally from fp.
+
+    Events are start_map, map_key, end_map, start_array, end_array, string,
+    number, boolean and null. With a SpillFile, string values longer than
+    spill_threshold are yielded as LazyText.
+    """
+    reader = _Reader(fp, chunk_size)
+    stack = []          # 'map' or 'array' per open container
+    expect_key = False
+    while True:
+        char = reader.peek()
+        if not char:
+            if stack:
+                raise JSONStreamError("Unexpected end of document")
+            return
+        if char in ',:':
+            reader.pos += 1
+            expect_key = char == ',' and stack[-1] == 'map'
+            continue
+        if char == '{':
+            reader.pos += 1
+            stack.append('map')
+            expect_key = True
+            yield 'start_map', None
+        elif char == '}':
+            reader.pos += 1
+            stack.pop()
+            expect_key = False
+            yield 'end_map', None
+        elif char == '[':
+            reader.pos += 1
+            stack.append('array')
+            expect_key = False
+            yield 'start_array', None
+        elif char == ']':
+            reader.pos += 1
+            stack.pop()
+            yield 'end_array', None
+        elif char == '"':
+            reader.pos += 1
+            if expect_key:
+                expect_key = False
+                yield 'map_key', _read_string(reader, _StringSink(None, 0))
+            else:
+                yield 'string', _read_string(reader, _StringSink(spill, spill_threshold))
+        else:
+            reader.fill(32)
+            for literal, value in _LITERALS:
+                if reader.buf.startswith(literal, reader.pos):
+                    reader.pos += len(literal)
+                    yield ('null' if value is None else 'boolean'), value
+                    break
+            else:
+                match = _NUMBER.match(reader.buf, reader.pos)
+                while match and match.end() == len(reader.buf) and not reader.eof:
+                    # The number may continue into the next chunk
+                    reader.fill(len(reader.buf) - reader.pos + 1)
+                    match = _NUMBER.match(reader.buf, reader.pos)
+                if match is None:
+                    raise JSONStreamError(f"Unexpected character {char!r}")
+                reader.pos = match.end()
+                text = match.group()
+                yield 'number', float(text) if match.group(1) or match.group(2) else int(text)
+        if not stack:
+            if reader.peek():
+                raise JSONStreamError("Extra data after document")
+            return
+
+def build_value(events, event, value):
+    """Assemble the complete value that starts with (event, value) from the event stream"""
+    if event == 'start_map':
+        result = {}
+        for event, value in events:
+            if event == 'end_map':
+                return result
+            key = value
+            result[key] = build_value(events, *next(events))
+        raise JSONStreamError("Unexpected end of document")
+    if event == 'start_array':
+        result = []
+        for event, value in events:
+            if event == 'end_array':
+                return result
+            result.append(build_value(events, event, value))
+        raise JSONStreamError("Unexpected end of document")
+    return value
+
+def iter_array(events):
+    """Yield each complete element of the array whose start_array is next in the stream"""
+    event, value = next(events)
+    if event == 'null':
+        return
+    if event != 'start_array':
+        raise JSONStreamError(f"Expected an array, found {event}")
+    for event, value in events:
+        if event == 'end_array':
+            return
+        yield build_value(events, event, value)
+
+def stream_course_model(fp, spill=None, spill_threshold=SPILL_THRESHOLD):
+    """Build a CourseModel from a Courseomatic JSON stream one unit/activity at a time"""
+    events = iter_events(fp, spill, spill_threshold)
+    event, value = next(events)
+    if event != 'start_map':
+        raise JSONStreamError("Course file must contain a JSON object")
+
+    model = CourseModel()
+    extra = {}
+    for event, key in events:
+        if event == 'end_map':
+            break
+        if key == 'units':
+            for unit in iter_array(events):
+                model.add_unit(Unit.from_dict(unit))
+        elif key == 'activities':
+            for activity in iter_array(events):
+                model.add_activity(Activity.from_dict(activity))
+        else:
+            value = build_value(events, *next(events))
+            if key == 'course':
+                model.course = Course.from_dict(value)
+            elif key == 'program':
+                model.program = value
+            elif key == 'mappedPLOs':
+                model.mapped_plos = value
+            else:
+                extra[key] = value
+    model.extra = extra or None
+    return model
+
+def load_course_model(path, spill_dir=None, spill_threshold=SPILL_THRESHOLD, stream_threshold=STREAM_THRESHOLD):
+    """Load a course file, streaming it (with large strings spilled to disk) when it is big"""
+    if os.path.getsize(path) <= stream_threshold:
+        with open(path, 'r', encoding='utf-8') as f:
+            return CourseModel.from_dict(json.load(f))
+    spill = SpillFile(spill_dir)
+    with open(path, 'r', encoding='utf-8') as f:
+        return stream_course_model(f, spill, spill_threshold)
+
+def iter_repository_files(path, spill_dir=None, spill_threshold=SPILL_THRESHOLD):
+    """Yield the entries of a fileData.json repository ({name, data, mimeType}) one at a time.
+
+    Each entry's base64 `data` is a LazyText once it is larger than spill_threshold.
+    """
+    spill = SpillFile(spill_dir)
+    with open(path, 'r', encoding='utf-8') as f:
+        events = iter_events(f, spill, spill_threshold)
+        event, value = next(events)
+        if event != 'start_map':
+            raise JSONStreamError("File repository must contain a JSON object")
+        for event, key in events:
+            if event == 'end_map':
+                return
+            if key != 'course':
+                build_value(events, *next(events))
+                continue
+            event, value = next(events)
+            if event != 'start_map':
+                raise JSONStreamError("Expected an object for 'course'")
+            for event, course_key in events:
+                if event == 'end_map':
+                    break
+                if course_key == 'files':
+                    yield from iter_array(events)
+                else:
+                    build_value(events, *next(events))
+
+def iter_decoded_file(data, chunk_size=CHUNK_SIZE):
+    """Yield the binary content of a repository entry's gzip+base64 `data` in chunks.
+
+    Mirrors decodeAndDecompress() in script.js without ever holding the whole
+    decoded file: base64 is decoded in 4-character-aligned pieces and fed
+    straight into a streaming gzip decompressor.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    pending = ''
+    for chunk in text_chunks(data, chunk_size):
+        pending += chunk
+        usable = len(pending) - len(pending) % 4
+        if usable:
+            output = decompressor.decompress(base64.b64decode(pending[:usable]))
+            pending = pending[usable:]
+            if output:
+                yield output
+    if pending:
+        raise ValueError("Truncated base64 data")
+    output = decompressor.flush()
+    if output:
+        yield output
+    if not decompressor.eof:
+        raise ValueError("Truncated gzip data")
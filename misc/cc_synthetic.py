@@ -0,0 +1,142 @@
+"""Reproducible synthetic Courseomatic courses for benchmarks.
+
+generate_course() produces a course document shaped like tutorial.json
+(program, course, units, activities, mappedPLOs), scaled by the number of
+units, activities, learning outcomes and assessments and by the size of the
+HTML descriptions. generate_file_repository() produces a matching
+fileData.json repository, encoded the way compressAndEncode() in script.js
+does it (gzip, then base64).
+"""
+import base64
+import gzip
+import random
+
+ACTIVITY_TYPES = {
+    'acquisition': ['reading', 'watching', 'listening'],
+    'practice': ['exercise', 'quiz', 'simulation'],
+    'investigation': ['research', 'analysis'],
+    'reflection': ['journal', 'assignment'],
+    'production': ['essay', 'project', 'presentation'],
+    'discussion': ['forum', 'debate'],
+    'cooperation': ['peer review'],
+    'collaboration': ['group project'],
+}
+
+# The levels the app offers for maxAssessedLevel (script.js)
+LEVELS = ('foundational', 'developing', 'advanced')
+
+WORDS = ("course design learning outcome activity unit students reflect practice "
+         "discuss produce investigate evidence feedback assessment reading write "
+         "analyse compare evaluate construct explain").split()
+
+def _html(rng, size):
+    """Roughly `size` characters of TinyMCE-style HTML"""
+    paragraphs = []
+    length = 0
+    while length < size:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize()
+        paragraph = f'<p dir="auto">{sentence}.</p>'
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 1
+    return "\n".join(paragraphs)
+
+def generate_course(units=10, activities_per_unit=10, learning_outcomes=6, program_outcomes=4,
+                    assessed_fraction=0.2, description_size=500, seed=0):
+    """Return a synthetic course document (a dict ready for json.dump)"""
+    rng = random.Random(seed)
+    course_outcomes = [f"Learning outcome {i + 1}: {' '.join(rng.choice(WORDS) for _ in range(6))}"
+                       for i in range(learning_outcomes)]
+    course_data = {
+        "program": {
+            "name": "Synthetic program",
+            "level": "undergraduate",
+            "description": "",
+            "learningOutcomes": [
+                {"plo": f"Program outcome {i + 1}", "maxAssessedLevel": rng.choice(LEVELS)}
+                for i in range(program_outcomes)
+            ]
+        },
+        "course": {
+            "name": f"Synthetic course {seed}",
+            "code": f"SYN {100 + seed}",
+            "creditHours": "3",
+            "prerequisites": "none",
+            "revision": "1",
+            "deliveryMode": "Self paced",
+            "goal": _html(rng, 200),
+            "description": _html(rng, description_size),
+            "courseNotes": "",
+            "changeSummary": "",
+            "challengeableComments": "",
+            "evaluationCriteria": "",
+            "courseResources": _html(rng, 200),
+            "courseDevelopmentNotes": "",
+            "rationale": "",
+            "consulted": "",
+            "faculty": "FST",
+            "studyArea": "synthetic",
+            "effectiveDate": "2025-01-01",
+            "author": "benchmark",
+            "earlyStartFlag": False,
+            "stipend": False,
+            "revisionLevel": "Major",
+            "deliveryModel": "tutor",
+            "teamMembers": [],
+            "learningOutcomes": course_outcomes
+        },
+        "units": [],
+        "activities": [],
+        "mappedPLOs": [sorted(rng.sample(range(program_outcomes), rng.randint(0, min(2, program_outcomes))))
+                       for _ in range(learning_outcomes)]
+    }
+
+    for u in range(units):
+        unit_id = f"unit{seed}x{u}"
+        course_data["units"].append({
+            "id": unit_id,
+            "title": f"Unit {u + 1}",
+            "description": _html(rng, description_size),
+            "learningOutcomes": [],
+            "order": u
+        })
+        for a in range(activities_per_unit):
+            activity_type = rng.choice(sorted(ACTIVITY_TYPES))
+            is_assessed = rng.random() < assessed_fraction
+            outcomes = sorted(rng.sample(range(learning_outcomes), rng.randint(0, min(3, learning_outcomes))))
+            course_data["activities"].append({
+                "id": f"act{seed}x{u}x{a}",
+                "type": activity_type,
+                "specificActivity": rng.choice(ACTIVITY_TYPES[activity_type]),
+                "title": f"Activity {u + 1}.{a + 1}",
+                "description": _html(rng, description_size),
+                "devNotes": "",
+                "studyHours": rng.choice([30, 60, 90, 120]),
+                "unitId": unit_id,
+                "isAssessed": is_assessed,
+                "otherActivity": "",
+                "learningOutcomes": outcomes,
+                "markingHours": rng.choice([15, 30, 60]) if is_assessed else 0,
+                "estDevTime": rng.choice([60, 120, 240]),
+                "assignedTeamMember": "",
+                "isRequired": is_assessed,
+                **({"passMark": 50, "weighting": rng.choice([5, 10, 20])} if is_assessed else {})
+            })
+    return course_data
+
+def generate_file_repository(files=0, file_size=100_000, compressible=True, seed=0):
+    """Return a synthetic fileData.json repository with `files` attachments"""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(files):
+        if compressible:
+            data = _html(rng, file_size).encode('utf-8')[:file_size]
+            name, mime_type = f"handout{i + 1}.html", "text/html"
+        else:
+            data = rng.randbytes(file_size)
+            name, mime_type = f"image{i + 1}.png", "image/png"
+        entries.append({
+            "name": name,
+            "data": base64.b64encode(gzip.compress(data)).decode('ascii'),
+            "mimeType": mime_type
+        })
+    return {"course": {"files": entries}}
@@ -0,0 +1,144 @@
+"""Precompiled page templates and the shared stylesheet for exported HTML.
+
+Templates are split once, at import time, into literal text and field names,
+so rendering a page is a single join. The CSS every page used to inline is
+written once to the cartridge as STYLESHEET_PATH and linked from each page.
+"""
+import re
+
+STYLESHEET_PATH = "styles/courseomatic.css"
+STYLESHEET_IDENTIFIER = "courseomatic_styles"
+
+STYLESHEET = """body { font-family: Arial, sans-serif; margin: 2em; }
+h1 { color: #333; }
+h2 { color: #666; }
+.section { margin: 2em 0; }
+.unit-description { margin: 1em 0; padding: 1em; background: #f8f8f8; }
+.activity { margin: 2em 0; padding: 1em; border: 1px solid #ddd; }
+.activity h2 { margin-bottom: 0.5em; }
+.activity-type { color: #666; margin-bottom: 1em; }
+.activity .activity-type { margin: 0.5em 0; }
+.activity-description { margin: 1em 0; }
+.activity-details { margin: 1em 0; padding: 1em; background: #f5f5f5; }
+"""
+
+# The stylesheet without indentation or optional spaces, for minified exports
+MINIFIED_STYLESHEET = re.sub(r'\s*([{};:,])\s*', r'\1', STYLESHEET).replace(';}', '}')
+
+class Template:
+    """Text with {{field}} placeholders, compiled into alternating literals and field names"""
+    _FIELD = re.compile(r'\{\{(\w+)\}\}')
+
+    def __init__(self, source):
+        pieces = self._FIELD.split(source)
+        self.literals = pieces[0::2]
+        self.fields = pieces[1::2]
+
+    def render(self, **values):
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            value = values[field]
+            parts.append(value if isinstance(value, str) else format(value))
+            parts.append(literal)
+        return "".join(parts)
+
+XHTML_HEAD = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+    <title>{{title}}</title>
+    <meta http-equiv="Content-Type" content="text/html; charset=UTF-8"/>
+    <link rel="stylesheet" type="text/css" href="{{stylesheet}}"/>
+</head>
+"""
+
+ACTIVITY_PAGE = Template(XHTML_HEAD + """<body>
+    <h1>{{title}}</h1>
+    <div class="activity-type">Type: {{type}} - {{specific_activity}}</div>
+    <div class="activity-description">
+        {{description}}
+    </div>
+    <div class="activity-details">
+        <p><strong>Study Hours:</strong> {{study_hours}}</p>
+        {{dev_notes}}
+        {{outcomes}}
+    </div>
+    {{assessment_details}}
+</body>
+</html>""")
+
+DEV_NOTES = Template("""<div class='dev-notes'><strong>Development Notes:</strong> {{dev_notes}}</div>""")
+
+ASSESSMENT_DETAILS = Template("""
+    <div class="assessment-details">
+        <h2>Assessment Information</h2>
+        <p>Pass Mark: {{pass_mark}}%</p>
+        <p>Weight: {{weighting}}%</p>
+        <p>Required: {{required}}</p>
+        <p>Marking Hours: {{marking_hours}}</p>
+    </div>""")
+
+UNIT_ACTIVITY = Template("""<div class="activity">
+                <h2>{{title}}</h2>
+                <div class="activity-type">Type: {{type}} - {{specific_activity}}</div>
+                <div class="activity-description">{{description}}</div>
+                {{outcomes}}
+            </div>""")
+
+UNIT_PAGE = Template(XHTML_HEAD + """<body>
+    <h1>{{title}}</h1>
+    <div class="unit-description">
+        {{description}}
+    </div>
+    <div class="unit-activities">
+        {{activities}}
+    </div>
+</body>
+</html>""")
+
+COURSE_INFO_PAGE = Template("""<!DOCTYPE html>
+<html>
+<head>
+    <title>{{name}}</title>
+    <meta charset="UTF-8">
+    <link rel="stylesheet" type="text/css" href="{{stylesheet}}">
+</head>
+<body>
+    <h1>{{name}} ({{code}})</h1>
+
+    <div class="section">
+        <h2>Course Goal</h2>
+        {{goal}}
+    </div>
+
+    <div class="section">
+        <h2>Description</h2>
+        {{description}}
+    </div>
+
+    <div class="section">
+        <h2>Course Notes</h2>
+        {{course_notes}}
+    </div>
+
+    <div class="section">
+        <h2>Prerequisites</h2>
+        <p>{{prerequisites}}</p>
+    </div>
+
+    <div class="section">
+        <h2>Learning Outcomes</h2>
+        <ul>
+            {{outcomes}}
+        </ul>
+    </div>
+
+    <div class="section">
+        <h2>Course Resources</h2>
+        {{course_resources}}
+    </div>
+</body>
+</html>""")
+
+OUTCOME_PARAGRAPH = Template("""<p><strong>Learning Outcome {{number}}:</strong> {{text}}</p>""")
+OUTCOME_ITEM = Template("""<li>{{text}}</li>""")
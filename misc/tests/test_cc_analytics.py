@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_analytics import CourseCatalog, minutes_to_time, time_to_minutes
+from cc_synthetic import generate_course
+
+def test_time_values_are_read_like_the_browser():
+    assert time_to_minutes(90) == 90
+    assert time_to_minutes('01:30') == 90
+    assert time_to_minutes('45 minutes') == 45
+    assert time_to_minutes(':15') == 15
+    assert time_to_minutes(-5) == 0
+    assert time_to_minutes('soon') == 0
+    assert time_to_minutes(None) == 0 and time_to_minutes(True) == 0
+    assert minutes_to_time(90) == '01:30'
+
+def expected_row(course_data):
+    """The browser's per-course totals, computed one activity at a time"""
+    activities = course_data['activities']
+    study = sum(time_to_minutes(a.get('studyHours')) for a in activities)
+    by_type = {}
+    for a in activities:
+        by_type[a['type']] = by_type.get(a['type'], 0) + time_to_minutes(a.get('studyHours'))
+    outcomes = course_data['course']['learningOutcomes']
+    assessed = {i for a in activities if a.get('isAssessed') for i in a['learningOutcomes']}
+    return {
+        'activities': len(activities),
+        'assessed_activities': sum(1 for a in activities if a.get('isAssessed')),
+        'study_minutes': study,
+        'marking_minutes': sum(time_to_minutes(a.get('markingHours')) for a in activities if a.get('isAssessed')),
+        'dev_minutes': sum(time_to_minutes(a.get('estDevTime')) for a in activities),
+        'assessment_weighting': sum(a.get('weighting', 0) for a in activities if a.get('isAssessed')),
+        'activity_type_proportions': {t: pytest.approx(m / study) for t, m in by_type.items()},
+        'unassessed_learning_outcomes': [o for i, o in enumerate(outcomes) if i not in assessed],
+    }
+
+def test_catalog_totals_match_a_per_course_loop():
+    courses = [generate_course(units=3, activities_per_unit=5, seed=seed, assessed_fraction=0.3) for seed in range(4)]
+    courses[1]['program']['name'] = 'Other program'
+    # Out-of-range outcome indexes are ignored, as in the browser
+    courses[2]['activities'][0]['learningOutcomes'].append(99)
+
+    catalog = CourseCatalog()
+    for course in courses:
+        catalog.add_course(course)
+    rows = catalog.course_table()
+
+    for row, course in zip(rows, courses):
+        expected = expected_row(course)
+        assert {key: row[key] for key in expected} == expected
+
+    programs = {row['program']: row for row in catalog.program_table()}
+    assert programs['Other program']['courses'] == 1
+    assert programs['Synthetic program']['courses'] == 3
+    assert programs['Synthetic program']['study_minutes'] == sum(rows[i]['study_minutes'] for i in (0, 2, 3))
+
+    units = catalog.unit_table()
+    assert len(units) == 12
+    assert sum(unit['study_minutes'] for unit in units) == sum(row['study_minutes'] for row in rows)
@@ -0,0 +1,50 @@
+import base64
+import gzip
+import json
+import os
+import subprocess
+import sys
+import zlib
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_synthetic import LEVELS, generate_course, generate_file_repository
+
+def test_synthetic_course_is_reproducible_and_sized_as_asked():
+    course = generate_course(units=4, activities_per_unit=5, learning_outcomes=3, program_outcomes=2, seed=7)
+    assert course == generate_course(units=4, activities_per_unit=5, learning_outcomes=3, program_outcomes=2, seed=7)
+    assert course != generate_course(units=4, activities_per_unit=5, learning_outcomes=3, program_outcomes=2, seed=8)
+
+    assert len(course['units']) == 4 and len(course['activities']) == 20
+    unit_ids = {unit['id'] for unit in course['units']}
+    assert all(activity['unitId'] in unit_ids for activity in course['activities'])
+    assert all(0 <= i < 3 for activity in course['activities'] for i in activity['learningOutcomes'])
+    assert len(course['mappedPLOs']) == 3
+    assert all(plo['maxAssessedLevel'] in LEVELS for plo in course['program']['learningOutcomes'])
+
+def test_file_repository_compressibility():
+    def decoded(entry):
+        return gzip.decompress(base64.b64decode(entry['data']))
+
+    text = generate_file_repository(files=2, file_size=20000)['course']['files']
+    binary = generate_file_repository(files=2, file_size=20000, compressible=False)['course']['files']
+    assert [entry['mimeType'] for entry in text] == ['text/html', 'text/html']
+    assert [entry['mimeType'] for entry in binary] == ['image/png', 'image/png']
+    assert all(len(decoded(entry)) == 20000 for entry in text + binary)
+    assert len(zlib.compress(decoded(text[0]))) < 10000
+    assert len(zlib.compress(decoded(binary[0]))) > 19000
+
+def test_benchmark_writes_a_report(tmp_path):
+    report_file = str(tmp_path / 'report.json')
+    subprocess.run([sys.executable, os.path.join(MISC_DIR, 'cc-benchmark.py'), '--units', '2',
+                    '--activities-per-unit', '3', '--files', '1', '--file-size', '2000', '--incompressible-files',
+                    '--scenarios', 'export,import,manifest-xml', '--repeat', '1', '--output', report_file],
+                   check=True, capture_output=True)
+    with open(report_file, encoding='utf-8') as f:
+        report = json.load(f)
+
+    assert report['activities'] == 6
+    assert report['params']['compressible'] is False
+    assert [result['scenario'] for result in report['results']] == ['export', 'import', 'manifest-xml']
+    assert all(result['wall_seconds'] > 0 for result in report['results'])
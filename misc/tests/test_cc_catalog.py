@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_catalog import CatalogStore
+from cc_stream import LazyText
+from cc_synthetic import generate_course, generate_file_repository
+
+def write_json(path, value):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f)
+    return str(path)
+
+def test_catalog_round_trips_courses_and_attachments(tmp_path):
+    # Descriptions over the blob threshold are stored as blobs and read back lazily
+    course = generate_course(units=2, activities_per_unit=3, description_size=6000)
+    course_file = write_json(tmp_path / 'course.json', course)
+    repository = generate_file_repository(files=2, file_size=5000)
+    files_file = write_json(tmp_path / 'fileData.json', repository)
+
+    with CatalogStore(str(tmp_path / 'catalog.db')) as store:
+        assert store.ingest(course_file, files_file) == 'added'
+        course_id = store.course_id('SYN 100')
+        assert store.course_id(course_file) == course_id
+
+        model = store.load_model(course_id)
+        assert isinstance(model.activities[0].description, LazyText)
+        assert model.to_dict() == course
+        entries = list(store.file_entries(course_id))
+        assert [(entry['name'], entry['mimeType'], str(entry['data'])) for entry in entries] == \
+            [(entry['name'], entry['mimeType'], entry['data']) for entry in repository['course']['files']]
+
+def test_ingest_skips_unchanged_files_and_refreshes_changed_ones(tmp_path):
+    course = generate_course(units=1, activities_per_unit=2, description_size=6000)
+    course_file = write_json(tmp_path / 'course.json', course)
+
+    with CatalogStore(str(tmp_path / 'catalog.db')) as store:
+        assert store.ingest(course_file) == 'added'
+        assert store.ingest(course_file) == 'unchanged'
+        # Touched without changing the content
+        os.utime(course_file, ns=(0, os.stat(course_file).st_mtime_ns + 10**9))
+        assert store.ingest(course_file) == 'unchanged'
+
+        course['course']['name'] = 'Renamed course'
+        course['activities'][0]['description'] = '<p>short</p>'
+        write_json(course_file, course)
+        assert store.ingest(course_file) == 'updated'
+        assert store.load_model(store.course_id(course_file)).to_dict() == course
+        # The replaced description's blob is no longer referenced
+        assert store.collect_garbage() >= 1
+        assert store.stats()['courses'] == 1
+
+def test_find_activities_filters_on_indexed_columns(tmp_path):
+    courses = [generate_course(units=2, activities_per_unit=4, assessed_fraction=0.5, seed=seed) for seed in (1, 2)]
+    with CatalogStore(str(tmp_path / 'catalog.db')) as store:
+        for n, course in enumerate(courses):
+            store.ingest(write_json(tmp_path / f'course{n}.json', course))
+
+        activities = [(course['course']['code'], activity) for course in courses for activity in course['activities']]
+        assessed = store.find_activities(assessed=True)
+        assert [row['id'] for row in assessed] == [a['id'] for code, a in activities if a['isAssessed']]
+
+        first = activities[0][1]
+        found = store.find_activities(type=first['type'], code='SYN 101')
+        assert [row['id'] for row in found] == [a['id'] for code, a in activities
+                                                if code == 'SYN 101' and a['type'] == first['type']]
+        assert store.find_activities(unit_id=first['unitId'])[0]['id'] == first['id']
+
+def test_removing_a_course_frees_its_blobs(tmp_path):
+    course_file = write_json(tmp_path / 'course.json', generate_course(units=1, activities_per_unit=2,
+                                                                         description_size=6000))
+    files_file = write_json(tmp_path / 'fileData.json', generate_file_repository(files=1, file_size=5000))
+
+    with CatalogStore(str(tmp_path / 'catalog.db')) as store:
+        store.ingest(course_file, files_file)
+        assert store.stats()['blobs'] > 0
+        assert store.remove(course_file)
+        assert not store.remove(course_file)
+        store.collect_garbage()
+        stats = store.stats()
+        assert (stats['courses'], stats['activities'], stats['attachments'], stats['blobs']) == (0, 0, 0, 0)
+
+def test_search_ranks_title_matches_first_and_applies_filters(tmp_path):
+    course = generate_course(units=1, activities_per_unit=4)
+    activities = course['activities']
+    activities[0].update(title='Reading week', type='acquisition', specificActivity='reading')
+    activities[0]['description'] = '<p>Chapters on photosynthesis and light.</p>'
+    activities[1].update(title='Photosynthesis lab', type='practice', specificActivity='exercise')
+    activities[1]['description'] = '<p>Measure oxygen output.</p>'
+    activities[2]['description'] = '<p>Photosynthetic pigments &amp; chlorophyll (C-3 plants).</p>'
+
+    with CatalogStore(str(tmp_path / 'catalog.db')) as store:
+        store.ingest(write_json(tmp_path / 'course.json', course))
+
+        results = store.search('photosynthesis')
+        assert [result['id'] for result in results] == [activities[1]['id'], activities[0]['id']]
+        assert results[0]['score'] > results[1]['score']
+        assert '[photosynthesis]' in results[1]['snippet']
+
+        # A trailing * matches a prefix; punctuation is not FTS5 syntax
+        assert {result['id'] for result in store.search('photosynth*')} == \
+            {activities[0]['id'], activities[1]['id'], activities[2]['id']}
+        assert [result['id'] for result in store.search('C-3 plants')] == [activities[2]['id']]
+
+        assert store.search('photosynthesis', kind='unit') == []
+        assert [result['id'] for result in store.search('photosynthesis', type='acquisition')] == [activities[0]['id']]
+        assert [result['id'] for result in store.search('photosynthesis', specific_activity='exercise')] == \
+            [activities[1]['id']]
+        assert store.search('photosynthesis', code='no such course') == []
+        assert store.search('photosynthesis', limit=1)[0]['id'] == activities[1]['id']
+        assert store.search('   ') == []
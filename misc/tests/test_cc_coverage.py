@@ -0,0 +1,47 @@
+import os
+import sys
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_analytics import CourseCatalog
+from cc_coverage import OutcomeCoverage
+
+def course(code, levels, mapped_plos, activities):
+    return {
+        'program': {'name': 'Program', 'learningOutcomes': [
+            {'plo': f'PLO {i + 1}', 'maxAssessedLevel': level} for i, level in enumerate(levels)]},
+        'course': {'name': code, 'code': code, 'learningOutcomes': [f'{code} CLO {i + 1}' for i in range(2)]},
+        'units': [{'id': 'u1', 'title': 'Unit'}],
+        'activities': [dict({'unitId': 'u1', 'type': 'practice', 'studyHours': 60}, **a) for a in activities],
+        'mappedPLOs': mapped_plos,
+    }
+
+def coverage(all_declarations=False):
+    catalog = CourseCatalog()
+    # X maps its CLOs to PLO 1 (assessed) and PLO 2 (only practised); Y maps one CLO to PLO 3
+    catalog.add_course(course('X', ['advanced', 'developing', 'foundational'], [[0], [1]], [
+        {'id': 'a1', 'isAssessed': True, 'weighting': 30, 'learningOutcomes': [0]},
+        {'id': 'a2', 'isAssessed': False, 'learningOutcomes': [1]},
+    ]))
+    catalog.add_course(course('Y', ['developing', 'foundational', 'advanced'], [[2], []], [
+        {'id': 'b1', 'isAssessed': True, 'weighting': 50, 'learningOutcomes': [0, 5]},
+    ]))
+    return OutcomeCoverage(catalog, all_declarations=all_declarations)
+
+def test_plo_coverage_across_courses():
+    rows = coverage().plo_table()
+    summary = [(row['plo'], row['status'], row['mapped_activities'], row['assessed_activities'],
+                row['assessed_weight'], row['achieved_level'], row['declared_but_unassessed']) for row in rows]
+    assert summary == [
+        ('PLO 1', 'assessed', 1, 1, 30.0, 'advanced', []),
+        ('PLO 2', 'unassessed', 1, 0, 0.0, None, ['X']),
+        ('PLO 3', 'assessed', 1, 1, 50.0, 'advanced', []),
+    ]
+    # Each course is only held to the levels of the PLOs it maps
+    assert [row['courses_declaring'] for row in rows] == [1, 1, 1]
+
+def test_every_declaration_is_checked_on_request():
+    rows = coverage(all_declarations=True).plo_table()
+    assert [row['courses_declaring'] for row in rows] == [2, 2, 2]
+    assert [row['declared_but_unassessed'] for row in rows] == [['Y'], ['X', 'Y'], ['X']]
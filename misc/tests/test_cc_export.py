@@ -0,0 +1,271 @@
+import base64
+import copy
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import posixpath
+import re
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+
+import pytest
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_cli import load_script
+from cc_html import html_to_text
+from cc_templates import MINIFIED_STYLESHEET, STYLESHEET, STYLESHEET_PATH, Template
+from cc_synthetic import generate_course, generate_file_repository
+
+exporter_module = load_script('cc-export-complete.py', 'cc_export_complete')
+
+def export_bytes(course, files, **options):
+    output = io.BytesIO()
+    exporter_module.CourseomaticExporter(course, file_repository=files, **options).export_to_cc(output)
+    return output.getvalue()
+
+def test_archive_is_identical_whatever_the_number_of_threads(tmp_path):
+    course = generate_course(units=3, activities_per_unit=6)
+    files = str(tmp_path / 'fileData.json')
+    with open(files, 'w', encoding='utf-8') as f:
+        json.dump(generate_file_repository(files=3, file_size=20000), f)
+
+    for level in (None, 0, 1, 9):
+        single = export_bytes(course, files, compress_level=level, compress_jobs=1)
+        threaded = export_bytes(course, files, compress_level=level, compress_jobs=4)
+        assert single == threaded, f"compress_level={level}"
+
+def test_writer_falls_back_to_writestr_without_zipfile_internals(monkeypatch):
+    import cc_zipwriter
+    course = generate_course(units=2, activities_per_unit=4)
+    direct = export_bytes(course, None, compress_level=1, compress_jobs=4)
+    monkeypatch.setattr(cc_zipwriter, 'has_zipfile_internals', lambda archive: False)
+    assert export_bytes(course, None, compress_level=1, compress_jobs=4) == direct
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason='workers must find the exporter loaded by the test')
+def test_batch_export_names_outputs_and_isolates_failures(tmp_path, monkeypatch):
+    # The pickled worker function is looked up by module name
+    monkeypatch.setitem(sys.modules, 'cc_export_complete', exporter_module)
+    input_files = []
+    for name in ('first', 'second'):
+        directory = tmp_path / name
+        directory.mkdir()
+        with open(directory / 'course.json', 'w', encoding='utf-8') as f:
+            json.dump(generate_course(units=1, activities_per_unit=2), f)
+        input_files.append(str(directory / 'course.json'))
+    with open(tmp_path / 'first' / 'fileData.json', 'w', encoding='utf-8') as f:
+        json.dump(generate_file_repository(files=1, file_size=1000), f)
+    broken = tmp_path / 'broken.json'
+    broken.write_text('{"course": ', encoding='utf-8')
+    input_files.append(str(broken))
+
+    output_dir = tmp_path / 'out'
+    records = exporter_module.batch_export(input_files, str(output_dir), jobs=2, files_name='fileData.json')
+
+    assert [record['input_file'] for record in records] == input_files
+    # Same stem, so the second course gets a suffix rather than overwriting the first
+    assert [os.path.basename(record['output_file']) for record in records] == \
+        ['course.imscc', 'course_2.imscc', 'broken.imscc']
+    assert records[0]['error'] is None and records[1]['error'] is None
+    assert records[2]['error']
+    assert sorted(os.listdir(output_dir)) == ['course.imscc', 'course_2.imscc']
+
+    # Only the first course has a fileData.json beside it
+    with zipfile.ZipFile(records[0]['output_file']) as first, zipfile.ZipFile(records[1]['output_file']) as second:
+        assert any(name.startswith('web_resources/') for name in first.namelist())
+        assert not any(name.startswith('web_resources/') for name in second.namelist())
+
+def test_serializer_matches_the_minidom_round_trip():
+    root = ET.Element('manifest', {'identifier': 'M "1"'})
+    item = ET.SubElement(ET.SubElement(root, 'organizations'), 'item', identifier='UNIT_1')
+    ET.SubElement(item, 'title').text = 'Rock & roll <basics>'
+    ET.SubElement(root, 'mattext', texttype='text/html').text = '<p>Caf\u00e9 &amp; <b>bold</b></p>\n  next line'
+    ET.SubElement(root, 'empty')
+
+    def parts(indent):
+        pieces = []
+        exporter_module.serialize_xml(root, pieces.append, indent)
+        return ''.join(pieces)
+
+    pretty, compact = parts('  '), parts(None)
+    legacy = minidom.parseString(ET.tostring(root, 'utf-8')).toprettyxml(indent='  ')
+    canonical = lambda xml: ET.canonicalize(xml.split('?>', 1)[1], strip_text=True)
+    assert canonical(pretty) == canonical(compact) == canonical(legacy)
+    assert '>\n' not in compact
+    # Text is escaped but never re-wrapped
+    assert ET.fromstring(pretty.split('?>', 1)[1]).find('mattext').text == root.find('mattext').text
+
+def repository_entry(name, data, mime_type):
+    return {'name': name, 'data': base64.b64encode(gzip.compress(data)).decode('ascii'), 'mimeType': mime_type}
+
+def test_attachments_are_decoded_into_web_resources():
+    files = [
+        repository_entry('Week 1/notes.txt', b'plain notes\n' * 100, 'text/plain'),
+        repository_entry('photo.png', os.urandom(5000), 'image/png'),
+        repository_entry('notes.txt', b'a different file with the same name', 'text/plain'),
+    ]
+    archive = zipfile.ZipFile(io.BytesIO(export_bytes(generate_course(units=1, activities_per_unit=2), files)))
+
+    expected = {
+        'web_resources/notes.txt': b'plain notes\n' * 100,
+        'web_resources/photo.png': gzip.decompress(base64.b64decode(files[1]['data'])),
+        'web_resources/notes_2.txt': b'a different file with the same name',
+    }
+    for name, content in expected.items():
+        assert archive.read(name) == content
+    # Already-compressed formats are stored rather than deflated again
+    assert archive.getinfo('web_resources/photo.png').compress_type == zipfile.ZIP_STORED
+    assert archive.getinfo('web_resources/notes.txt').compress_type == zipfile.ZIP_DEFLATED
+
+    manifest = ET.fromstring(archive.read('imsmanifest.xml'))
+    hrefs = {resource.get('href') for resource in manifest.iter() if resource.tag.endswith('resource')}
+    assert set(expected) <= hrefs
+
+def test_cached_exports_are_identical_to_uncached_ones(tmp_path):
+    course = generate_course(units=3, activities_per_unit=4)
+    cache_dir = str(tmp_path / 'cache')
+
+    def cached_export(course, **options):
+        exporter = exporter_module.CourseomaticExporter(course, cache_dir=cache_dir, **options)
+        output = io.BytesIO()
+        exporter.export_to_cc(output)
+        return output.getvalue(), exporter.cache.stats()
+
+    for options in ({}, {'dedupe': True, 'normalize_html': True}):
+        uncached = export_bytes(course, None, **options)
+        cold, cold_stats = cached_export(course, **options)
+        warm, warm_stats = cached_export(course, **options)
+        assert cold == warm == uncached, options
+        assert warm_stats['misses'] == 0 and warm_stats['hits'] == cold_stats['misses']
+
+    # Editing one activity re-renders only what depends on it
+    edited = copy.deepcopy(course)
+    edited['activities'][5]['description'] = '<p>Rewritten</p>'
+    data, stats = cached_export(edited)
+    assert data == export_bytes(edited, None)
+    assert 0 < stats['misses'] < 5
+
+def test_template_fills_every_placeholder():
+    template = Template('<h1>{{title}}</h1><p>{{title}} has {{count}} parts</p>')
+    assert template.render(title='Unit', count=3) == '<h1>Unit</h1><p>Unit has 3 parts</p>'
+    with pytest.raises(KeyError):
+        template.render(title='Unit')
+
+def test_every_page_links_the_shared_stylesheet():
+    archive = zipfile.ZipFile(io.BytesIO(export_bytes(generate_course(units=2, activities_per_unit=2), None)))
+    assert archive.read(STYLESHEET_PATH).decode('utf-8') == STYLESHEET
+
+    pages = [name for name in archive.namelist() if name.endswith('.html')]
+    assert pages
+    for page in pages:
+        content = archive.read(page).decode('utf-8')
+        href = re.search(r'<link rel="stylesheet" type="text/css" href="([^"]+)"', content).group(1)
+        assert posixpath.normpath(posixpath.join(posixpath.dirname(page), href)) == STYLESHEET_PATH, page
+        assert '<style' not in content
+
+class Pipe(io.RawIOBase):
+    """Write-only, non-seekable output such as stdout or a socket"""
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+def test_export_streams_to_a_non_seekable_output():
+    course = generate_course(units=2, activities_per_unit=3)
+    files = generate_file_repository(files=2, file_size=20000)['course']['files']
+    pipe = Pipe()
+    exporter_module.CourseomaticExporter(course, file_repository=files).export_to_cc(pipe)
+
+    streamed = zipfile.ZipFile(io.BytesIO(bytes(pipe.data)))
+    seekable = zipfile.ZipFile(io.BytesIO(export_bytes(course, files)))
+    assert streamed.testzip() is None
+    assert streamed.namelist() == seekable.namelist()
+    for name in seekable.namelist():
+        assert streamed.read(name) == seekable.read(name), name
+
+def test_minified_pages_keep_their_text_and_shrink():
+    with open(os.path.join(os.path.dirname(MISC_DIR), 'tutorial.json'), encoding='utf-8') as f:
+        course = json.load(f)
+    plain = zipfile.ZipFile(io.BytesIO(export_bytes(course, None)))
+    minified = zipfile.ZipFile(io.BytesIO(export_bytes(course, None, normalize_html=True)))
+
+    assert plain.namelist() == minified.namelist()
+    pages = [name for name in plain.namelist() if name.endswith('.html')]
+    for page in pages:
+        assert html_to_text(minified.read(page).decode('utf-8')) == html_to_text(plain.read(page).decode('utf-8')), page
+    html_bytes = lambda archive: sum(archive.getinfo(page).file_size for page in pages)
+    assert html_bytes(minified) < html_bytes(plain)
+    assert minified.read(STYLESHEET_PATH).decode('utf-8') == MINIFIED_STYLESHEET
+
+def manifest_files(archive):
+    """Every member the manifest references, by resource href or <file> element"""
+    manifest = ET.fromstring(archive.read('imsmanifest.xml'))
+    return {elem.get('href') for elem in manifest.iter()
+            if elem.tag.rsplit('}', 1)[-1] in ('resource', 'file') and elem.get('href')}
+
+def test_deduplicated_attachments_keep_their_file_names():
+    notes = b'the same handout\n' * 200
+    files = [
+        repository_entry('Week 1/handout.txt', notes, 'text/plain'),
+        repository_entry('Week 2/handout.txt', notes, 'text/plain'),
+        repository_entry('copy of handout.txt', notes, 'text/plain'),
+    ]
+    exporter = exporter_module.CourseomaticExporter(generate_course(units=1, activities_per_unit=1),
+                                                    file_repository=files, dedupe=True)
+    output = io.BytesIO()
+    exporter.export_to_cc(output)
+    archive = zipfile.ZipFile(output)
+
+    attachments = sorted(name for name in archive.namelist() if name.startswith('web_resources/'))
+    # Copies under one name are stored once; a copy under another name keeps that name
+    assert [posixpath.basename(name) for name in attachments] == ['copy_of_handout.txt', 'handout.txt']
+    assert all(archive.read(name) == notes for name in attachments)
+    assert manifest_files(archive) <= set(archive.namelist())
+    assert exporter.dedupe_stats['duplicates'] == 1
+    assert exporter.dedupe_stats['bytes_saved'] == len(notes)
+
+def test_identical_pages_are_stored_once_and_import_the_same():
+    course = generate_course(units=2, activities_per_unit=3)
+    # Cloned activities: same content, new ids
+    for n in range(2):
+        clone = copy.deepcopy(course['activities'][0])
+        clone['id'] = f"clone{n}"
+        course['activities'].append(clone)
+    exporter = exporter_module.CourseomaticExporter(course, dedupe=True)
+    output = io.BytesIO()
+    exporter.export_to_cc(output)
+    deduped = output.getvalue()
+    plain = export_bytes(course, None)
+
+    archive = zipfile.ZipFile(io.BytesIO(deduped))
+    pages = [name for name in archive.namelist() if name.endswith('.html')]
+    assert len(pages) < len([name for name in zipfile.ZipFile(io.BytesIO(plain)).namelist() if name.endswith('.html')])
+    assert len({archive.read(page) for page in pages}) == len(pages)
+    assert manifest_files(archive) <= set(archive.namelist())
+    assert exporter.dedupe_stats['duplicates'] >= 2 and exporter.dedupe_stats['bytes_saved'] > 0
+    assert len(deduped) < len(plain)
+
+    importer_module = load_script('cc-import.py', 'cc_import')
+    imported = []
+    for data in (plain, deduped):
+        with importer_module.CommonCartridgeImporter() as importer:
+            imported.append(importer.import_cartridge(io.BytesIO(data)))
+    assert imported[0] == imported[1]
+
+def test_reference_check_reports_members_that_were_never_written():
+    exporter = exporter_module.CourseomaticExporter(generate_course(units=1, activities_per_unit=1), dedupe=True)
+    exporter.referenced_members = {'activities/missing.html', 'web_resources/there.txt'}
+    exporter.stored_members = {'web_resources/there.txt': 10}
+    with pytest.raises(ValueError, match='activities/missing.html'):
+        exporter.check_references()
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+import cc_html
+from cc_cli import load_script
+from cc_html import FastExtractor, HTMLExtractor, HTMLNormalizer, MalformedHTML, html_to_text, normalize_html
+
+def test_whitespace_only_inline_element_keeps_words_apart():
+    assert normalize_html('<p>word<b> </b>next</p>') == '<p>word next</p>'
+    assert normalize_html('<p>word<em>\n</em><strong> </strong>next</p>') == '<p>word next</p>'
+
+def test_empty_elements_are_removed():
+    assert normalize_html('<p>word<b></b>next</p>') == '<p>wordnext</p>'
+    assert normalize_html('<p><i><b> </b></i></p><p>text</p>') == '<p>text</p>'
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Rock &amp; roll</title><style>body { color: red; }</style></head>
+<body class="page"><h1>Rock &amp; roll</h1><p>First<br>line</p></body></html>"""
+
+def test_fast_extractor_reads_title_and_body():
+    title, body = FastExtractor().extract(PAGE)
+    assert title == 'Rock & roll'
+    assert body == '<body class="page"><h1>Rock &amp; roll</h1><p>First<br>line</p></body>'
+    assert FastExtractor().extract('<p>just a fragment</p>') == ('', None)
+
+def test_ambiguous_pages_fall_back_to_a_full_parser():
+    hidden = PAGE.replace('<style>', '<!-- <body>old</body> --><style>')
+    for content in (hidden, PAGE.replace('</body>', ''), PAGE.replace('</title>', '')):
+        with pytest.raises(MalformedHTML):
+            FastExtractor().extract(content)
+
+    extractor = HTMLExtractor('auto')
+    assert extractor.extract(PAGE)[2] == 'fast'
+    title, body, backend = extractor.extract(hidden)
+    assert backend != 'fast'
+    assert title == 'Rock & roll' and 'First' in body and 'old' not in body
+
+def test_html_to_text_separates_blocks_and_drops_scripts():
+    assert html_to_text('<p>one</p><p>two&nbsp;<b>bo</b>ld</p><script>x()</script><br>three') == \
+        'one two bold three'
+
+class MissingLxml:
+    name = 'lxml'
+    package = 'lxml'
+
+    def __init__(self):
+        raise ImportError("No module named 'lxml'")
+
+def test_missing_backend_library_fails_when_the_importer_is_built(monkeypatch, capsys):
+    monkeypatch.setitem(cc_html.BACKENDS, 'lxml', MissingLxml)
+    assert HTMLExtractor('auto').backend('lxml') is None
+
+    with pytest.raises(ImportError, match='lxml HTML backend needs the lxml package'):
+        HTMLExtractor('lxml')
+
+    importer_module = load_script('cc-import.py', 'cc_import')
+    monkeypatch.setattr(sys, 'argv', ['cc-import.py', '--html-backend', 'lxml', 'in.imscc', 'out.json'])
+    with pytest.raises(SystemExit) as exit:
+        importer_module.main()
+    assert exit.value.code == 2
+    assert 'needs the lxml package' in capsys.readouterr().err
+
+def test_authored_markup_is_normalized_outside_preformatted_text():
+    authored = ('<p dir="auto">Hello&nbsp; <span>world</span></p>\n\n<p>&nbsp;</p>'
+                '<p dir="auto"><span class="toggle-icon"><span class="toggle-icon">Next</span></span></p>'
+                '<pre>  keep\n  this</pre>')
+    assert normalize_html(authored) == '<p>Hello&nbsp; world</p><p>Next</p><pre>  keep\n  this</pre>'
+
+def test_normalizer_reuses_results_for_repeated_inputs():
+    normalizer = HTMLNormalizer()
+    assert normalizer('<p> a </p>') == normalizer('<p> a </p>') == '<p>a</p>'
+    assert normalizer('') == ''
+    assert (normalizer.hits, normalizer.bytes_in, normalizer.bytes_out) == (1, 10, 8)
@@ -0,0 +1,296 @@
+import concurrent.futures
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+import zipfile
+
+import pytest
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_cli import load_script
+from cc_html import html_to_text
+from cc_synthetic import generate_course, generate_file_repository
+
+exporter_module = load_script('cc-export-complete.py', 'cc_export_complete')
+importer_module = load_script('cc-import.py', 'cc_import')
+
+def test_export_then_import_keeps_the_course_structure(monkeypatch):
+    course = generate_course(units=3, activities_per_unit=4)
+    cartridge = io.BytesIO()
+    exporter_module.CourseomaticExporter(course).export_to_cc(cartridge)
+
+    # Members are read from the archive; nothing is extracted
+    def no_extraction(*args, **kwargs):
+        raise AssertionError('cartridge extracted to disk')
+    monkeypatch.setattr(zipfile.ZipFile, 'extract', no_extraction)
+    monkeypatch.setattr(zipfile.ZipFile, 'extractall', no_extraction)
+    with importer_module.CommonCartridgeImporter() as importer:
+        imported = importer.import_cartridge(io.BytesIO(cartridge.getvalue()))
+
+    assert imported['course']['name'] == course['course']['name']
+    assert [unit['title'] for unit in imported['units']] == [unit['title'] for unit in course['units']]
+    assert len(imported['activities']) == len(course['activities'])
+    units = {unit['id']: f"UNIT_{unit['id']}" for unit in course['units']}
+    for original, activity in zip(course['activities'], imported['activities']):
+        assert activity['title'] == original['title']
+        assert activity['unitId'] == units[original['unitId']]
+        assert activity['isAssessed'] == bool(original.get('isAssessed'))
+        if original.get('isAssessed'):
+            assert activity['weighting'] == original['weighting']
+        assert html_to_text(original['description']) in html_to_text(activity['description'])
+
+HANDMADE_MANIFEST = """<?xml version="1.0" encoding="UTF-8"?>
+<manifest identifier="M" xmlns="http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1">
+  <organizations>
+    <organization identifier="ORG" structure="rooted-hierarchy">
+      <item identifier="ROOT">
+        <title>Handmade course</title>
+        <item identifier="UNIT_A"><title>First unit</title>
+          <item identifier="FOLDER"><title>Week 1</title>
+            <item identifier="I1" identifierref="res-page-1"><title>Nested page</title></item>
+          </item>
+        </item>
+        <item identifier="UNIT_B"><title>Second unit</title>
+          <item identifier="I2" identifierref="res-page-2"><title>Direct page</title></item>
+        </item>
+        <item identifier="I3" identifierref="res-page-3"><title>Loose page</title></item>
+      </item>
+    </organization>
+  </organizations>
+  <resources>
+    <resource identifier="res-page-1" type="webcontent" href="pages/one.html"><file href="pages/one.html"/></resource>
+    <resource identifier="res-page-2" type="webcontent" href="pages/two.html"><file href="pages/two.html"/></resource>
+    <resource identifier="res-page-3" type="webcontent" href="pages/three.html"><file href="pages/three.html"/></resource>
+  </resources>
+</manifest>"""
+
+def test_activities_are_placed_in_the_unit_that_encloses_their_item(tmp_path):
+    cartridge = str(tmp_path / 'handmade.imscc')
+    with zipfile.ZipFile(cartridge, 'w') as archive:
+        archive.writestr('imsmanifest.xml', HANDMADE_MANIFEST)
+        for name in ('one', 'two', 'three'):
+            archive.writestr(f'pages/{name}.html', f'<html><head><title>{name}</title></head><body><p>{name}</p></body></html>')
+
+    with importer_module.CommonCartridgeImporter() as importer:
+        imported = importer.import_cartridge(cartridge)
+
+    assert [(unit['id'], unit['title']) for unit in imported['units']] == [('UNIT_A', 'First unit'),
+                                                                           ('UNIT_B', 'Second unit')]
+    placed = {activity['title']: activity['unitId'] for activity in imported['activities']}
+    # Through an intermediate folder, directly, and (outside every unit) the first unit
+    assert placed == {'Nested page': 'UNIT_A', 'Direct page': 'UNIT_B', 'Loose page': 'UNIT_A'}
+
+def test_slow_cartridge_fails_with_timeout(tmp_path, monkeypatch):
+    cartridge = str(tmp_path / 'course.imscc')
+    exporter_module.CourseomaticExporter(generate_course(units=2, activities_per_unit=5)).export_to_cc(cartridge)
+
+    # Every page takes a while, so the time limit runs out inside a per-page handler
+    read_content = importer_module.CommonCartridgeImporter.read_content
+    def slow_read_content(self, member_name):
+        time.sleep(0.05)
+        return read_content(self, member_name)
+    monkeypatch.setattr(importer_module.CommonCartridgeImporter, 'read_content', slow_read_content)
+
+    output_file = str(tmp_path / 'course.json')
+    record = importer_module.import_course(cartridge, output_file, timeout=0.2)
+
+    assert record['error'] == 'ImportTimeout: Import timed out'
+    assert record['activities'] == 0
+    assert not os.path.exists(output_file)
+    assert not os.path.exists(output_file + '.partial')
+
+def test_html_attachments_are_not_imported_as_activities(tmp_path):
+    course = generate_course(units=2, activities_per_unit=3)
+    files = str(tmp_path / 'fileData.json')
+    with open(files, 'w', encoding='utf-8') as f:
+        json.dump(generate_file_repository(files=2, file_size=5000), f)
+    cartridge = str(tmp_path / 'course.imscc')
+    exporter_module.CourseomaticExporter(course, file_repository=files).export_to_cc(cartridge)
+
+    with importer_module.CommonCartridgeImporter() as importer:
+        course_data = importer.import_cartridge(cartridge)
+
+    ids = [activity['id'] for activity in course_data['activities']]
+    assert not any(id.startswith('WEB_RESOURCE') for id in ids)
+    assert 'course_info' not in ids
+    assert len(ids) == 6
+
+def rewrite_members(cartridge, replacements):
+    """Copy a cartridge with some members' content replaced"""
+    with zipfile.ZipFile(cartridge) as source:
+        members = [(info.filename, replacements.get(info.filename, source.read(info))) for info in source.infolist()]
+    with zipfile.ZipFile(cartridge, 'w') as target:
+        for name, content in members:
+            target.writestr(name, content)
+
+def test_peek_gives_the_same_course_as_a_full_import(tmp_path):
+    course = generate_course(units=3, activities_per_unit=5)
+    files = str(tmp_path / 'fileData.json')
+    with open(files, 'w', encoding='utf-8') as f:
+        json.dump(generate_file_repository(files=2, file_size=5000), f)
+    cartridge = str(tmp_path / 'course.imscc')
+    exporter_module.CourseomaticExporter(course, file_repository=files).export_to_cc(cartridge)
+
+    # A page with no body and an assessment that cannot be parsed
+    with zipfile.ZipFile(cartridge) as archive:
+        names = archive.namelist()
+    page = next(name for name in names if name.startswith('activities/') and name.endswith('.html'))
+    assessment = next(name for name in names if name.endswith('/assessment.xml'))
+    rewrite_members(cartridge, {page: b'<html><head><title>Empty</title></head><body></body></html>',
+                                assessment: b'<questestinterop><unclosed>'})
+
+    with importer_module.CommonCartridgeImporter() as importer:
+        imported = importer.import_cartridge(cartridge)
+    with importer_module.CommonCartridgeImporter() as importer:
+        peeked = importer.peek_cartridge(cartridge).to_dict()
+
+    assert peeked == imported
+    assert any(activity['isAssessed'] for activity in imported['activities'])
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason='workers must inherit the patched import_course')
+def test_only_cartridges_in_flight_are_isolated_after_a_worker_dies(tmp_path, monkeypatch):
+    input_files = []
+    for i in range(8):
+        input_file = str(tmp_path / f'course{i}.imscc')
+        exporter_module.CourseomaticExporter(generate_course(units=1, activities_per_unit=2, seed=i)).export_to_cc(input_file)
+        input_files.append(input_file)
+
+    # The pickled worker function is looked up by module name
+    monkeypatch.setitem(sys.modules, 'cc_import', importer_module)
+    import_course = importer_module.import_course
+    def crashing_import_course(input_file, *args):
+        if input_file.endswith('course0.imscc'):
+            os._exit(1)
+        return import_course(input_file, *args)
+    monkeypatch.setattr(importer_module, 'import_course', crashing_import_course)
+
+    pool_sizes = []
+    executor = concurrent.futures.ProcessPoolExecutor
+    def recording_executor(max_workers=None, **kwargs):
+        pool_sizes.append(max_workers)
+        return executor(max_workers=max_workers, **kwargs)
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', recording_executor)
+
+    records = importer_module.batch_import(input_files, str(tmp_path / 'out'), jobs=2)
+
+    assert [record['input_file'] for record in records] == input_files
+    assert records[0]['error'].startswith('Worker process died')
+    assert all(record['error'] is None for record in records[1:])
+    # At most one cartridge per worker was running when the pool broke
+    assert pool_sizes[0] == 2
+    assert pool_sizes.count(1) <= 2
+
+QTI_ASSESSMENT = """<?xml version="1.0" encoding="UTF-8"?>
+<questestinterop xmlns="http://www.imsglobal.org/xsd/ims_qtiasiv1p2">
+  <assessment ident="A1" title="Midterm quiz">
+    <qtimetadata>
+      <qtimetadatafield><fieldlabel>cc_profile</fieldlabel><fieldentry>cc.exam.v0p1</fieldentry></qtimetadatafield>
+      <qtimetadatafield><fieldlabel>qmd_weighting</fieldlabel><fieldentry>25</fieldentry></qtimetadatafield>
+      <qtimetadatafield><fieldlabel>qmd_weighting</fieldlabel><fieldentry>99</fieldentry></qtimetadatafield>
+    </qtimetadata>
+    <rubric><material><mattext texttype="text/html">&lt;p&gt;Covers units 1-3&lt;/p&gt;</mattext></material></rubric>
+    <section ident="S1">{items}</section>
+  </assessment>
+</questestinterop>"""
+
+QTI_ITEM = ('<item ident="Q{n}" title="Question {n}"><presentation><material>'
+            '<mattext>Question {n} text {padding}</mattext></material></presentation></item>')
+
+def test_assessment_is_read_in_one_streaming_pass():
+    document = QTI_ASSESSMENT.format(items=QTI_ITEM.format(n=1, padding=''))
+    assessment = importer_module.CommonCartridgeImporter.extract_assessment(io.BytesIO(document.encode('utf-8')))
+
+    assert assessment['title'] == 'Midterm quiz'
+    assert assessment['description'] == '<p>Covers units 1-3</p>'
+    assert assessment['metadata'] == {'cc_profile': 'cc.exam.v0p1', 'qmd_weighting': '25'}
+    assert importer_module.CommonCartridgeImporter.assessment_weight(assessment['metadata']) == 25.0
+    assert importer_module.CommonCartridgeImporter.assessment_weight({'qmd_weighting': 'heavy'}) == 100
+    assert importer_module.CommonCartridgeImporter.assessment_weight({}) == 100
+
+def test_large_question_banks_are_read_in_bounded_memory():
+    padding = 'x' * 200
+    document = QTI_ASSESSMENT.format(items=''.join(QTI_ITEM.format(n=n, padding=padding) for n in range(20000)))
+    data = document.encode('utf-8')
+
+    tracemalloc.start()
+    try:
+        assessment = importer_module.CommonCartridgeImporter.extract_assessment(io.BytesIO(data))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert assessment['metadata']['qmd_weighting'] == '25'
+    # Read items are dropped, so the tree never holds the whole bank
+    assert peak < len(data) / 4
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason='workers look up cc_import by module name')
+def test_batch_import_writes_each_course_and_a_summary(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'cc_import', importer_module)
+    input_files = []
+    # Two cartridges share a name, and one is not a zip archive at all
+    for n, directory in enumerate(('a', 'b', 'b')):
+        os.makedirs(tmp_path / directory, exist_ok=True)
+        input_file = str(tmp_path / directory / ('course.imscc' if n < 2 else 'other.imscc'))
+        exporter_module.CourseomaticExporter(generate_course(units=2, activities_per_unit=2, seed=n)).export_to_cc(input_file)
+        input_files.append(input_file)
+    corrupt = str(tmp_path / 'corrupt.imscc')
+    with open(corrupt, 'wb') as f:
+        f.write(b'not a zip archive')
+    input_files.insert(1, corrupt)
+
+    output_dir = tmp_path / 'out'
+    records = importer_module.batch_import(input_files, str(output_dir), jobs=2)
+    summary = importer_module.write_batch_summary(records, str(tmp_path / 'summary.json'), 1.0)
+
+    assert [record['input_file'] for record in records] == input_files
+    assert [os.path.basename(record['output_file']) for record in records] == \
+        ['course.json', 'corrupt.json', 'course_2.json', 'other.json']
+    assert records[1]['error'].startswith('BadZipFile')
+    assert not os.path.exists(records[1]['output_file'])
+    for record in records[:1] + records[2:]:
+        assert record['error'] is None
+        with importer_module.CommonCartridgeImporter() as importer:
+            expected = importer.import_cartridge(record['input_file'])
+        with open(record['output_file'], encoding='utf-8') as f:
+            assert json.load(f) == expected
+    assert (summary['total'], summary['succeeded'], summary['failed']) == (4, 3, 1)
+    assert summary['activities'] == 12
+    assert list(summary['errors']) == [corrupt]
+    with open(tmp_path / 'summary.json', encoding='utf-8') as f:
+        assert json.load(f) == summary
+
+def test_survey_reads_only_the_manifest_unless_weights_are_wanted(tmp_path, monkeypatch):
+    course = generate_course(units=2, activities_per_unit=5, assessed_fraction=0.5)
+    cartridge = str(tmp_path / 'course.imscc')
+    exporter_module.CourseomaticExporter(course).export_to_cc(cartridge)
+    with importer_module.CommonCartridgeImporter() as importer:
+        imported = importer.import_cartridge(cartridge)
+
+    opened = []
+    open_member = importer_module.CommonCartridgeImporter.open_member
+    def recording_open_member(self, member_name):
+        opened.append(member_name)
+        return open_member(self, member_name)
+    monkeypatch.setattr(importer_module.CommonCartridgeImporter, 'open_member', recording_open_member)
+
+    survey = importer_module.survey_cartridge(importer_module.CommonCartridgeImporter(), cartridge)
+    assert not any(name.endswith(('.html', 'assessment.xml')) for name in opened)
+    assert survey['course'] == imported['course']['name']
+    assert survey['units'] == [{'title': unit['title'],
+                                'activities': sum(a['unitId'] == unit['id'] for a in imported['activities'])}
+                               for unit in imported['units']]
+    assert survey['activities'] == len(imported['activities'])
+
+    del opened[:]
+    survey = importer_module.survey_cartridge(importer_module.CommonCartridgeImporter(), cartridge, weights=True)
+    assert opened and all(not name.endswith('.html') for name in opened)
+    assert survey['assessments'] and survey['assessments'] == [{'title': a['title'], 'weighting': a['weighting']}
+                                     for a in imported['activities'] if a['isAssessed']]
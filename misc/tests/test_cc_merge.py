@@ -0,0 +1,99 @@
+import copy
+import os
+import sys
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_merge import CourseMerger, is_blank, merge_course_data, merge_courses
+from cc_synthetic import generate_course
+
+def browser_merge(current, imported):
+    """A line-by-line port of mergeCourseData from script.js, nested scans included"""
+    current, imported = copy.deepcopy(current), copy.deepcopy(imported)
+    course = dict(current['course'])
+    for key, value in imported['course'].items():
+        if is_blank(course.get(key)):
+            course[key] = value
+    program = dict(current['program'])
+    for key, value in imported['program'].items():
+        if is_blank(program.get(key)):
+            program[key] = value
+    for merged, source, owner in ((list(current['course']['learningOutcomes']), imported['course']['learningOutcomes'], course),
+                                  (list(current['program']['learningOutcomes']), imported['program']['learningOutcomes'], program)):
+        for index, value in enumerate(source):
+            if index >= len(merged):
+                merged.append(value)
+            elif is_blank(merged[index]):
+                merged[index] = value
+        owner['learningOutcomes'] = merged
+    lists = {}
+    for key in ('units', 'activities'):
+        merged = list(current[key])
+        for item in imported[key]:
+            existing = next((candidate for candidate in merged if candidate['id'] == item['id']), None)
+            if existing is not None:
+                existing.update(item)
+            else:
+                merged.append(item)
+        lists[key] = merged
+    mapped = list(current['mappedPLOs'])
+    for index, mapping in enumerate(imported['mappedPLOs']):
+        if index < len(mapped) and not is_blank(mapped[index]):
+            mapped[index] = list(dict.fromkeys([*mapped[index], *mapping]))
+        elif index < len(mapped):
+            mapped[index] = mapping
+        else:
+            mapped.append(mapping)
+    return {'course': course, 'program': program, 'units': lists['units'], 'activities': lists['activities'],
+            'mappedPLOs': mapped}
+
+def template_for(target, seed):
+    """A source sharing some unit and activity ids with target, with blanks filled and new items"""
+    source = generate_course(units=3, activities_per_unit=3, learning_outcomes=8, seed=seed)
+    source['units'][0]['id'] = target['units'][0]['id']
+    source['activities'][0]['id'] = target['activities'][1]['id']
+    source['course']['courseNotes'] = f'Notes from template {seed}'
+    return source
+
+def test_merge_matches_the_browser_merge():
+    target = generate_course(units=2, activities_per_unit=3, learning_outcomes=4)
+    target['course']['learningOutcomes'][1] = ''
+    target['mappedPLOs'][2] = []
+    source = template_for(target, seed=5)
+    originals = copy.deepcopy((target, source))
+
+    assert merge_course_data(target, source) == browser_merge(target, source)
+    # Neither input is modified
+    assert (target, source) == originals
+
+def test_merging_many_sources_in_one_pass_equals_merging_them_one_by_one():
+    target = generate_course(units=2, activities_per_unit=3, learning_outcomes=4)
+    sources = [(f'template{seed}', template_for(target, seed)) for seed in (5, 6, 7)]
+
+    merged, reports = merge_courses(target, sources)
+
+    expected = target
+    for name, source in sources:
+        expected = browser_merge(expected, source)
+    assert merged == expected
+    assert [report['source'] for report in reports] == ['template5', 'template6', 'template7']
+
+def test_merge_reports_what_each_source_changed():
+    target = generate_course(units=2, activities_per_unit=2, learning_outcomes=4)
+    source = template_for(target, seed=5)
+    merger = CourseMerger(target)
+
+    report = merger.merge(source, 'template')
+    assert report['course_fields'] == ['courseNotes']
+    assert report['course_outcomes'] == [4, 5, 6, 7]
+    assert report['units_updated'] == [target['units'][0]['id']]
+    assert report['units_added'] == [unit['id'] for unit in source['units'][1:]]
+    assert report['activities_updated'] == [target['activities'][1]['id']]
+    assert report['activities_added'] == [activity['id'] for activity in source['activities'][1:]]
+
+    # Merging the same source again only re-applies it over the items it added
+    again = merger.merge(source, 'template')
+    assert (again['course_fields'], again['units_added'], again['activities_added']) == ([], [], [])
+    assert again['units_updated'] == [unit['id'] for unit in source['units']]
+    assert merger.result() == browser_merge(browser_merge(target, source), source)
@@ -0,0 +1,53 @@
+import copy
+import os
+import sys
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_model import Activity, CourseModel, LazyActivityBody
+from cc_synthetic import generate_course
+
+def test_model_round_trips_courseomatic_json_including_unknown_keys():
+    course = generate_course(units=2, activities_per_unit=4)
+    course['savedBy'] = 'app 2.1'
+    course['activities'][0]['customNote'] = {'colour': 'red'}
+    original = copy.deepcopy(course)
+
+    assert CourseModel.from_dict(course).to_dict() == original
+
+def test_model_indexes_activities_by_unit_and_assessment():
+    course = generate_course(units=3, activities_per_unit=4)
+    model = CourseModel.from_dict(course)
+
+    for unit in model.units:
+        assert model.unit_activities(unit.id) == [a for a in model.activities if a.unit_id == unit.id]
+    assert model.assessed_activities == [a for a in model.activities if a.is_assessed]
+    assert model.unit_activities('no such unit') == []
+
+    added = model.add_activity(Activity(id='extra', unit_id=model.units[0].id, is_assessed=True))
+    assert model.unit_activities(model.units[0].id)[-1] is added
+    assert model.assessed_activities[-1] is added
+    assert model.activity_index['extra'] is added
+
+def test_activity_outcomes_skip_unknown_indexes():
+    model = CourseModel.from_dict(generate_course(units=1, activities_per_unit=1, learning_outcomes=3))
+    activity = model.activities[0]
+    activity.learning_outcomes = [2, 0, 7, -1, 'x', 0]
+    outcomes = model.course.learning_outcomes
+    assert model.activity_outcomes(activity) == [(0, outcomes[0]), (2, outcomes[2])]
+
+def test_lazy_record_loads_once_on_first_use():
+    calls = []
+    def load():
+        calls.append(1)
+        return {'description': '<p>Body</p>', 'weighting': 30}
+
+    activity = LazyActivityBody(load, id='a1', title='From the manifest', is_assessed=True, weighting=100)
+    # Fields the manifest gave are read without loading anything
+    assert activity.title == 'From the manifest' and activity.id == 'a1'
+    assert not calls and not activity.loaded
+
+    assert activity.description == '<p>Body</p>'
+    assert activity.to_dict()['weighting'] == 30
+    assert calls == [1] and activity.loaded
@@ -0,0 +1,63 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_cli import load_script
+from cc_profile import NULL_PROFILER, Profiler
+from cc_synthetic import generate_course
+
+exporter_module = load_script('cc-export-complete.py', 'cc_export_complete')
+importer_module = load_script('cc-import.py', 'cc_import')
+
+def test_spans_are_recorded_passed_to_hooks_and_tagged_with_errors(tmp_path):
+    seen = []
+    profiler = Profiler(hooks=[seen.append])
+    with profiler.span('stage one') as args:
+        with profiler.span('page', 'member', member='a.html') as member_args:
+            member_args['bytes'] = 100
+        args['bytes'] = 250
+    with pytest.raises(ValueError):
+        with profiler.span('failing'):
+            raise ValueError('boom')
+
+    # Spans finish innermost first
+    assert [event['name'] for event in seen] == ['page', 'stage one', 'failing']
+    assert seen[2]['args']['error'] == 'ValueError'
+    assert 'peak_rss_mb' in seen[1]['args'] and 'peak_rss_mb' not in seen[0]['args']
+    assert profiler.summary()[('member', 'page')] == {'count': 1, 'seconds': pytest.approx(seen[0]['dur'] / 1e6),
+                                                      'bytes': 100}
+
+    trace_file = str(tmp_path / 'trace.json')
+    profiler.write_trace(trace_file)
+    with open(trace_file, encoding='utf-8') as f:
+        trace = json.load(f)
+    assert len(trace['traceEvents']) == 3 and all(event['ph'] == 'X' for event in trace['traceEvents'])
+
+    with pytest.raises(ValueError):
+        NULL_PROFILER.add_hook(seen.append)
+
+def test_profiled_export_and_import_record_stages_and_members():
+    course = generate_course(units=2, activities_per_unit=3)
+    plain = io.BytesIO()
+    exporter_module.CourseomaticExporter(course).export_to_cc(plain)
+
+    profiler = Profiler()
+    profiled = io.BytesIO()
+    exporter_module.CourseomaticExporter(course, profiler=profiler).export_to_cc(profiled)
+    # Profiling only observes
+    assert profiled.getvalue() == plain.getvalue()
+    members = [event['args']['member'] for event in profiler.events if event['cat'] == 'member']
+    assert 'imsmanifest.xml' in members
+    assert sum(1 for member in members if member.startswith('activities/')) == 6
+
+    profiler = Profiler()
+    importer_module.CommonCartridgeImporter(profiler=profiler).import_cartridge(io.BytesIO(plain.getvalue()))
+    names = {(event['cat'], event['name']) for event in profiler.events}
+    assert {('stage', 'manifest_parse'), ('member', 'content')} <= names
+    assert all(event['args']['bytes'] > 0 for event in profiler.events if event['name'] == 'content')
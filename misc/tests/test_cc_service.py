@@ -0,0 +1,102 @@
+import http.client
+import io
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+import zipfile
+
+import pytest
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_cli import load_script
+from cc_synthetic import generate_course
+
+service_module = load_script('cc-service.py', 'cc_service')
+
+def sleep_job(body, options):
+    time.sleep(float(body))
+    return body
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason='workers must inherit the test endpoint')
+def test_request_over_the_time_limit_recycles_the_pool(monkeypatch):
+    monkeypatch.setitem(service_module.ENDPOINTS, '/sleep', (sleep_job, 'text/plain'))
+    service = service_module.CartridgeService(workers=1, cache_bytes=0, timeout=0.5)
+    try:
+        start = time.perf_counter()
+        with pytest.raises(service_module.RequestTimedOut):
+            service.process('/sleep', {}, b'30')
+        assert time.perf_counter() - start < 5
+        assert service.stats()['timeouts'] == 1
+        assert service.stats()['pool_restarts'] == 1
+
+        # The stuck worker is gone and later requests get a fresh one
+        data, _, cached = service.process('/sleep', {}, b'0')
+        assert data == b'0' and not cached
+    finally:
+        service.shutdown()
+
+@pytest.fixture
+def service_port():
+    # The real script, since workers must import the endpoints by name
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([sys.executable, os.path.join(MISC_DIR, 'cc-service.py'), '--port', str(port),
+                                '--workers', '1', '--quiet'], stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                if request(port, 'GET', '/health')[0] == 200:
+                    break
+            except OSError:
+                time.sleep(0.1)
+        yield port
+    finally:
+        process.terminate()
+        process.wait(10)
+
+def request(port, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request(method, path, body, headers or {})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+def test_service_exports_imports_and_caches(service_port):
+    course = json.dumps(generate_course(units=2, activities_per_unit=3)).encode('utf-8')
+
+    status, headers, cartridge = request(service_port, 'POST', '/export', course)
+    assert status == 200 and headers['X-Cache'] == 'miss'
+    assert zipfile.ZipFile(io.BytesIO(cartridge)).testzip() is None
+
+    status, cached_headers, cached = request(service_port, 'POST', '/export', course)
+    assert status == 200 and cached_headers['X-Cache'] == 'hit' and cached == cartridge
+    status, _, body = request(service_port, 'POST', '/export', course, {'If-None-Match': headers['ETag']})
+    assert status == 304 and body == b''
+
+    status, _, imported = request(service_port, 'POST', '/import', cartridge)
+    assert status == 200
+    assert len(json.loads(imported)['activities']) == 6
+
+    stats = json.loads(request(service_port, 'GET', '/stats')[2])
+    assert stats['completed'] == 2 and stats['cache']['hits'] == 2
+
+def test_service_rejects_bad_requests(service_port):
+    assert request(service_port, 'POST', '/export?level=12', b'{}')[0] == 400
+    assert request(service_port, 'POST', '/nowhere', b'{}')[0] == 404
+    assert request(service_port, 'POST', '/import', b'not a zip file')[0] == 422
+
+    # http.client always frames the body, so send a request without Content-Length by hand
+    with socket.create_connection(('127.0.0.1', service_port), timeout=30) as connection:
+        connection.sendall(b'POST /export HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        response = connection.makefile('rb').readline()
+    assert response.split()[1] == b'400'
@@ -0,0 +1,74 @@
+import base64
+import gzip
+import io
+import json
+import os
+import sys
+
+import pytest
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_stream import (JSONStreamError, LazyText, SpillFile, build_value, iter_decoded_file, iter_events,
+                       iter_repository_files, load_course_model)
+from cc_synthetic import generate_course, generate_file_repository
+
+TRICKY = {
+    'text': 'quote " backslash \\ tab \t newline \n café \U0001F600  ',
+    'numbers': [0, -1, 3.25, 1e-7, 12345678901234567890, -0.5E+3],
+    'literals': [True, False, None],
+    'nested': {'empty': {}, 'list': [[], [{}]], '': 'blank key'},
+}
+
+def test_events_rebuild_the_document_whatever_the_chunk_size():
+    for ensure_ascii in (True, False):
+        document = json.dumps(TRICKY, ensure_ascii=ensure_ascii)
+        for chunk_size in (1, 2, 3, 7, 64):
+            events = iter_events(io.StringIO(document), chunk_size=chunk_size)
+            assert build_value(events, *next(events)) == TRICKY, (ensure_ascii, chunk_size)
+
+def test_long_strings_are_spilled_and_read_back(tmp_path):
+    long_text = 'é\U0001F600' * 5000 + '"\\'
+    document = json.dumps({'description': long_text, 'short': 'kept'})
+    events = iter_events(io.StringIO(document), SpillFile(str(tmp_path)), spill_threshold=1000, chunk_size=100)
+    value = build_value(events, *next(events))
+
+    assert isinstance(value['description'], LazyText)
+    assert value['short'] == 'kept' and not isinstance(value['short'], LazyText)
+    assert len(value['description']) == len(long_text)
+    assert value['description'] == long_text
+    assert ''.join(value['description'].iter_chunks(7)) == long_text
+
+def test_streamed_course_matches_json_load(tmp_path):
+    course = generate_course(units=3, activities_per_unit=4, description_size=3000)
+    course['extraTopLevel'] = TRICKY
+    path = tmp_path / 'course.json'
+    path.write_text(json.dumps(course), encoding='utf-8')
+
+    streamed = load_course_model(str(path), spill_dir=str(tmp_path), spill_threshold=500, stream_threshold=0)
+    loaded = load_course_model(str(path))
+    assert streamed.to_dict() == loaded.to_dict() == course
+    assert any(isinstance(activity.description, LazyText) for activity in streamed.activities)
+
+def test_malformed_documents_are_rejected():
+    for document in ('{"a": [1, 2}', '{"a": ', '[1, @]', '{"a": tru}'):
+        with pytest.raises(JSONStreamError):
+            events = iter_events(io.StringIO(document), chunk_size=4)
+            build_value(events, *next(events))
+
+def test_repository_files_decode_to_their_original_content(tmp_path):
+    repository = generate_file_repository(files=3, file_size=20000, compressible=False)
+    path = tmp_path / 'fileData.json'
+    path.write_text(json.dumps(repository), encoding='utf-8')
+
+    entries = list(iter_repository_files(str(path), spill_dir=str(tmp_path), spill_threshold=1000))
+    assert [entry['name'] for entry in entries] == [entry['name'] for entry in repository['course']['files']]
+    for entry, original in zip(entries, repository['course']['files']):
+        assert isinstance(entry['data'], LazyText)
+        expected = gzip.decompress(base64.b64decode(original['data']))
+        assert b''.join(iter_decoded_file(entry['data'], chunk_size=1001)) == expected
+
+    truncated = repository['course']['files'][0]['data'][:-8]
+    with pytest.raises(ValueError):
+        b''.join(iter_decoded_file(truncated))
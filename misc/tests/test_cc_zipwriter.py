@@ -0,0 +1,93 @@
+import io
+import os
+import random
+import sys
+import zipfile
+
+MISC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MISC_DIR)
+
+from cc_zipwriter import MemberWriter, StreamSink
+
+def members():
+    rng = random.Random(1)
+    for i in range(20):
+        data = ' '.join(rng.choice(['course', 'unit', 'activity', 'outcome']) for _ in range(rng.randint(0, 5000)))
+        compress_type = zipfile.ZIP_STORED if i % 7 == 3 else zipfile.ZIP_DEFLATED
+        yield f'member{i}.txt', data.encode('utf-8'), compress_type
+
+def info_for(name, compress_type):
+    info = zipfile.ZipInfo(name, (1980, 1, 1, 0, 0, 0))
+    info.compress_type = compress_type
+    return info
+
+def reference_archive(level):
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, 'w') as archive:
+        for name, data, compress_type in members():
+            info = info_for(name, compress_type)
+            info._compresslevel = level
+            archive.writestr(info, data)
+    return output.getvalue()
+
+def test_writer_output_matches_zipfile_writestr():
+    for level in (1, 6, 9):
+        for jobs, window in ((1, None), (4, None), (3, 2)):
+            output = io.BytesIO()
+            with zipfile.ZipFile(output, 'w') as archive:
+                with MemberWriter(archive, jobs=jobs, level=level, window=window) as writer:
+                    for name, data, compress_type in members():
+                        writer.writestr(info_for(name, compress_type), data)
+            assert output.getvalue() == reference_archive(level), (level, jobs, window)
+
+def test_streamed_members_keep_their_place_and_level():
+    contents = {}
+    for level in (0, 9):
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, 'w') as archive:
+            with MemberWriter(archive, jobs=4, level=level) as writer:
+                writer.writestr(info_for('first.txt', zipfile.ZIP_DEFLATED), b'first ' * 1000)
+                with writer.open(info_for('streamed.txt', zipfile.ZIP_DEFLATED)) as member:
+                    for _ in range(100):
+                        member.write(b'streamed data ' * 100)
+                writer.writestr(info_for('last.txt', zipfile.ZIP_DEFLATED), b'last ' * 1000)
+        archive = zipfile.ZipFile(output)
+        assert archive.namelist() == ['first.txt', 'streamed.txt', 'last.txt']
+        assert archive.testzip() is None
+        contents[level] = archive.getinfo('streamed.txt').compress_size
+    # --compress-level reaches streamed members too
+    assert contents[9] < contents[0]
+
+class Pipe(io.RawIOBase):
+    """Write-only, non-seekable output that records each write"""
+    def __init__(self):
+        self.writes = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+        return len(data)
+
+def test_stream_sink_groups_small_writes_for_a_non_seekable_output():
+    pipe = Pipe()
+    sink = StreamSink(pipe, buffer_size=4096)
+    writes = []
+    write = sink.write
+    sink.write = lambda data: writes.append(len(data)) or write(data)
+    with zipfile.ZipFile(sink, 'w') as archive:
+        with MemberWriter(archive, jobs=2) as writer:
+            for name, data, compress_type in members():
+                writer.writestr(info_for(name, compress_type), data)
+    sink.flush()
+
+    # Headers and small members are grouped; only large blocks pass straight through
+    assert len(pipe.writes) < len(writes) / 2
+    assert all(len(block) <= 4096 or len(block) in writes for block in pipe.writes)
+    data = b''.join(pipe.writes)
+    assert sink.bytes_written == len(data)
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert archive.testzip() is None
+    assert {name: archive.read(name) for name in archive.namelist()} == \
+        {name: content for name, content, _ in members()}